@@ -1,7 +1,9 @@
 // --- Service URLs ---
-const AUTH_URL = "http://localhost:8001";
-const ARTWORK_URL = "http://localhost:8002";
-const ORDERS_URL = "http://localhost:8003";
+// Everything goes through the API gateway, which routes to auth, artwork and orders
+const GATEWAY_URL = "http://localhost:8000";
+const AUTH_URL = GATEWAY_URL;
+const ARTWORK_URL = GATEWAY_URL;
+const ORDERS_URL = GATEWAY_URL;
 
 // --- Token helpers ---
 const tokenKey = "authToken";
@@ -64,6 +66,7 @@ async function login() {
 
 async function logout() {
   saveToken(null);
+  unwatchOrders();
   document.getElementById("artistSection").style.display = "none";
   document.getElementById("purchaseSection").style.display = "none";
   document.getElementById("ordersSection").style.display = "none";
@@ -82,30 +85,32 @@ async function refreshUser() {
       headers: { Authorization: `Bearer ${t}` },
     });
     if (!res.ok) throw new Error("Token invalid/expired");
-
-    const user = await res.json();
-
-    // Toggle UI by role
-    document.getElementById("authSection").style.display = "none";
-    document.getElementById("logoutBtn").style.display = "inline-block";
-    document.getElementById("ordersSection").style.display = "block";
-
-    if (user.role === "artist") {
-      document.getElementById("artistSection").style.display = "block";
-      document.getElementById("purchaseSection").style.display = "none";
-    } else if (user.role === "user") {
-      document.getElementById("purchaseSection").style.display = "block";
-      document.getElementById("artistSection").style.display = "none";
-    } else {
-      document.getElementById("artistSection").style.display = "none";
-      document.getElementById("purchaseSection").style.display = "none";
-    }
+    showUser(await res.json());
   } catch (err) {
     console.warn("User check failed:", err);
     saveToken(null);
   }
 }
 
+function showUser(user) {
+  // Toggle UI by role
+  document.getElementById("authSection").style.display = "none";
+  document.getElementById("logoutBtn").style.display = "inline-block";
+  document.getElementById("ordersSection").style.display = "block";
+  watchOrders();
+
+  if (user.role === "artist") {
+    document.getElementById("artistSection").style.display = "block";
+    document.getElementById("purchaseSection").style.display = "none";
+  } else if (user.role === "user") {
+    document.getElementById("purchaseSection").style.display = "block";
+    document.getElementById("artistSection").style.display = "none";
+  } else {
+    document.getElementById("artistSection").style.display = "none";
+    document.getElementById("purchaseSection").style.display = "none";
+  }
+}
+
 // --- Artwork ---
 async function createArtwork() {
   const title = document.getElementById("art_title").value.trim();
@@ -121,8 +126,8 @@ async function createArtwork() {
 
   const j = await res.json();
   if (res.ok) {
+    // The catalog stream adds it to the list
     alert(`🎉 Artwork created: ${j.title}`);
-    listArtworks();
   } else {
     alert("⚠️ Failed: " + JSON.stringify(j));
   }
@@ -130,7 +135,11 @@ async function createArtwork() {
 
 async function listArtworks() {
   const res = await fetch(`${ARTWORK_URL}/artworks`);
-  const arr = await res.json();
+  renderArtworks(await res.json());
+}
+
+function renderArtworks(arr) {
+  artworks = arr;
   const el = document.getElementById("art_list");
   el.innerHTML = "";
 
@@ -166,14 +175,24 @@ async function buyArtwork(artId) {
     body: JSON.stringify({ art_id: artId }),
   });
 
-  const j = await res.json();
-  if (res.ok) {
-    alert(`🛒 Order created! ID: ${j.id}`);
-    listArtworks();
-    listOrders();
-  } else {
+  let j = await res.json();
+  if (!res.ok) {
     alert("⚠️ Failed: " + JSON.stringify(j));
+    return;
+  }
+
+  // The order is accepted (202) and reserved in the background; long-poll for the outcome
+  while (j.status === "created") {
+    const poll = await fetch(`${ORDERS_URL}/orders/${j.id}?wait=10`);
+    if (!poll.ok) break;
+    j = await poll.json();
   }
+  if (j.status === "confirmed") {
+    alert(`🛒 Order confirmed! ID: ${j.id}`);
+  } else {
+    alert(`⚠️ Order ${j.id} ${j.status}`);
+  }
+  // The catalog and order streams have already updated both lists
 }
 
 async function purchase() {
@@ -183,18 +202,24 @@ async function purchase() {
 
 // --- Orders ---
 async function listOrders() {
-  const res = await fetch(`${ORDERS_URL}/orders`, {
+  // Artwork details come back with the orders in one batched call
+  const res = await fetch(`${ORDERS_URL}/orders?include_artwork=true`, {
     headers: authHeaders(),
   });
 
   const arr = await res.json();
-  const el = document.getElementById("ordersList");
-  el.innerHTML = "";
-
   if (!res.ok) {
-    el.innerHTML = `<p>⚠️ Failed to fetch orders: ${JSON.stringify(arr)}</p>`;
+    document.getElementById("ordersList").innerHTML =
+      `<p>⚠️ Failed to fetch orders: ${JSON.stringify(arr)}</p>`;
     return;
   }
+  renderOrders(arr);
+}
+
+function renderOrders(arr) {
+  orders = arr;
+  const el = document.getElementById("ordersList");
+  el.innerHTML = "";
 
   if (arr.length === 0) {
     el.innerHTML = "<p>No orders found.</p>";
@@ -206,7 +231,7 @@ async function listOrders() {
     div.className = "art-card";
     div.innerHTML = `
       <p><b>Order ID:</b> ${o.id}</p>
-      <p><b>Artwork ID:</b> ${o.art_id}</p>
+      <p><b>Artwork:</b> ${o.artwork ? `${o.artwork.title} ($${o.artwork.price}, by ${o.artwork.owner})` : `#${o.art_id}`}</p>
       <p><b>Buyer:</b> ${o.buyer}</p>
       <p><b>Status:</b> ${o.status}</p>
     `;
@@ -214,13 +239,70 @@ async function listOrders() {
   });
 }
 
+// --- Live updates ---
+// Server-Sent Events keep the lists current without re-fetching them. EventSource
+// reconnects on its own and sends Last-Event-ID, so events missed meanwhile are replayed.
+let artworks = [];
+let orders = [];
+let artworkStream = null;
+let orderStream = null;
+
+function watchArtworks() {
+  if (artworkStream) return;
+  artworkStream = new EventSource(`${ARTWORK_URL}/artworks/stream`);
+  const upsert = (e) => {
+    const { artwork } = JSON.parse(e.data);
+    const i = artworks.findIndex((a) => a.id === artwork.id);
+    if (i >= 0) artworks[i] = artwork;
+    else artworks.unshift(artwork);
+    renderArtworks(artworks);
+  };
+  artworkStream.addEventListener("artwork.created", upsert);
+  artworkStream.addEventListener("artwork.sold", upsert);
+}
+
+function watchOrders() {
+  if (orderStream || !getToken()) return;
+  // EventSource cannot send an Authorization header
+  orderStream = new EventSource(`${ORDERS_URL}/orders/stream?access_token=${encodeURIComponent(getToken())}`);
+  const update = (e) => {
+    const ev = JSON.parse(e.data);
+    const o = orders.find((x) => x.id === ev.order_id);
+    if (o) o.status = ev.status;
+    else orders.unshift({ id: ev.order_id, art_id: ev.art_id, buyer: ev.buyer, status: ev.status });
+    renderOrders(orders);
+  };
+  ["order.created", "order.confirmed", "order.failed"].forEach((t) => orderStream.addEventListener(t, update));
+}
+
+function unwatchOrders() {
+  if (orderStream) orderStream.close();
+  orderStream = null;
+}
+
 // --- Init ---
 document.getElementById("token_status").innerText = getToken()
   ? "✅ Authenticated"
   : "❌ Not authenticated";
 
+watchArtworks();
+
 (async () => {
-  await refreshUser();
-  listArtworks();
-  if (getToken()) listOrders();
+  if (!getToken()) {
+    listArtworks();
+    return;
+  }
+  // User, catalog and orders in one round trip through the gateway
+  const res = await fetch(`${GATEWAY_URL}/dashboard`, { headers: authHeaders() });
+  if (!res.ok) {
+    saveToken(null);
+    listArtworks();
+    return;
+  }
+  const d = await res.json();
+  if (d.me) showUser(d.me);
+  if (d.artworks) renderArtworks(d.artworks.items);
+  else listArtworks();
+  if (d.orders) renderOrders(d.orders.items);
+  else listOrders();
 })();
@@ -0,0 +1,113 @@
+"""
+Resilience check for the orders -> artwork client.
+
+Starts the fake artwork server (benchmarks/fake_artwork.py) in-process and
+drives the real client (service-orders/app/artwork_client.py) through a
+series of phases: healthy, tail latency without and with hedging, a full
+outage, and recovery. For each phase it reports latency percentiles, errors,
+fast failures from an open breaker, and the breaker state afterwards. No
+services need to be running.
+
+    python benchmarks/artwork_resilience.py --calls 300 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PORT = int(os.getenv("FAKE_ARTWORK_PORT", "8012"))
+# The client reads its settings at import time
+os.environ.setdefault("ARTWORK_SERVICE_URL", f"http://127.0.0.1:{PORT}")
+os.environ.setdefault("ARTWORK_TIMEOUT", "1")
+os.environ.setdefault("BREAKER_RESET_TIMEOUT", "2")
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, os.path.join(HERE, "..", "service-orders", "app"))
+
+import uvicorn  # noqa: E402
+import httpx  # noqa: E402
+import artwork_client  # noqa: E402
+import resilience  # noqa: E402
+import fake_artwork  # noqa: E402
+from bench_common import summarize  # noqa: E402
+
+PHASES = [
+    # name, faults, hedge_after
+    ("healthy", {"latency": 0.005}, 0),
+    ("tail_latency", {"latency": 0.005, "slow_rate": 0.05, "slow_latency": 0.5}, 0),
+    ("tail_latency_hedged", {"latency": 0.005, "slow_rate": 0.05, "slow_latency": 0.5}, 0.2),
+    ("outage", {"latency": 0.005, "error_rate": 1.0}, 0),
+    ("recovered", {"latency": 0.005}, 0),
+]
+
+
+def start_fake_server() -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(fake_artwork.app, host="127.0.0.1", port=PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def run_phase(name: str, calls: int, concurrency: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+    fast_fails = 0
+
+    async def call(i: int):
+        nonlocal errors, fast_fails
+        async with sem:
+            start = time.perf_counter()
+            try:
+                resp = await artwork_client.get(f"/artworks/{i}", "fake-token")
+                ok = resp.status_code == 200
+            except resilience.CircuitOpenError:
+                fast_fails += 1
+                ok = False
+            except httpx.RequestError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(1, calls + 1)))
+    result = summarize(name, latencies, errors, time.perf_counter() - start)
+    result["fast_fails"] = fast_fails
+    result["breaker"] = artwork_client.stats()["breakers"].get("GET /artworks/{id}")
+    result["hedges"] = dict(artwork_client.stats()["hedges"])
+    return result
+
+
+async def main(args):
+    await artwork_client.startup()
+    results = []
+    try:
+        for name, faults, hedge_after in PHASES:
+            fake_artwork.faults = fake_artwork.Faults(**faults)
+            if name == "recovered":
+                # Wait until the breaker is half-open, then let a single probe close it
+                await asyncio.sleep(float(os.environ["BREAKER_RESET_TIMEOUT"]))
+                await artwork_client.get("/artworks/1", "fake-token")
+            artwork_client.ARTWORK_HEDGE_AFTER = hedge_after
+            results.append(await run_phase(name, args.calls, args.concurrency))
+    finally:
+        await artwork_client.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    server = start_fake_server()
+    try:
+        asyncio.run(main(args))
+    finally:
+        server.should_exit = True
@@ -0,0 +1,72 @@
+"""
+Helpers shared by the benchmark scripts.
+
+The benchmarks talk to running services over HTTP (see `docker compose up`),
+so they only need `httpx` on the machine that drives the load.
+"""
+import os
+import statistics
+import time
+import uuid
+import httpx
+
+AUTH_URL = os.getenv("BENCH_AUTH_URL", "http://localhost:8001")
+ARTWORK_URL = os.getenv("BENCH_ARTWORK_URL", "http://localhost:8002")
+ORDERS_URL = os.getenv("BENCH_ORDERS_URL", "http://localhost:8003")
+
+
+def unique_name(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex[:8]}"
+
+
+async def register_and_login(client: httpx.AsyncClient, role: str, username: str | None = None,
+                             password: str = "pass", auth_url: str = AUTH_URL) -> str:
+    """Register a throwaway user with the given role and return its access token."""
+    username = username or unique_name(f"bench_{role}")
+    await client.post(f"{auth_url}/auth/register",
+                      json={"username": username, "password": password, "role": role})
+    resp = await client.post(f"{auth_url}/auth/token",
+                             data={"username": username, "password": password})
+    resp.raise_for_status()
+    return resp.json()["access_token"]
+
+
+def bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def summarize(name: str, latencies: list[float], errors: int, elapsed: float) -> dict:
+    """Build the result record every benchmark prints (latencies in seconds)."""
+    total = len(latencies) + errors
+    return {
+        "scenario": name,
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+class Timer:
+    """Context manager that records the wall time of a block in `elapsed`."""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        return False
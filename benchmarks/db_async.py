@@ -0,0 +1,112 @@
+"""
+Sync vs async database layer at high concurrency.
+
+Starts the three services once per DATABASE_URL scheme (sync `sqlite` and
+async `sqlite+aiosqlite` by default) on fresh databases, seeds a catalog,
+and drives the same mix against each: artwork detail reads, catalog pages
+and order placement, with many more clients in flight than the threadpool
+has threads (40 by default). Prints one JSON record per scheme and request
+kind.
+
+    python benchmarks/db_async.py --concurrency 200 --requests 4000
+    python benchmarks/db_async.py --schemes sqlite sqlite+aiosqlite --write-ratio 0.2
+
+Postgres needs a server, so compare it by starting the stack with a
+`postgresql://` and then a `postgresql+asyncpg://` DATABASE_URL and running
+`suite.py run --external` against each.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import httpx
+from bench_common import bearer, summarize
+from suite import Services, login
+
+
+async def seed(client: httpx.AsyncClient, urls: dict, artworks: int, buyers: int) -> tuple[list[int], list[str]]:
+    artist = await login(client, urls, "db_async_artist", "artist")
+    lines = [json.dumps({"title": f"piece {i}", "description": "bench", "price": 10.0 + i % 90})
+             for i in range(artworks)]
+    resp = await client.post(f"{urls['artwork']}/artworks/bulk", content="\n".join(lines).encode(), timeout=300,
+                             headers=dict(bearer(artist), **{"Content-Type": "application/x-ndjson"}))
+    resp.raise_for_status()
+    resp = await client.get(f"{urls['artwork']}/artworks/ids", params={"owner": "db_async_artist"})
+    resp.raise_for_status()
+    tokens = [await login(client, urls, f"db_async_buyer_{i}", "user") for i in range(buyers)]
+    return resp.json(), tokens
+
+
+async def drive(client: httpx.AsyncClient, urls: dict, art_ids: list[int], tokens: list[str], args) -> list[dict]:
+    kinds = ("detail", "page", "order")
+    latencies = {kind: [] for kind in kinds}
+    errors = {kind: 0 for kind in kinds}
+    unsold = list(art_ids)
+    random.shuffle(unsold)
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def one(i: int):
+        if unsold and random.random() < args.write_ratio:
+            kind = "order"
+            request = client.post(f"{urls['orders']}/orders", headers=bearer(tokens[i % len(tokens)]),
+                                  json={"art_id": unsold.pop()})
+        elif random.random() < 0.5:
+            kind = "detail"
+            request = client.get(f"{urls['artwork']}/artworks/{random.choice(art_ids)}")
+        else:
+            kind = "page"
+            request = client.get(f"{urls['artwork']}/artworks",
+                                 params={"limit": 50, "min_price": random.randint(10, 90)})
+        async with sem:
+            start = time.perf_counter()
+            try:
+                ok = (await request).status_code in (200, 201, 202)
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies[kind].append(time.perf_counter() - start)
+            else:
+                errors[kind] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - start
+    results = [summarize(kind, latencies[kind], errors[kind], elapsed) for kind in kinds]
+    results.append(summarize("all", sum(latencies.values(), []), sum(errors.values()), elapsed))
+    return results
+
+
+async def run_scheme(scheme: str, args) -> list[dict]:
+    services = Services(args.base_port, {"TRACE_SAMPLE_RATE": "0", "BCRYPT_ROUNDS": "4"}, db_scheme=scheme)
+    services.start()
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+            art_ids, tokens = await seed(client, services.urls, args.artworks, args.buyers)
+            results = await drive(client, services.urls, art_ids, tokens, args)
+    finally:
+        services.stop()
+    for result in results:
+        result["scenario"] = f"{scheme}:{result['scenario']}"
+        result["concurrency"] = args.concurrency
+    return results
+
+
+async def main(args):
+    results = []
+    for scheme in args.schemes:
+        results += await run_scheme(scheme, args)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--schemes", nargs="+", default=["sqlite", "sqlite+aiosqlite"])
+    ap.add_argument("--concurrency", type=int, default=200)
+    ap.add_argument("--requests", type=int, default=4000)
+    ap.add_argument("--write-ratio", dest="write_ratio", type=float, default=0.1)
+    ap.add_argument("--artworks", type=int, default=5000)
+    ap.add_argument("--buyers", type=int, default=20)
+    ap.add_argument("--base-port", dest="base_port", type=int, default=18101)
+    asyncio.run(main(ap.parse_args()))
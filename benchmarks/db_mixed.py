@@ -0,0 +1,87 @@
+"""
+Mixed read/write SQLite throughput: default engine vs the tuned profile.
+
+Runs the same workload (N threads, each doing reads and inserts against an
+artworks-like table) twice on a fresh database file: once with the engine
+settings the services used to have, once with `common.db.create_db_engine`.
+No services need to be running.
+
+    python benchmarks/db_mixed.py --threads 16 --ops 500 --write-ratio 0.2
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from common.db import create_db_engine  # noqa: E402
+from bench_common import summarize  # noqa: E402
+
+
+def run(engine, threads: int, ops: int, write_ratio: float) -> dict:
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS artworks (id INTEGER PRIMARY KEY, title TEXT, price REAL, owner TEXT)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_owner ON artworks (owner)"))
+        conn.execute(text("INSERT INTO artworks (title, price, owner) VALUES ('seed', 1.0, 'o0')"))
+
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker():
+        nonlocal errors
+        local, local_errors = [], 0
+        for _ in range(ops):
+            start = time.perf_counter()
+            try:
+                with engine.begin() as conn:
+                    if random.random() < write_ratio:
+                        conn.execute(text("INSERT INTO artworks (title, price, owner) VALUES (:t, :p, :o)"),
+                                     {"t": "x", "p": random.random() * 100, "o": f"o{random.randint(0, 50)}"})
+                    else:
+                        conn.execute(text("SELECT id, title, price FROM artworks WHERE owner = :o LIMIT 50"),
+                                     {"o": f"o{random.randint(0, 50)}"}).fetchall()
+                local.append(time.perf_counter() - start)
+            except Exception:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors += local_errors
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return latencies, errors, time.perf_counter() - start
+
+
+def main(args):
+    results = []
+    for label in ("default", "tuned"):
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite:///{tmp}/bench.db"
+            if label == "default":
+                engine = create_engine(url, connect_args={"check_same_thread": False})
+            else:
+                engine = create_db_engine(url)
+            latencies, errors, elapsed = run(engine, args.threads, args.ops, args.write_ratio)
+            engine.dispose()
+        result = summarize(f"sqlite_mixed_{label}", latencies, errors, elapsed)
+        result["write_ratio"] = args.write_ratio
+        results.append(result)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=500)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    main(parser.parse_args())
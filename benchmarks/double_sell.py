@@ -0,0 +1,93 @@
+"""
+Concurrency stress check for double-selling a single artwork.
+
+Fires many parallel orders at one artwork, waits for every order to be
+confirmed or failed, and verifies that exactly one of them was confirmed.
+Reports the accept latency of the burst and the time for orders to settle. Exits with
+status 1 if more (or fewer) than one order went through.
+
+    python benchmarks/double_sell.py --buyers 300 --rounds 5
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import httpx
+from bench_common import ARTWORK_URL, ORDERS_URL, bearer, register_and_login, summarize
+
+
+async def burst(client: httpx.AsyncClient, artist: str, buyers: list[str]) -> tuple[int, list[float], list[float], int]:
+    resp = await client.post(f"{ARTWORK_URL}/artworks", headers=bearer(artist),
+                             json={"title": "hot piece", "price": 999.0})
+    resp.raise_for_status()
+    art_id = resp.json()["id"]
+    latencies: list[float] = []
+    errors = 0
+    successes = 0
+
+    async def order(token: str):
+        nonlocal errors, successes
+        start = time.perf_counter()
+        try:
+            r = await client.post(f"{ORDERS_URL}/orders", headers=bearer(token), json={"art_id": art_id})
+            if r.status_code != 202:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+            # Orders are reserved in the background; long-poll until each one settles
+            o = r.json()
+            while o["status"] == "created":
+                o = (await client.get(f"{ORDERS_URL}/orders/{o['id']}", params={"wait": 10})).json()
+        except httpx.HTTPError:
+            errors += 1
+            return
+        settle_latencies.append(time.perf_counter() - start)
+        if o["status"] == "confirmed":
+            successes += 1
+
+    settle_latencies: list[float] = []
+    await asyncio.gather(*(order(t) for t in buyers))
+    return successes, latencies, settle_latencies, errors
+
+
+async def main(args) -> int:
+    limits = httpx.Limits(max_connections=args.buyers)
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        artist = await register_and_login(client, "artist")
+        # A handful of buyer accounts is enough; tokens are reused across requests
+        tokens = [await register_and_login(client, "user") for _ in range(min(args.buyers, 10))]
+        buyers = [tokens[i % len(tokens)] for i in range(args.buyers)]
+
+        failed_rounds = 0
+        all_latencies: list[float] = []
+        all_settle: list[float] = []
+        all_errors = 0
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            successes, latencies, settle, errors = await burst(client, artist, buyers)
+            all_latencies += latencies
+            all_settle += settle
+            all_errors += errors
+            if successes != 1:
+                failed_rounds += 1
+                print(f"round sold {successes} times", file=sys.stderr)
+        elapsed = time.perf_counter() - start
+
+    result = summarize("double_sell_burst", all_latencies, all_errors, elapsed)
+    # Time from POST until the order was confirmed or failed
+    settle = summarize("settle", all_settle, 0, elapsed)
+    for key in ("p50_ms", "p95_ms", "p99_ms"):
+        result[f"settle_{key}"] = settle[key]
+    result["buyers_per_round"] = args.buyers
+    result["rounds"] = args.rounds
+    result["rounds_violating_single_sale"] = failed_rounds
+    print(json.dumps(result, indent=2))
+    return 1 if failed_rounds else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buyers", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,88 @@
+"""
+Fake artwork service with fault injection, for exercising the orders
+service's resilience layer without a real catalog.
+
+Serves the artwork endpoints orders calls (`/artworks/events`,
+`/artworks/{id}`, `/artworks/{id}/mark_sold`, `/artworks/batch_get`) with
+canned data. Faults are changed at runtime:
+
+    python benchmarks/fake_artwork.py --port 8012
+    curl -X POST localhost:8012/_faults -H 'Content-Type: application/json' \\
+         -d '{"latency": 0.02, "slow_rate": 0.05, "slow_latency": 2, "error_rate": 0.1}'
+
+Point orders at it with `ARTWORK_SERVICE_URL=http://127.0.0.1:8012`.
+"""
+import argparse
+import asyncio
+import random
+from fastapi import FastAPI, Response
+from pydantic import BaseModel
+
+
+class Faults(BaseModel):
+    latency: float = 0.0       # seconds added to every response
+    slow_rate: float = 0.0     # fraction of responses delayed by slow_latency instead
+    slow_latency: float = 0.0
+    error_rate: float = 0.0    # fraction of responses answered with error_status
+    error_status: int = 503
+
+
+faults = Faults()
+calls = {"total": 0}
+app = FastAPI(title="Fake Artwork Service")
+
+
+async def inject() -> Response | None:
+    calls["total"] += 1
+    delay = faults.slow_latency if random.random() < faults.slow_rate else faults.latency
+    if delay:
+        await asyncio.sleep(delay)
+    if random.random() < faults.error_rate:
+        return Response(status_code=faults.error_status)
+    return None
+
+
+def artwork(art_id: int) -> dict:
+    return {"id": art_id, "title": f"fake {art_id}", "description": None,
+            "price": 10.0, "owner": "fake_artist", "is_sold": False}
+
+
+@app.post("/_faults")
+def set_faults(new: Faults):
+    global faults
+    faults = new
+    return faults
+
+
+@app.get("/_stats")
+def stats():
+    return calls
+
+
+@app.get("/artworks/events")
+async def events(after: int = 0, limit: int = 500):
+    # Fifty artworks, all created by the fake artist
+    return await inject() or [{"id": i, "type": "artwork.created", "art_id": i, "owner": "fake_artist"}
+                              for i in range(after + 1, min(after + limit, 50) + 1)]
+
+
+@app.post("/artworks/batch_get")
+async def batch_get(body: dict):
+    return await inject() or {"items": [artwork(i) for i in body["ids"]], "missing": []}
+
+
+@app.get("/artworks/{art_id}")
+async def get_artwork(art_id: int):
+    return await inject() or artwork(art_id)
+
+
+@app.post("/artworks/{art_id}/mark_sold")
+async def mark_sold(art_id: int, ref: str | None = None):
+    return await inject() or dict(artwork(art_id), is_sold=True)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8012)
+    uvicorn.run(app, host="127.0.0.1", port=parser.parse_args().port, log_level="warning")
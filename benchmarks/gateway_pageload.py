@@ -0,0 +1,115 @@
+"""
+UI page load with and without the API gateway.
+
+Starts auth, artwork, orders and the gateway on fresh databases, seeds a
+catalog and some orders, then loads the UI's first screen (current user,
+a catalog page and the user's orders with artwork details) three ways:
+
+    direct             GET /auth/me, then /artworks and /orders in parallel,
+                       against each service's own port (the UI without gateway)
+    gateway_proxy      the same three requests through the gateway
+    gateway_dashboard  one GET /dashboard on the gateway
+
+On localhost a round trip costs next to nothing, so `--client-rtt-ms` adds a
+simulated client network round trip per sequential request stage.
+Reports page-load latency percentiles, plus the requests and sequential
+round trips per page.
+
+    python benchmarks/gateway_pageload.py --clients 50 --loads 20 --client-rtt-ms 40
+"""
+import argparse
+import asyncio
+import json
+import time
+import httpx
+from bench_common import bearer, summarize
+from suite import Services, login
+
+MODES = ("direct", "gateway_proxy", "gateway_dashboard")
+# (requests, sequential round trips) per page load
+SHAPE = {"direct": (3, 2), "gateway_proxy": (3, 2), "gateway_dashboard": (1, 1)}
+
+
+async def seed(client: httpx.AsyncClient, urls: dict, buyers: int, artworks: int) -> list[str]:
+    artist = await login(client, urls, "pageload_artist", "artist")
+    lines = [json.dumps({"title": f"piece {i}", "price": 10.0 + i}) for i in range(artworks)]
+    resp = await client.post(f"{urls['artwork']}/artworks/bulk", content="\n".join(lines).encode(), timeout=300,
+                             headers=dict(bearer(artist), **{"Content-Type": "application/x-ndjson"}))
+    resp.raise_for_status()
+    resp = await client.get(f"{urls['artwork']}/artworks/ids", params={"owner": "pageload_artist"})
+    art_ids = iter(resp.json())
+    tokens = []
+    for i in range(buyers):
+        token = await login(client, urls, f"pageload_buyer_{i}", "user")
+        for _ in range(3):
+            await client.post(f"{urls['orders']}/orders", headers=bearer(token), json={"art_id": next(art_ids)})
+        tokens.append(token)
+    return tokens
+
+
+async def load_page(client: httpx.AsyncClient, mode: str, urls: dict, token: str, rtt: float) -> bool:
+    headers = bearer(token)
+    if mode == "gateway_dashboard":
+        await asyncio.sleep(rtt)
+        resp = await client.get(f"{urls['gateway']}/dashboard", headers=headers)
+        return resp.status_code == 200 and not resp.json()["errors"]
+    base = dict.fromkeys(("auth", "artwork", "orders"), urls["gateway"]) if mode == "gateway_proxy" else urls
+    await asyncio.sleep(rtt)
+    me = await client.get(f"{base['auth']}/auth/me", headers=headers)
+    await asyncio.sleep(rtt)
+    artworks, orders = await asyncio.gather(
+        client.get(f"{base['artwork']}/artworks", params={"limit": 20}),
+        client.get(f"{base['orders']}/orders", params={"limit": 10, "include_artwork": "true"}, headers=headers),
+    )
+    return all(r.status_code == 200 for r in (me, artworks, orders))
+
+
+async def run_mode(client: httpx.AsyncClient, mode: str, urls: dict, tokens: list[str], args) -> dict:
+    latencies: list[float] = []
+    errors = 0
+
+    async def user(token: str):
+        nonlocal errors
+        for _ in range(args.loads):
+            start = time.perf_counter()
+            try:
+                ok = await load_page(client, mode, urls, token, args.client_rtt_ms / 1000)
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(tokens[i % len(tokens)]) for i in range(args.clients)))
+    result = summarize(mode, latencies, errors, time.perf_counter() - start)
+    result["requests_per_page"], result["round_trips_per_page"] = SHAPE[mode]
+    result["client_rtt_ms"] = args.client_rtt_ms
+    return result
+
+
+async def main(args):
+    services = Services(args.base_port, {"TRACE_SAMPLE_RATE": "0", "BCRYPT_ROUNDS": "4"},
+                        names=("auth", "artwork", "orders", "gateway"))
+    services.start()
+    try:
+        limits = httpx.Limits(max_connections=args.clients * 3, max_keepalive_connections=args.clients * 3)
+        async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+            tokens = await seed(client, services.urls, args.buyers, args.artworks)
+            await run_mode(client, "direct", services.urls, tokens, argparse.Namespace(**{**vars(args), "loads": 2}))
+            results = [await run_mode(client, mode, services.urls, tokens, args) for mode in MODES]
+    finally:
+        services.stop()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50, help="Concurrent simulated users")
+    parser.add_argument("--loads", type=int, default=20, help="Page loads per user")
+    parser.add_argument("--client-rtt-ms", dest="client_rtt_ms", type=float, default=0)
+    parser.add_argument("--buyers", type=int, default=20)
+    parser.add_argument("--artworks", type=int, default=500)
+    parser.add_argument("--base-port", dest="base_port", type=int, default=18201)
+    asyncio.run(main(parser.parse_args()))
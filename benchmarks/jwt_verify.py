@@ -0,0 +1,129 @@
+"""
+Access token signing and verification cost per algorithm.
+
+For each algorithm, signs and verifies a token shaped like the auth
+service's through the code the services run (`keys.generate_key`, the
+published JWK and `common.jwks.decode`), and reports microseconds per
+sign and per verify, verifications per second on one core and token size:
+
+    HS256   shared secret (every verifying service holds the signing key)
+    RS256   RSA 2048
+    ES256   ECDSA P-256
+    EdDSA   Ed25519
+
+Two reference rows put the numbers in context:
+
+    token_cache_hit  `auth_utils.decode_token` for a token verified before
+    auth_verify_http a round-trip to the auth service's /auth/verify over a
+                     kept-alive localhost connection (skipped with --no-remote)
+
+    python benchmarks/jwt_verify.py --seconds 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+import httpx
+import jwt
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, os.path.join(HERE, "..", "service-auth", "app"))
+TMP = tempfile.TemporaryDirectory(prefix="artscape-jwt-")
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP.name}/auth.db"
+os.environ["SECRET_KEY"] = "bench-secret-" + "x" * 32
+
+from common import auth_utils, jwks  # noqa: E402
+import keys  # noqa: E402
+from suite import Services, login  # noqa: E402
+
+ALGORITHMS = ("HS256", "RS256", "ES256", "EdDSA")
+
+
+def claims() -> dict:
+    return {"sub": "bench_user", "role": "user", "exp": datetime.utcnow() + timedelta(hours=1)}
+
+
+def per_call(fn, seconds: float) -> float:
+    """Mean seconds per call of `fn` over about `seconds`."""
+    calls, start = 0, time.perf_counter()
+    deadline = start + seconds
+    while True:
+        for _ in range(20):
+            fn()
+        calls += 20
+        now = time.perf_counter()
+        if now >= deadline:
+            return (now - start) / calls
+
+
+def record(name: str, sign_s: float | None, verify_s: float, token: str | None = None) -> dict:
+    return {
+        "algorithm": name,
+        "sign_us": round(sign_s * 1e6, 1) if sign_s is not None else None,
+        "verify_us": round(verify_s * 1e6, 1),
+        "verifies_per_s": round(1 / verify_s),
+        "token_bytes": len(token) if token else None,
+    }
+
+
+def local(algorithm: str, seconds: float) -> dict:
+    if algorithm == "HS256":
+        secret = os.environ["SECRET_KEY"]
+        sign = lambda: jwt.encode(claims(), secret, algorithm="HS256")  # noqa: E731
+        token = sign()
+        verify = lambda: jwks.decode(token, {}, secret)  # noqa: E731
+    else:
+        private_key = keys.generate_key(algorithm)
+        kid = f"bench-{algorithm}"
+        published = jwks.parse({"keys": [keys.public_jwk(algorithm, private_key, kid)]})
+        sign = lambda: jwt.encode(claims(), private_key, algorithm=algorithm, headers={"kid": kid})  # noqa: E731
+        token = sign()
+        verify = lambda: jwks.decode(token, published)  # noqa: E731
+    assert verify()["sub"] == "bench_user"
+    return record(algorithm, per_call(sign, seconds), per_call(verify, seconds), token)
+
+
+def cache_hit(seconds: float) -> dict:
+    token = jwt.encode(claims(), os.environ["SECRET_KEY"], algorithm="HS256")
+    auth_utils.SECRET_KEY = os.environ["SECRET_KEY"]
+    auth_utils.decode_token(token)
+    return record("token_cache_hit", None, per_call(lambda: auth_utils.decode_token(token), seconds))
+
+
+async def remote(seconds: float, base_port: int) -> dict:
+    services = Services(base_port, {"TRACE_SAMPLE_RATE": "0", "BCRYPT_ROUNDS": "4"}, names=("auth",))
+    services.start()
+    try:
+        async with httpx.AsyncClient(timeout=10) as client:
+            token = await login(client, services.urls, "jwt_bench", "user")
+            url = f"{services.urls['auth']}/auth/verify"
+            calls, start = 0, time.perf_counter()
+            while time.perf_counter() - start < seconds:
+                resp = await client.get(url, params={"token": token})
+                resp.raise_for_status()
+                calls += 1
+            return record("auth_verify_http", None, (time.perf_counter() - start) / calls, token)
+    finally:
+        services.stop()
+
+
+def main(args):
+    results = [local(algorithm, args.seconds) for algorithm in args.algorithms]
+    results.append(cache_hit(args.seconds))
+    if args.remote:
+        results.append(asyncio.run(remote(args.seconds, args.base_port)))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--algorithms", nargs="+", choices=ALGORITHMS, default=list(ALGORITHMS))
+    parser.add_argument("--seconds", type=float, default=2, help="Seconds to time each operation for")
+    parser.add_argument("--no-remote", dest="remote", action="store_false", help="Skip the /auth/verify round-trip")
+    parser.add_argument("--base-port", dest="base_port", type=int, default=18501)
+    main(parser.parse_args())
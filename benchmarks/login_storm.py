@@ -0,0 +1,81 @@
+"""
+Login storm benchmark for the auth service.
+
+Fires a burst of concurrent `/auth/token` logins while a background probe
+keeps calling the cheap `/auth/verify` endpoint, and reports p50/p99 for
+both plus how many logins were shed with 503. A healthy hashing pool keeps
+`/auth/verify` fast no matter how large the storm is.
+
+    python benchmarks/login_storm.py --logins 400 --concurrency 100
+"""
+import argparse
+import asyncio
+import json
+import time
+import httpx
+from bench_common import AUTH_URL, register_and_login, summarize, unique_name
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 10)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        username = unique_name("storm")
+        token = await register_and_login(client, "user", username=username)
+
+        sem = asyncio.Semaphore(args.concurrency)
+        login_lat: list[float] = []
+        login_errors = 0
+        shed = 0
+        done = asyncio.Event()
+
+        async def login():
+            nonlocal login_errors, shed
+            async with sem:
+                start = time.perf_counter()
+                try:
+                    r = await client.post(f"{AUTH_URL}/auth/token", data={"username": username, "password": "pass"})
+                except httpx.HTTPError:
+                    login_errors += 1
+                    return
+                if r.status_code == 200:
+                    login_lat.append(time.perf_counter() - start)
+                elif r.status_code == 503:
+                    shed += 1
+                else:
+                    login_errors += 1
+
+        probe_lat: list[float] = []
+        probe_errors = 0
+
+        async def probe():
+            nonlocal probe_errors
+            while not done.is_set():
+                start = time.perf_counter()
+                try:
+                    r = await client.get(f"{AUTH_URL}/auth/verify", params={"token": token})
+                    if r.status_code == 200:
+                        probe_lat.append(time.perf_counter() - start)
+                    else:
+                        probe_errors += 1
+                except httpx.HTTPError:
+                    probe_errors += 1
+                await asyncio.sleep(0.01)
+
+        probe_task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe_task
+
+    logins = summarize("login_storm", login_lat, login_errors + shed, elapsed)
+    logins["shed_503"] = shed
+    probes = summarize("verify_during_storm", probe_lat, probe_errors, elapsed)
+    print(json.dumps([logins, probes], indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,71 @@
+"""
+Order placement load benchmark.
+
+Creates a batch of artworks as an artist, then places one order per artwork
+with a fixed number of concurrent buyers and reports orders/sec and latency
+percentiles. Run it once against the current build and once against the
+build you want to compare with (e.g. `git stash` + `docker compose up --build`)
+and compare the two JSON records.
+
+    python benchmarks/orders_load.py --orders 500 --concurrency 50 --label pooled
+"""
+import argparse
+import asyncio
+import json
+import time
+import httpx
+from bench_common import ARTWORK_URL, ORDERS_URL, bearer, register_and_login, summarize
+
+
+async def seed_artworks(client: httpx.AsyncClient, token: str, count: int) -> list[int]:
+    ids = []
+    for i in range(count):
+        resp = await client.post(f"{ARTWORK_URL}/artworks", headers=bearer(token),
+                                 json={"title": f"bench piece {i}", "price": 10.0 + i})
+        resp.raise_for_status()
+        ids.append(resp.json()["id"])
+    return ids
+
+
+async def main(args):
+    async with httpx.AsyncClient(timeout=30) as client:
+        artist = await register_and_login(client, "artist")
+        buyer = await register_and_login(client, "user")
+        art_ids = await seed_artworks(client, artist, args.orders)
+
+        sem = asyncio.Semaphore(args.concurrency)
+        latencies: list[float] = []
+        errors = 0
+
+        async def place(art_id: int):
+            nonlocal errors
+            async with sem:
+                start = time.perf_counter()
+                try:
+                    resp = await client.post(f"{ORDERS_URL}/orders", headers=bearer(buyer),
+                                             json={"art_id": art_id})
+                    # 202: accepted; the artwork is reserved by the outbox worker
+                    ok = resp.status_code in (200, 202)
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(place(a) for a in art_ids))
+        elapsed = time.perf_counter() - start
+
+    result = summarize("order_placement", latencies, errors, elapsed)
+    result["label"] = args.label
+    result["concurrency"] = args.concurrency
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--label", default="current")
+    asyncio.run(main(parser.parse_args()))
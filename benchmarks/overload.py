@@ -0,0 +1,187 @@
+"""
+Latency under overload with and without rate limiting and load shedding.
+
+Starts the services on fresh databases, seeds a catalog, and runs two
+scenarios, each once with `RATE_LIMIT_ENABLED=false` and once with the
+limiter on:
+
+    overload        open-loop arrivals of catalog pages at `--rps`, above what
+                    the artwork service can serve; new requests keep coming
+                    whether or not earlier ones finished, like real users
+    noisy_neighbor  one user floods catalog searches while `--quiet-users`
+                    users read artworks at a modest rate; reports the quiet
+                    users' latency
+
+Without limits the queue (and every request's latency) grows for as long as
+the overload lasts. With them, requests past the lag target or bucket size
+are refused in about a millisecond with 503/429 and `Retry-After`, and the
+p99 of the requests that are served stays bounded. Prints one JSON record
+per scenario and setting; `rejected` counts 429/503 answers.
+
+    python benchmarks/overload.py --rps 40 --duration 20
+    python benchmarks/overload.py --scenarios noisy_neighbor --noisy-concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import httpx
+from bench_common import bearer, summarize
+from suite import Services, login
+
+REJECTED = (429, 503)
+# Every seeded artwork matches, so each search ranks the whole catalog: costly to serve, cheap to receive
+SEARCH_TERMS = ("piece", "overload", "bench")
+
+
+async def seed(client: httpx.AsyncClient, urls: dict, artworks: int, users: int) -> tuple[list[int], list[str]]:
+    artist = await login(client, urls, "overload_artist", "artist")
+    lines = [json.dumps({"title": f"piece {i}", "description": "overload bench", "price": 10.0 + i % 90})
+             for i in range(artworks)]
+    resp = await client.post(f"{urls['artwork']}/artworks/bulk", content="\n".join(lines).encode(), timeout=300,
+                             headers=dict(bearer(artist), **{"Content-Type": "application/x-ndjson"}))
+    resp.raise_for_status()
+    resp = await client.get(f"{urls['artwork']}/artworks/ids", params={"owner": "overload_artist"})
+    resp.raise_for_status()
+    tokens = [await login(client, urls, f"overload_user_{i}", "user") for i in range(users)]
+    return resp.json(), tokens
+
+
+def record(name: str, latencies: list[float], rejected: list[float], errors: int, elapsed: float) -> dict:
+    result = summarize(name, latencies, errors + len(rejected), elapsed)
+    result["served"] = len(latencies)
+    result["rejected"] = len(rejected)
+    result["rejected_p99_ms"] = summarize(name, rejected, 0, elapsed)["p99_ms"]
+    return result
+
+
+async def overload(client: httpx.AsyncClient, urls: dict, art_ids: list[int], tokens: list[str], args) -> dict:
+    """
+    Open loop: request `i` is sent at `start + i / rps` regardless of earlier ones.
+
+    Arrivals are spread over all seeded users, each below its own rate
+    limit, so only load shedding stands between the service and the queue.
+    """
+    latencies: list[float] = []
+    rejected: list[float] = []
+    errors = 0
+    start = time.perf_counter()
+
+    async def one(i: int):
+        nonlocal errors
+        await asyncio.sleep(max(0.0, start + i / args.rps - time.perf_counter()))
+        sent = time.perf_counter()
+        try:
+            resp = await client.get(f"{urls['artwork']}/artworks/search", headers=bearer(tokens[i % len(tokens)]),
+                                    params={"q": random.choice(SEARCH_TERMS), "limit": 5})
+        except httpx.HTTPError:
+            errors += 1
+            return
+        took = time.perf_counter() - sent
+        if resp.status_code == 200:
+            latencies.append(took)
+        elif resp.status_code in REJECTED:
+            rejected.append(took)
+        else:
+            errors += 1
+
+    await asyncio.gather(*(one(i) for i in range(int(args.rps * args.duration))))
+    return record("overload", latencies, rejected, errors, time.perf_counter() - start)
+
+
+async def noisy_neighbor(client: httpx.AsyncClient, urls: dict, art_ids: list[int], tokens: list[str], args) -> dict:
+    """Closed loop: one user floods searches, the others read one artwork each `--quiet-interval` seconds."""
+    latencies: list[float] = []
+    rejected: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + args.duration
+    noisy, quiet = tokens[0], tokens[1:args.quiet_users + 1]
+
+    async def flood():
+        while time.perf_counter() < deadline:
+            try:
+                resp = await client.get(f"{urls['artwork']}/artworks/search", headers=bearer(noisy),
+                                        params={"q": random.choice(SEARCH_TERMS), "limit": 50})
+                if resp.status_code in REJECTED:
+                    # A client that ignores Retry-After and retries almost at once
+                    await asyncio.sleep(0.01)
+            except httpx.HTTPError:
+                pass
+
+    async def reader(token: str):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            sent = time.perf_counter()
+            try:
+                resp = await client.get(f"{urls['artwork']}/artworks/{random.choice(art_ids)}", headers=bearer(token))
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            took = time.perf_counter() - sent
+            if resp.status_code == 200:
+                latencies.append(took)
+            elif resp.status_code in REJECTED:
+                rejected.append(took)
+            else:
+                errors += 1
+            await asyncio.sleep(max(0.0, args.quiet_interval - took))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(flood() for _ in range(args.noisy_concurrency)), *(reader(t) for t in quiet))
+    return record("noisy_neighbor", latencies, rejected, errors, time.perf_counter() - start)
+
+
+SCENARIOS = {"overload": overload, "noisy_neighbor": noisy_neighbor}
+
+
+async def run(limited: bool, args) -> list[dict]:
+    env = {"TRACE_SAMPLE_RATE": "0", "BCRYPT_ROUNDS": "4", "RATE_LIMIT_ENABLED": str(limited).lower(),
+           "RATE_LIMIT_RATE": str(args.user_rate), "RATE_LIMIT_BURST": str(args.user_rate * 2),
+           "SHED_DELAY_TARGET_MS": str(args.delay_target_ms), "SHED_MAX_IN_FLIGHT": str(args.max_in_flight),
+           # Seeding logs every user in from one address
+           "RATE_LIMIT_COSTS": "POST /auth/register=0;POST /auth/token=0"}
+    services = Services(args.base_port, env)
+    services.start()
+    try:
+        limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+        async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+            art_ids, tokens = await seed(client, services.urls, args.artworks, max(args.users, args.quiet_users + 1))
+            results = []
+            for name in args.scenarios:
+                result = await SCENARIOS[name](client, services.urls, art_ids, tokens, args)
+                result["limits"] = "on" if limited else "off"
+                results.append(result)
+                await asyncio.sleep(2)  # let the backlog drain before the next scenario
+            return results
+    finally:
+        services.stop()
+
+
+async def main(args):
+    results = []
+    for limited in (False, True):
+        results += await run(limited, args)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--rps", type=float, default=40, help="Arrival rate of the overload scenario")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per scenario")
+    parser.add_argument("--users", type=int, default=50,
+                        help="Users the overload arrivals are spread over, each below its rate limit")
+    parser.add_argument("--quiet-users", dest="quiet_users", type=int, default=10)
+    parser.add_argument("--quiet-interval", dest="quiet_interval", type=float, default=0.1)
+    parser.add_argument("--noisy-concurrency", dest="noisy_concurrency", type=int, default=32)
+    parser.add_argument("--user-rate", dest="user_rate", type=float, default=20,
+                        help="RATE_LIMIT_RATE when limits are on (burst is twice this)")
+    parser.add_argument("--delay-target-ms", dest="delay_target_ms", type=float, default=100)
+    parser.add_argument("--max-in-flight", dest="max_in_flight", type=int, default=8,
+                        help="SHED_MAX_IN_FLIGHT when limits are on; searches are CPU-bound, so a few per core")
+    parser.add_argument("--artworks", type=int, default=20000)
+    parser.add_argument("--max-connections", dest="max_connections", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--base-port", dest="base_port", type=int, default=18301)
+    asyncio.run(main(parser.parse_args()))
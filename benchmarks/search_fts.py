@@ -0,0 +1,108 @@
+"""
+Full-text search latency: FTS5 index vs a `LIKE '%q%'` scan.
+
+Builds a throwaway SQLite database with a synthetic catalog, sets up the
+artwork service's FTS index (service-artwork/app/search.py), then times the
+same queries through `search.search` and through a LIKE scan over title and
+description. No services need to be running.
+
+    python benchmarks/search_fts.py --rows 1000000 --queries 200
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, os.path.join(HERE, "..", "service-artwork", "app"))
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from common.db import create_db_engine  # noqa: E402
+import search  # noqa: E402
+from bench_common import summarize  # noqa: E402
+
+SYLLABLES = "ka lo mi ra te su no vi la de mo ri pa zu ne to ha el an or us".split()
+
+
+def make_vocabulary(size: int) -> list[str]:
+    vocab = set()
+    while len(vocab) < size:
+        vocab.add("".join(random.choice(SYLLABLES) for _ in range(random.randint(2, 4))))
+    return sorted(vocab)
+
+
+LIKE_SQL = """
+SELECT id, title, description, price, owner, is_sold FROM artworks
+WHERE title LIKE :pat OR description LIKE :pat
+ORDER BY id LIMIT :limit
+"""
+
+
+def sentence(vocab: list[str], cum_weights: list[float], n: int) -> str:
+    # Zipf-like word frequencies, like real titles and descriptions
+    return " ".join(random.choices(vocab, cum_weights=cum_weights, k=n))
+
+
+def build(engine, rows: int, vocab: list[str], cum_weights: list[float]):
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE artworks (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, description VARCHAR, "
+                          "price FLOAT NOT NULL, owner VARCHAR NOT NULL, is_sold BOOLEAN)"))
+    search.setup(engine)
+    batch = 10_000
+    for start in range(0, rows, batch):
+        values = [{"t": sentence(vocab, cum_weights, 3), "d": sentence(vocab, cum_weights, 15),
+                   "p": random.random() * 1000, "o": f"artist{i % 500}"}
+                  for i in range(start, min(rows, start + batch))]
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO artworks (title, description, price, owner, is_sold) VALUES (:t, :d, :p, :o, 0)"),
+                         values)
+
+
+def timed(fn, queries):
+    latencies = []
+    start = time.perf_counter()
+    for q in queries:
+        t = time.perf_counter()
+        fn(q)
+        latencies.append(time.perf_counter() - t)
+    return latencies, time.perf_counter() - start
+
+
+def main(args):
+    random.seed(7)
+    vocab = make_vocabulary(args.vocabulary)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocab))))
+    queries = [random.choice(vocab) for _ in range(args.queries)]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{tmp}/search.db")
+        t = time.perf_counter()
+        build(engine, args.rows, vocab, cum_weights)
+        build_s = time.perf_counter() - t
+        if not search.is_available():
+            raise SystemExit("This SQLite build has no FTS5")
+        with Session(engine) as db:
+            fts_lat, fts_elapsed = timed(lambda q: search.search(db, q, args.limit), queries)
+            like_lat, like_elapsed = timed(
+                lambda q: db.execute(text(LIKE_SQL), {"pat": f"%{q}%", "limit": args.limit}).all(), queries)
+        engine.dispose()
+    fts = summarize("search_fts5", fts_lat, 0, fts_elapsed)
+    like = summarize("search_like_scan", like_lat, 0, like_elapsed)
+    for r in (fts, like):
+        r["rows"] = args.rows
+        r["build_s"] = round(build_s, 2)
+    print(json.dumps([fts, like], indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    main(parser.parse_args())
@@ -0,0 +1,99 @@
+"""
+List endpoint serialization throughput (rows/sec).
+
+Fills a throwaway SQLite database with artworks and times three ways of
+turning a page of them into a JSON body, query included:
+
+    orm_response_model   ORM entities validated and dumped through the route's
+                         `response_model` (what FastAPI does for orm_mode models)
+    orm_dicts_json       ORM entities copied into dicts, encoded with json.dumps
+    columns_fast_json    column tuples into dicts, encoded with
+                         `common.serialization.dumps` (the current path)
+
+No services need to be running.
+
+    python benchmarks/serialize_rows.py --rows 20000 --page-sizes 100 1000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, os.path.join(HERE, "..", "service-artwork", "app"))
+TMP = tempfile.TemporaryDirectory(prefix="artscape-serialize-")
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP.name}/artwork.db"
+
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from common import serialization  # noqa: E402
+import database, models, routes  # noqa: E402
+
+LIST_ROUTE = next(r for r in routes.router.routes if r.path == "/artworks" and "GET" in r.methods)
+
+
+def orm_response_model(db: Session, limit: int) -> bytes:
+    rows = db.execute(select(models.Artwork).order_by(models.Artwork.id).limit(limit)).scalars().all()
+    # The sync core of fastapi.routing.serialize_response
+    value, errors = LIST_ROUTE.response_field.validate(rows, {}, loc=("response",))
+    assert not errors
+    return LIST_ROUTE.response_field.serialize_json(value)
+
+
+def orm_dicts_json(db: Session, limit: int) -> bytes:
+    rows = db.execute(select(models.Artwork).order_by(models.Artwork.id).limit(limit)).scalars()
+    return json.dumps([routes._artwork_json(a) for a in rows], separators=(",", ":")).encode()
+
+
+def columns_fast_json(db: Session, limit: int) -> bytes:
+    stmt = select(*routes._ARTWORK_COLUMNS).order_by(models.Artwork.id).limit(limit)
+    return serialization.dumps(routes._fetch_artworks(db, stmt))
+
+
+VARIANTS = {fn.__name__: fn for fn in (orm_response_model, orm_dicts_json, columns_fast_json)}
+
+
+def seed(rows: int):
+    models.Base.metadata.create_all(bind=database.engine)
+    with Session(bind=database.engine) as db:
+        db.execute(models.Artwork.__table__.insert(), [
+            {"title": f"Piece {i}", "description": f"Study number {i} in oil on canvas",
+             "price": 10.0 + i % 500, "owner": f"artist{i % 25}", "is_sold": i % 3 == 0}
+            for i in range(rows)
+        ])
+        db.commit()
+
+
+def main(args):
+    seed(args.rows)
+    results = []
+    with Session(bind=database.engine) as db:
+        bodies = {name: json.loads(fn(db, 10)) for name, fn in VARIANTS.items()}
+        assert all(body == bodies["orm_response_model"] for body in bodies.values()), "variants disagree"
+        for size in args.page_sizes:
+            for name, fn in VARIANTS.items():
+                fn(db, size)  # warm up
+                best = float("inf")
+                for _ in range(args.rounds):
+                    start = time.perf_counter()
+                    for _ in range(args.repeat):
+                        fn(db, size)
+                    best = min(best, time.perf_counter() - start)
+                    db.expunge_all()
+                per_page = best / args.repeat
+                results.append({"variant": name, "page_size": size, "ms_per_page": round(per_page * 1000, 3),
+                                "rows_per_s": round(size / per_page)})
+    database.engine.dispose()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--page-sizes", dest="page_sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=50, help="Pages serialized per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,167 @@
+"""
+Catalog updates pushed over Server-Sent Events versus polled.
+
+Starts the services on fresh databases and connects `--clients` clients to
+the artwork service in two ways:
+
+    push  each client holds GET /artworks/stream open and waits for events
+    poll  each client re-fetches GET /artworks every `--poll-interval`
+          seconds (staggered), as the UI did before streams
+
+Both modes first sit idle for `--idle` seconds and record the artwork
+process's CPU use, then an artist creates `--artworks` artworks one at a
+time and every client's delay from the create request to seeing the new
+artwork is recorded. Prints one JSON record per mode: server CPU share
+while idle, requests served, and p50/p99 of the per-client delay.
+
+    python benchmarks/stream_fanout.py --clients 1000 --idle 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+import httpx
+from bench_common import bearer
+from suite import Services, login
+
+EVENT_ID = re.compile(rb'"art_id":(\d+)')
+
+
+def cpu_seconds(pid: int) -> float:
+    """User plus system CPU time of a process, from /proc."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+async def subscriber(port: int, seen: dict[int, list[float]], ready: asyncio.Event, counter: list[int]):
+    """A bare-bones SSE client on a raw socket, so thousands fit in one process."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /artworks/stream HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n\r\n")
+    await writer.drain()
+    try:
+        # The first bytes (headers and `retry:`) arrive once the server has subscribed it
+        await reader.read(65536)
+        counter[0] += 1
+        if counter[0] == counter[1]:
+            ready.set()
+        while data := await reader.read(65536):
+            now = time.perf_counter()
+            for art_id in EVENT_ID.findall(data):
+                seen.setdefault(int(art_id), []).append(now)
+    finally:
+        writer.close()
+
+
+async def poller(client: httpx.AsyncClient, url: str, interval: float, seen: dict[int, list[float]],
+                 known: set[int], stop: asyncio.Event, requests: list[int]):
+    await asyncio.sleep(random.uniform(0, interval))
+    mine = set(known)
+    while not stop.is_set():
+        try:
+            resp = await client.get(f"{url}/artworks", params={"limit": 20, "order": "desc"})
+            requests[0] += 1
+            now = time.perf_counter()
+            for item in resp.json():
+                if item["id"] not in mine:
+                    mine.add(item["id"])
+                    seen.setdefault(item["id"], []).append(now)
+        except httpx.HTTPError:
+            pass
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def create_artworks(client: httpx.AsyncClient, url: str, token: str, count: int, gap: float) -> dict[int, float]:
+    sent = {}
+    for i in range(count):
+        start = time.perf_counter()
+        resp = await client.post(f"{url}/artworks", json={"title": f"live {i}", "price": 5.0}, headers=bearer(token))
+        resp.raise_for_status()
+        sent[resp.json()["id"]] = start
+        await asyncio.sleep(gap)
+    return sent
+
+
+def report(mode: str, args, idle_cpu: float, requests: int, sent: dict[int, float], seen: dict) -> dict:
+    delays = [t - sent[art_id] for art_id in sent for t in seen.get(art_id, [])]
+    expected = len(sent) * args.clients
+    return {
+        "mode": mode,
+        "clients": args.clients,
+        "idle_server_cpu_pct": round(100 * idle_cpu, 2),
+        "idle_requests": requests,
+        "deliveries": len(delays),
+        "missed": expected - len(delays),
+        "delay_p50_ms": round(percentile(delays, 50) * 1000, 1),
+        "delay_p99_ms": round(percentile(delays, 99) * 1000, 1),
+    }
+
+
+async def run(mode: str, args) -> dict:
+    services = Services(args.base_port, {"TRACE_SAMPLE_RATE": "0", "BCRYPT_ROUNDS": "4",
+                                         "STREAM_MAX_CONNECTIONS": str(args.clients + 10)})
+    services.start()
+    pid = services.procs[list(services.ports).index("artwork")].pid
+    url = services.urls["artwork"]
+    try:
+        limits = httpx.Limits(max_connections=args.clients + 10, max_keepalive_connections=args.clients + 10)
+        async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+            artist = await login(client, services.urls, "stream_artist", "artist")
+            await create_artworks(client, url, artist, 20, 0)
+            newest = await client.get(f"{url}/artworks", params={"limit": 20, "order": "desc"})
+            known = {a["id"] for a in newest.json()}
+            seen: dict[int, list[float]] = {}
+            stop = asyncio.Event()
+            requests = [0]
+            if mode == "push":
+                ready, counter = asyncio.Event(), [0, args.clients]
+                tasks = [asyncio.create_task(subscriber(services.ports["artwork"], seen, ready, counter))
+                         for _ in range(args.clients)]
+                await ready.wait()
+            else:
+                tasks = [asyncio.create_task(poller(client, url, args.poll_interval, seen, known, stop, requests))
+                         for _ in range(args.clients)]
+            await asyncio.sleep(1)
+            cpu, start = cpu_seconds(pid), time.perf_counter()
+            await asyncio.sleep(args.idle)
+            idle_cpu = (cpu_seconds(pid) - cpu) / (time.perf_counter() - start)
+            idle_requests = requests[0]
+            sent = await create_artworks(client, url, artist, args.artworks, args.gap)
+            await asyncio.sleep(args.poll_interval + 1 if mode == "poll" else 1)
+            stop.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            return report(mode, args, idle_cpu, idle_requests, sent, seen)
+    finally:
+        services.stop()
+
+
+async def main(args):
+    print(json.dumps([await run(mode, args) for mode in args.modes], indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=("push", "poll"), default=["push", "poll"])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--idle", type=float, default=10, help="Seconds of idle measurement")
+    parser.add_argument("--poll-interval", dest="poll_interval", type=float, default=5,
+                        help="Seconds between a polling client's re-fetches")
+    parser.add_argument("--artworks", type=int, default=20, help="Artworks created while measuring delays")
+    parser.add_argument("--gap", type=float, default=0.2, help="Seconds between creates")
+    parser.add_argument("--base-port", dest="base_port", type=int, default=18401)
+    asyncio.run(main(parser.parse_args()))
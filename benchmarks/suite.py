@@ -0,0 +1,465 @@
+"""
+Repeatable multi-service benchmark suite.
+
+Starts auth, artwork and orders on localhost with fresh SQLite databases
+(or uses services that are already running), seeds them at a chosen scale
+from the catalog and users in the services' seed.py, and drives four
+scenarios:
+
+    login_storm      concurrent logins of seeded users
+    catalog_browse   clients walking GET /artworks pages deep via the cursor
+    hot_orders       order bursts on a few hot artworks, waiting for each to settle
+    artist_listing   artists listing their orders with artwork details
+
+Each scenario reports throughput, p50/p95/p99 and error rate as JSON.
+Save a run as a baseline and compare later runs against it; regressions
+beyond the threshold are flagged and make the command exit with status 1.
+
+    python benchmarks/suite.py run --scale small --out baseline.json
+    python benchmarks/suite.py run --scale small --compare baseline.json
+    python benchmarks/suite.py compare new.json baseline.json --threshold 0.15
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import random
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from bench_common import bearer, summarize
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+SCALES = {
+    # artists, artworks per artist, buyers, pre-placed orders
+    "small": {"artists": 3, "artworks_per_artist": 300, "buyers": 10, "orders": 100},
+    "medium": {"artists": 10, "artworks_per_artist": 2000, "buyers": 30, "orders": 1000},
+    "large": {"artists": 25, "artworks_per_artist": 10000, "buyers": 60, "orders": 5000},
+}
+
+# Lower is worse for these, higher is worse for the rest
+HIGHER_IS_BETTER = {"throughput_rps"}
+COMPARED = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "error_rate")
+
+
+def load_seed_data(service: str, name: str) -> list[dict]:
+    """Load a data list from a service's seed.py without running its seeding."""
+    path = os.path.join(ROOT, f"service-{service}", "app", "seed.py")
+    spec = importlib.util.spec_from_file_location(f"{service}_seed", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, name)
+
+
+class Services:
+    """Runs the services (by default auth, artwork and orders) as uvicorn subprocesses on consecutive ports."""
+
+    def __init__(self, base_port: int, env: dict, db_scheme: str = "sqlite",
+                 names: tuple = ("auth", "artwork", "orders")):
+        self.ports = {name: base_port + i for i, name in enumerate(names)}
+        self.urls = {name: f"http://127.0.0.1:{port}" for name, port in self.ports.items()}
+        # The orders worker reserves artworks with a service token from auth
+        client_secret = secrets.token_hex(16)
+        self.env = {"SERVICE_CLIENTS": f"orders:{client_secret}", "SERVICE_CLIENT_SECRET": client_secret, **env}
+        self.db_scheme = db_scheme
+        self.tmp = tempfile.TemporaryDirectory(prefix="artscape-bench-")
+        self.procs: list[subprocess.Popen] = []
+
+    def start(self):
+        for name, port in self.ports.items():
+            # Limits off unless a benchmark turns them on: load generators are one client hammering one address
+            env = dict(os.environ, **{"RATE_LIMIT_ENABLED": "false", **self.env},
+                       DATABASE_URL=f"{self.db_scheme}:///{self.tmp.name}/{name}.db",
+                       **{f"{other.upper()}_SERVICE_URL": url for other, url in self.urls.items()},
+                       PYTHONPATH=ROOT)
+            log = open(os.path.join(self.tmp.name, f"{name}.log"), "w")
+            self.procs.append(subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                cwd=os.path.join(ROOT, f"service-{name}", "app"), env=env, stdout=log, stderr=subprocess.STDOUT,
+            ))
+        deadline = time.time() + 60
+        for name, url in self.urls.items():
+            while True:
+                try:
+                    if httpx.get(f"{url}/openapi.json", timeout=2).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.time() > deadline:
+                    self.stop()
+                    raise SystemExit(f"{name} did not start; see {self.tmp.name}/{name}.log")
+                time.sleep(0.2)
+
+    def stop(self):
+        for proc in self.procs:
+            proc.terminate()
+        for proc in self.procs:
+            try:
+                proc.wait(10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        self.procs = []
+        self.tmp.cleanup()
+
+
+class Fixture:
+    """Seeded accounts and artworks shared by the scenarios."""
+
+    def __init__(self):
+        self.artists: list[tuple[str, str]] = []  # (username, token)
+        self.buyers: list[tuple[str, str]] = []
+        self.artwork_ids: list[int] = []
+
+
+async def login(client: httpx.AsyncClient, urls: dict, username: str, role: str) -> str:
+    await client.post(f"{urls['auth']}/auth/register", json={"username": username, "password": "pass", "role": role})
+    resp = await client.post(f"{urls['auth']}/auth/token", data={"username": username, "password": "pass"})
+    resp.raise_for_status()
+    return resp.json()["access_token"]
+
+
+async def seed(client: httpx.AsyncClient, urls: dict, scale: dict, run_id: str) -> Fixture:
+    """
+    Create artists, buyers, a catalog and some orders through the public APIs.
+
+    Usernames and artworks come from the services' seed.py, suffixed with
+    the run ID so repeated runs against the same services do not collide.
+    """
+    seed_users = load_seed_data("auth", "users")
+    catalog = load_seed_data("artwork", "sample")
+    seed_artists = [u["username"] for u in seed_users if u["role"] == "artist"]
+    seed_buyers = [u["username"] for u in seed_users if u["role"] == "user"]
+
+    fx = Fixture()
+    for i in range(scale["artists"]):
+        name = f"{seed_artists[i % len(seed_artists)]}_{run_id}_{i}"
+        fx.artists.append((name, await login(client, urls, name, "artist")))
+    for i in range(scale["buyers"]):
+        name = f"{seed_buyers[i % len(seed_buyers)]}_{run_id}_{i}"
+        fx.buyers.append((name, await login(client, urls, name, "user")))
+
+    for _, token in fx.artists:
+        lines = []
+        for i in range(scale["artworks_per_artist"]):
+            art = catalog[i % len(catalog)]
+            lines.append(json.dumps({"title": f"{art['title']} #{i}", "description": art["description"],
+                                     "price": art["price"] + i % 97}))
+        resp = await client.post(f"{urls['artwork']}/artworks/bulk", headers=dict(bearer(token), **{
+            "Content-Type": "application/x-ndjson"}), content="\n".join(lines).encode(), timeout=300)
+        resp.raise_for_status()
+    for name, _ in fx.artists:
+        resp = await client.get(f"{urls['artwork']}/artworks/ids", params={"owner": name})
+        resp.raise_for_status()
+        fx.artwork_ids += resp.json()
+
+    # Pre-placed orders give artist_listing something to list
+    to_buy = random.sample(fx.artwork_ids, min(scale["orders"], len(fx.artwork_ids)))
+    sem = asyncio.Semaphore(20)
+
+    async def buy(i: int, art_id: int):
+        async with sem:
+            token = fx.buyers[i % len(fx.buyers)][1]
+            await client.post(f"{urls['orders']}/orders", headers=bearer(token), json={"art_id": art_id})
+
+    await asyncio.gather(*(buy(i, a) for i, a in enumerate(to_buy)))
+    bought = set(to_buy)
+    fx.artwork_ids = [a for a in fx.artwork_ids if a not in bought]
+    return fx
+
+
+async def timed(coro_factory, n: int, concurrency: int, ok_status=(200,)) -> tuple[list[float], int, float]:
+    """Run `n` requests produced by `coro_factory(i)` with bounded concurrency."""
+    sem = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with sem:
+            start = time.perf_counter()
+            try:
+                resp = await coro_factory(i)
+                ok = resp.status_code in ok_status
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def login_storm(client, urls, fx, args) -> dict:
+    accounts = fx.buyers + fx.artists
+
+    def request(i):
+        name = accounts[i % len(accounts)][0]
+        return client.post(f"{urls['auth']}/auth/token", data={"username": name, "password": "pass"})
+
+    lat, errors, elapsed = await timed(request, args.logins, args.concurrency)
+    return summarize("login_storm", lat, errors, elapsed)
+
+
+async def catalog_browse(client, urls, fx, args) -> dict:
+    """Each client walks `pages` pages of one sort order, following X-Next-Cursor."""
+    orders = [{"sort_by": "id", "order": "asc"}, {"sort_by": "price", "order": "desc"},
+              {"sort_by": "price", "order": "asc", "min_price": 200}, {"sort_by": "id", "order": "desc", "is_sold": "false"}]
+    latencies: list[float] = []
+    errors = 0
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def walk(i: int):
+        nonlocal errors
+        params = dict(orders[i % len(orders)], limit=args.page_size)
+        async with sem:
+            for _ in range(args.pages):
+                start = time.perf_counter()
+                try:
+                    resp = await client.get(f"{urls['artwork']}/artworks", params=params)
+                except httpx.HTTPError:
+                    errors += 1
+                    return
+                if resp.status_code != 200:
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - start)
+                cursor = resp.headers.get("X-Next-Cursor")
+                if not cursor:
+                    return
+                params["cursor"] = cursor
+
+    start = time.perf_counter()
+    await asyncio.gather(*(walk(i) for i in range(args.browsers)))
+    result = summarize("catalog_browse", latencies, errors, time.perf_counter() - start)
+    result["pages_per_client"] = args.pages
+    return result
+
+
+async def hot_orders(client, urls, fx, args) -> dict:
+    """Bursts of buyers racing for a few artworks; latency is until each order settles."""
+    hot = fx.artwork_ids[:args.hot_artworks]
+    fx.artwork_ids = fx.artwork_ids[args.hot_artworks:]
+    latencies: list[float] = []
+    errors = 0
+    confirmed = {a: 0 for a in hot}
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def order(i: int):
+        nonlocal errors
+        art_id = hot[i % len(hot)]
+        token = fx.buyers[i % len(fx.buyers)][1]
+        async with sem:
+            start = time.perf_counter()
+            try:
+                resp = await client.post(f"{urls['orders']}/orders", headers=bearer(token), json={"art_id": art_id})
+                if resp.status_code not in (200, 202):
+                    errors += 1
+                    return
+                o = resp.json()
+                while o["status"] == "created":
+                    o = (await client.get(f"{urls['orders']}/orders/{o['id']}", params={"wait": 10})).json()
+            except httpx.HTTPError:
+                errors += 1
+                return
+        latencies.append(time.perf_counter() - start)
+        if o["status"] == "confirmed":
+            confirmed[art_id] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(order(i) for i in range(args.hot_buyers)))
+    result = summarize("hot_orders", latencies, errors, time.perf_counter() - start)
+    # Each hot artwork must be sold exactly once
+    result["oversold_artworks"] = sum(1 for c in confirmed.values() if c > 1)
+    return result
+
+
+async def artist_listing(client, urls, fx, args) -> dict:
+    def request(i):
+        token = fx.artists[i % len(fx.artists)][1]
+        return client.get(f"{urls['orders']}/orders", headers=bearer(token), params={"include_artwork": "true"})
+
+    lat, errors, elapsed = await timed(request, args.listings, args.concurrency)
+    return summarize("artist_listing", lat, errors, elapsed)
+
+
+SCENARIOS = {
+    "login_storm": login_storm,
+    "catalog_browse": catalog_browse,
+    "hot_orders": hot_orders,
+    "artist_listing": artist_listing,
+}
+
+
+async def run_scenarios(urls: dict, args) -> dict:
+    scale = dict(SCALES[args.scale])
+    for key in scale:
+        if getattr(args, key, None) is not None:
+            scale[key] = getattr(args, key)
+    limits = httpx.Limits(max_connections=args.concurrency + 20)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        seed_start = time.perf_counter()
+        fx = await seed(client, urls, scale, os.urandom(3).hex())
+        seed_s = time.perf_counter() - seed_start
+        results = {}
+        for name in args.scenarios:
+            results[name] = await SCENARIOS[name](client, urls, fx, args)
+    return {"meta": meta(args, scale, seed_s), "results": results}
+
+
+def meta(args, scale: dict, seed_s: float) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "scale": args.scale,
+        "seed": scale,
+        "seed_seconds": round(seed_s, 2),
+        "concurrency": args.concurrency,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> tuple[list[dict], int]:
+    """
+    Compare two suite results metric by metric.
+
+    Returns:
+        tuple[list[dict], int]: One row per scenario and metric, and the
+            number of rows flagged as regressions.
+    """
+    rows = []
+    regressions = 0
+    for scenario, cur in current["results"].items():
+        base = baseline["results"].get(scenario)
+        if base is None:
+            continue
+        for metric in COMPARED:
+            old, new = base.get(metric), cur.get(metric)
+            if old is None or new is None:
+                continue
+            if metric == "error_rate":
+                # Absolute: a rate going from 0 to anything is a regression
+                change = new - old
+                regressed = change > 0.01
+            else:
+                change = (new - old) / old if old else 0.0
+                worse = -change if metric in HIGHER_IS_BETTER else change
+                regressed = worse > threshold
+            regressions += regressed
+            rows.append({"scenario": scenario, "metric": metric, "baseline": old, "current": new,
+                         "change": round(change, 4), "regression": regressed})
+        if cur.get("oversold_artworks"):
+            # A correctness failure, whatever the baseline says
+            regressions += 1
+            rows.append({"scenario": scenario, "metric": "oversold_artworks", "baseline": base.get("oversold_artworks"),
+                         "current": cur["oversold_artworks"], "change": cur["oversold_artworks"], "regression": True})
+    return rows, regressions
+
+
+def print_comparison(rows: list[dict], regressions: int, threshold: float):
+    print(f"{'scenario':<16} {'metric':<15} {'baseline':>11} {'current':>11} {'change':>9}", file=sys.stderr)
+    for r in rows:
+        flag = "  REGRESSION" if r["regression"] else ""
+        change = f"{r['change']:+.1%}" if r["metric"].endswith(("_ms", "_rps")) else f"{r['change']:+.3f}"
+        print(f"{r['scenario']:<16} {r['metric']:<15} {r['baseline']:>11} {r['current']:>11} {change:>9}{flag}",
+              file=sys.stderr)
+    print(f"{regressions} regression(s) beyond {threshold:.0%}", file=sys.stderr)
+
+
+def cmd_run(args) -> int:
+    services = None
+    if args.external:
+        urls = {"auth": args.auth_url, "artwork": args.artwork_url, "orders": args.orders_url}
+    else:
+        env = {"TRACE_SAMPLE_RATE": "0"}
+        if args.bcrypt_rounds:
+            env["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+        services = Services(args.base_port, env)
+        services.start()
+        urls = services.urls
+    try:
+        result = asyncio.run(run_scenarios(urls, args))
+    finally:
+        if services is not None:
+            services.stop()
+
+    print(json.dumps(result, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            rows, regressions = compare(result, json.load(f), args.threshold)
+        print_comparison(rows, regressions, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+def cmd_compare(args) -> int:
+    with open(args.current) as f:
+        current = json.load(f)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows, regressions = compare(current, baseline, args.threshold)
+    print_comparison(rows, regressions, args.threshold)
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Seed the services and run the scenarios")
+    run.add_argument("--scale", choices=SCALES, default="small")
+    run.add_argument("--artists", type=int, help="Override the scale's artist count")
+    run.add_argument("--artworks-per-artist", dest="artworks_per_artist", type=int)
+    run.add_argument("--buyers", type=int)
+    run.add_argument("--orders", type=int, help="Orders placed while seeding")
+    run.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    run.add_argument("--concurrency", type=int, default=20)
+    run.add_argument("--logins", type=int, default=100)
+    run.add_argument("--browsers", type=int, default=20, help="Clients walking the catalog")
+    run.add_argument("--pages", type=int, default=20, help="Pages each browsing client walks")
+    run.add_argument("--page-size", dest="page_size", type=int, default=50)
+    run.add_argument("--hot-artworks", dest="hot_artworks", type=int, default=5)
+    run.add_argument("--hot-buyers", dest="hot_buyers", type=int, default=200)
+    run.add_argument("--listings", type=int, default=200)
+    run.add_argument("--bcrypt-rounds", dest="bcrypt_rounds", type=int,
+                     help="BCRYPT_ROUNDS for started services (default: service default)")
+    run.add_argument("--base-port", dest="base_port", type=int, default=18001)
+    run.add_argument("--external", action="store_true", help="Use already running services instead of starting them")
+    run.add_argument("--auth-url", default=os.getenv("BENCH_AUTH_URL", "http://localhost:8001"))
+    run.add_argument("--artwork-url", default=os.getenv("BENCH_ARTWORK_URL", "http://localhost:8002"))
+    run.add_argument("--orders-url", default=os.getenv("BENCH_ORDERS_URL", "http://localhost:8003"))
+    run.add_argument("--out", help="Write the result JSON here (e.g. to save a baseline)")
+    run.add_argument("--compare", help="Baseline JSON to compare against")
+    run.add_argument("--threshold", type=float, default=0.15, help="Relative change flagged as a regression")
+    run.set_defaults(func=cmd_run)
+
+    cmp = sub.add_parser("compare", help="Compare two saved results")
+    cmp.add_argument("current")
+    cmp.add_argument("baseline")
+    cmp.add_argument("--threshold", type=float, default=0.15)
+    cmp.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Code shared by the ArtScape services (mounted into each service as `common`)."""
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import time
+from fastapi import Depends, HTTPException, Query
+from fastapi.security import OAuth2PasswordBearer
+import jwt
+from common import jwks, metrics
+from common.cache import LRUCache
+
+# Only for HS256 tokens from an auth service still signing with a shared secret; empty rejects them
+SECRET_KEY = os.getenv("SECRET_KEY", "")
+# Verified claims are reused until the earlier of the token's `exp` and this TTL
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
+# For routes that also accept the token in the query string
+oauth2_optional = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
+token_cache = LRUCache(TOKEN_CACHE_SIZE)
+
+def _cache_key(token: str) -> str:
+    # Never keep raw bearer tokens in memory as keys
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def decode_token(token: str) -> dict:
+    """
+    Decode and validate a JWT access token.
+
+    The signature is checked against the auth service's public key named by
+    the token's `kid`, from the key set `jwks.cache` keeps refreshed in the
+    background, so verification never waits on the network.
+
+    Claims of a successfully verified token are cached under a hash of the
+    token, so repeat calls with the same token skip signature verification
+    until the earlier of the token's `exp` and `TOKEN_CACHE_TTL`.
+
+    Args:
+        token (str): The JWT token string, typically passed in the Authorization header.
+
+    Returns:
+        dict: The decoded payload of the token containing user claims
+              (e.g., `sub`, `role`, `exp`).
+
+    Raises:
+        HTTPException:
+            - 401 if the token is expired.
+            - 401 if the token is invalid or cannot be decoded.
+            - 503 if the signing keys have not been fetched yet.
+    """
+    key = _cache_key(token)
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
+    try:
+        payload = jwks.decode(token, jwks.cache.keys, SECRET_KEY)
+    except jwks.UnknownKeyError:
+        jwks.cache.unknown_key()
+        if not jwks.cache.loaded:
+            raise HTTPException(status_code=503, detail="Token signing keys not loaded yet", headers={"Retry-After": "1"})
+        raise HTTPException(status_code=401, detail="Invalid token")
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired")
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    expires_at = time.time() + TOKEN_CACHE_TTL
+    if "exp" in payload:
+        expires_at = min(expires_at, float(payload["exp"]))
+    token_cache.set(key, payload, expires_at)
+    return payload
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
+    """
+    FastAPI dependency to retrieve the current authenticated user.
+
+    This function extracts the OAuth2 token from the request using the
+    `oauth2_scheme`, decodes it, and returns the user payload. It is async
+    so FastAPI runs it on the event loop instead of taking a threadpool
+    thread; verification is CPU-only and usually a cache hit.
+
+    Requests that came through the API gateway carry the client's own
+    token, which is verified here again; the gateway's check usually
+    leaves it in the token cache.
+
+    Args:
+        token (str): The JWT token automatically provided by FastAPI's dependency injection.
+
+    Returns:
+        dict: The decoded user payload, including claims like username (`sub`)
+              and role (`role`).
+
+    Raises:
+        HTTPException: If the token is expired or invalid.
+    """
+    return decode_token(token)
+
+async def get_stream_user(
+    token: str | None = Depends(oauth2_optional),
+    access_token: str | None = Query(None, description="Bearer token, for clients that cannot set headers"),
+) -> dict:
+    """
+    Like `get_current_user`, but also accepts the token as `?access_token=`.
+
+    Browsers' `EventSource` cannot send an `Authorization` header, so event
+    streams take the token from the query string when there is none.
+
+    Raises:
+        HTTPException: 401 if no token is given, or it is expired or invalid.
+    """
+    token = token or access_token
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    return decode_token(token)
+
+def cache_stats() -> dict:
+    """Return size and hit/miss counters of the verified-token cache."""
+    return token_cache.stats()
+
+def _token_cache_metrics():
+    s = token_cache.stats()
+    return [
+        ("token_cache_hits_total", "counter", "Verified-token cache hits", [({}, s["hits"])]),
+        ("token_cache_misses_total", "counter", "Verified-token cache misses", [({}, s["misses"])]),
+        ("token_cache_entries", "gauge", "Entries in the verified-token cache", [({}, s["size"])]),
+    ]
+
+metrics.registry.add_collector(_token_cache_metrics)
@@ -0,0 +1,268 @@
+import asyncio
+import os
+from typing import Protocol
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session
+from common import metrics, tracing
+
+# SQLite tuning profile, applied to every new DBAPI connection
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+
+# Connection pool settings
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", str(DB_POOL_SIZE)))
+DB_READ_ENGINE = os.getenv("DB_READ_ENGINE", "false").lower() in ("1", "true", "yes")
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def _sqlite_pragmas(read_only: bool) -> list[str]:
+    pragmas = [
+        f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+        f"PRAGMA temp_store={SQLITE_TEMP_STORE}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+def _instrument(engine: Engine, read_only: bool):
+    name = "read" if read_only else "primary"
+    metrics.instrument_engine(engine, name)
+    tracing.instrument_engine(engine, name)
+
+def _engine_kwargs(url, pool_size: int | None) -> dict:
+    kwargs = {"pool_pre_ping": True}
+    if not _is_memory_sqlite(url):
+        kwargs.update(
+            pool_size=pool_size or DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    if url.get_backend_name() == "sqlite":
+        kwargs["connect_args"] = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+    return kwargs
+
+def _configure(engine: Engine, url, read_only: bool):
+    """Install the SQLite pragmas and the metrics/tracing hooks on a (sync) engine."""
+    if url.get_backend_name() == "sqlite":
+        pragmas = _sqlite_pragmas(read_only)
+
+        @event.listens_for(engine, "connect")
+        def _apply_pragmas(dbapi_conn, _record):
+            cursor = dbapi_conn.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+    _instrument(engine, read_only)
+
+def is_async_url(database_url: str) -> bool:
+    """True if `database_url` names an asyncio driver, e.g. `sqlite+aiosqlite` or `postgresql+asyncpg`."""
+    return make_url(database_url).get_dialect().is_async
+
+def create_db_engine(database_url: str, read_only: bool = False, pool_size: int | None = None) -> Engine:
+    """
+    Create a SQLAlchemy engine using the shared production profile.
+
+    For SQLite, every new connection runs the tuning pragmas (WAL journal,
+    `synchronous=NORMAL`, busy timeout, page cache, mmap and temp store),
+    so concurrent writers wait on the busy timeout instead of failing with
+    `database is locked`, and readers never block the writer. Pool sizes
+    come from the `DB_*` environment variables for every backend. Every
+    statement is timed into the `db_query_duration_seconds` metric and, in
+    sampled traces, recorded as a `db.query` span.
+
+    Args:
+        database_url (str): SQLAlchemy database URL.
+        read_only (bool, optional): Reject writes on this engine's connections
+            (SQLite `query_only`). Defaults to False.
+        pool_size (int, optional): Override `DB_POOL_SIZE`.
+
+    Returns:
+        Engine: The configured engine.
+    """
+    url = make_url(database_url)
+    engine = create_engine(url, **_engine_kwargs(url, pool_size))
+    _configure(engine, url, read_only)
+    return engine
+
+def create_async_db_engine(database_url: str, read_only: bool = False, pool_size: int | None = None):
+    """
+    Create an asyncio engine (`sqlite+aiosqlite`, `postgresql+asyncpg`) with
+    the same profile as `create_db_engine`.
+
+    Pragmas, metrics and tracing hook into the engine's `sync_engine`, so
+    they behave as on a sync engine. Requires `sqlalchemy[asyncio]` and
+    the driver package.
+
+    Args:
+        database_url (str): SQLAlchemy database URL with an asyncio driver.
+        read_only (bool, optional): Reject writes on this engine's connections
+            (SQLite `query_only`). Defaults to False.
+        pool_size (int, optional): Override `DB_POOL_SIZE`.
+
+    Returns:
+        AsyncEngine: The configured engine.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = make_url(database_url)
+    engine = create_async_engine(url, **_engine_kwargs(url, pool_size))
+    _configure(engine.sync_engine, url, read_only)
+    return engine
+
+def create_read_engine(database_url: str, engine):
+    """
+    Return the engine GET routes should read from.
+
+    When `DB_READ_ENGINE` is enabled this is a separate read-only engine
+    with its own pool (`DB_READ_POOL_SIZE`), so reads never queue behind
+    writes for a connection. Set `DATABASE_READ_URL` to point it at a
+    replica. Otherwise the primary `engine` is returned unchanged.
+
+    Args:
+        database_url (str): URL of the primary database.
+        engine (Engine | AsyncEngine): The primary (read-write) engine; the
+            read engine is async if this one is.
+
+    Returns:
+        Engine | AsyncEngine: The engine to use for read-only sessions.
+    """
+    if not DB_READ_ENGINE:
+        return engine
+    read_url = os.getenv("DATABASE_READ_URL", database_url)
+    create = create_db_engine if isinstance(engine, Engine) else create_async_db_engine
+    return create(read_url, read_only=True, pool_size=DB_READ_POOL_SIZE)
+
+class AsyncDB(Protocol):
+    """What async route handlers may call on a session: `AsyncSession` or `ThreadedSession`."""
+
+    async def run_sync(self, fn, *args, **kwargs): ...
+    async def commit(self): ...
+    async def rollback(self): ...
+    async def close(self): ...
+
+class ThreadedSession:
+    """
+    Async facade over a sync `Session` with the `AsyncSession` methods route
+    handlers use, so the same handler code runs on either kind of engine.
+
+    `run_sync(fn, *args)` calls `fn(session, *args)` in the threadpool, where
+    `AsyncSession.run_sync` calls it on the event loop with the driver's
+    I/O awaited underneath.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+def open_session(factory):
+    """
+    Open a session from `factory` (a `sessionmaker` or `async_sessionmaker`)
+    for async code: an `AsyncSession`, or a sync session wrapped in
+    `ThreadedSession`. Either way, do database work with
+    `await db.run_sync(fn, *args)` and finish with `await db.close()`.
+    """
+    session = factory()
+    return ThreadedSession(session) if isinstance(session, Session) else session
+
+async def run_in_session(factory, fn, *args, **kwargs):
+    """Run `fn(session, *args, **kwargs)` in a new session from `factory` and close it."""
+    db = open_session(factory)
+    try:
+        return await db.run_sync(fn, *args, **kwargs)
+    finally:
+        await db.close()
+
+async def run_with_engine(engine, fn, *args):
+    """
+    Run `fn(sync_engine, *args)` for startup work written against a sync
+    `Engine` (schema sync, index setup). On an async engine, the sync
+    facade's blocking calls are bridged to the asyncio driver.
+    """
+    if isinstance(engine, Engine):
+        return fn(engine, *args)
+    from sqlalchemy.util import greenlet_spawn
+
+    return await greenlet_spawn(fn, engine.sync_engine, *args)
+
+async def dispose_engines(*engines):
+    """
+    Close the pooled connections of `engines` at shutdown. Needed for async
+    drivers such as aiosqlite, whose connections each own a thread that
+    would otherwise keep the process alive.
+    """
+    for engine in dict.fromkeys(engines):
+        if isinstance(engine, Engine):
+            engine.dispose()
+        else:
+            await engine.dispose()
+
+def run_offline(engine, fn, *args):
+    """
+    Run `fn(sync_engine, *args)` from a command-line script on either kind of
+    engine, then dispose of an async engine so its driver threads exit.
+    Inside `fn`, open sessions with `Session(bind=engine)`.
+    """
+    if isinstance(engine, Engine):
+        return fn(engine, *args)
+
+    async def main():
+        try:
+            return await run_with_engine(engine, fn, *args)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+def sync_schema(engine: Engine, metadata):
+    """
+    Bring an existing database up to date with the models, without migrations.
+
+    Creates missing tables, adds missing nullable columns with
+    `ALTER TABLE ... ADD COLUMN`, and creates missing indexes. Changes that
+    need real migrations (new NOT NULL columns, type changes) are left alone.
+
+    Args:
+        engine (Engine): Engine of the service database.
+        metadata: The declarative `Base.metadata` of the service.
+    """
+    metadata.create_all(bind=engine)
+    inspector = inspect(engine)
+    for table in metadata.sorted_tables:
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+            with engine.begin() as conn:
+                conn.exec_driver_sql(ddl)
+        # create_all() skips tables that already exist, so add indexes introduced later
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
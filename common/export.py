@@ -0,0 +1,165 @@
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import date, datetime
+from typing import AsyncIterator, Callable, Iterable, Iterator
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, sessionmaker
+
+# Rows fetched from the database cursor per batch, and encoded per response chunk
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{value.__class__.__name__} is not JSON serializable")
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def encode_ndjson(columns: list[str], rows: Iterable[tuple]) -> str:
+    """Encode rows as NDJSON lines keyed by `columns`."""
+    dumps = json.JSONEncoder(separators=(",", ":"), default=_json_default).encode
+    return "".join(dumps(dict(zip(columns, row))) + "\n" for row in rows)
+
+def encode_csv(rows: Iterable[tuple]) -> str:
+    """Encode rows as CSV lines; None becomes an empty field."""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerows([_csv_value(v) for v in row] for row in rows)
+    return buf.getvalue()
+
+def iter_batches(db: Session, statements: Iterable, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[list]:
+    """
+    Run each statement with a server-side cursor and yield its rows in batches.
+
+    `yield_per` makes SQLAlchemy fetch `batch_size` rows at a time from the
+    DBAPI cursor instead of buffering the whole result.
+
+    Args:
+        db (Session): Session the statements run in (one read transaction).
+        statements (Iterable): Core `select()` statements, run in order.
+        batch_size (int, optional): Rows per batch. Defaults to `EXPORT_BATCH_SIZE`.
+
+    Yields:
+        list: Up to `batch_size` row tuples.
+    """
+    for statement in statements:
+        result = db.execute(statement, execution_options={"yield_per": batch_size})
+        for partition in result.partitions():
+            yield partition
+
+class _Encoder:
+    """Turns row batches into output chunks; one gzip stream across chunks when compressing."""
+
+    def __init__(self, columns: list[str], fmt: str, compress: bool):
+        self.columns = columns
+        self.fmt = fmt
+        self._gz = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+
+    def _emit(self, text: str) -> bytes:
+        data = text.encode("utf-8")
+        # Sync-flush so the client can decompress each chunk as it arrives
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH) if self._gz else data
+
+    def start(self) -> bytes:
+        return self._emit(encode_csv([self.columns])) if self.fmt == "csv" else b""
+
+    def batch(self, rows: list) -> bytes:
+        return self._emit(encode_csv(rows) if self.fmt == "csv" else encode_ndjson(self.columns, rows))
+
+    def finish(self) -> bytes:
+        return self._gz.flush() if self._gz else b""
+
+def encode_stream(batches: Iterable[list], columns: list[str], fmt: str, compress: bool) -> Iterator[bytes]:
+    """
+    Encode row batches as NDJSON or CSV, one output chunk per batch.
+
+    With `compress`, the output is a single gzip stream and every chunk is
+    sync-flushed, so the client can decompress each one as it arrives.
+
+    Args:
+        batches (Iterable[list]): Row tuples in batches, e.g. from `iter_batches`.
+        columns (list[str]): Column names, in row order.
+        fmt (str): `ndjson` or `csv` (with a header row).
+        compress (bool): Gzip the output.
+
+    Yields:
+        bytes: Encoded chunks.
+    """
+    encoder = _Encoder(columns, fmt, compress)
+    if head := encoder.start():
+        yield head
+    for batch in batches:
+        yield encoder.batch(batch)
+    if tail := encoder.finish():
+        yield tail
+
+async def encode_stream_async(session_factory, statements: Iterable, columns: list[str], fmt: str,
+                              compress: bool) -> AsyncIterator[bytes]:
+    """`encode_stream` over `AsyncSession.stream`, for async engines."""
+    encoder = _Encoder(columns, fmt, compress)
+    if head := encoder.start():
+        yield head
+    async with session_factory() as db:
+        for statement in statements:
+            result = await db.stream(statement, execution_options={"yield_per": EXPORT_BATCH_SIZE})
+            async for partition in result.partitions():
+                yield encoder.batch(partition)
+    if tail := encoder.finish():
+        yield tail
+
+def streaming_export(
+    session_factory: Callable,
+    statements: Iterable,
+    columns: list[str],
+    fmt: str,
+    compress: bool,
+    filename: str,
+) -> StreamingResponse:
+    """
+    Build a response that streams the rows of one or more queries.
+
+    The session is opened when the client starts reading and closed when
+    the stream ends or the client disconnects, so the export holds one
+    connection and one read snapshot for its duration and memory stays
+    bounded by a single batch. With a sync `sessionmaker` the generator is
+    synchronous and Starlette iterates it in the threadpool; with an
+    `async_sessionmaker` rows are streamed on the event loop.
+
+    Args:
+        session_factory (Callable): `sessionmaker` or `async_sessionmaker` to read with.
+        statements (Iterable): Core `select()` statements whose rows are
+            exported in order, e.g. one per chunk of IDs.
+        columns (list[str]): Column names, in the statements' column order.
+        fmt (str): `ndjson` or `csv`.
+        compress (bool): Gzip the body (`Content-Encoding: gzip`).
+        filename (str): Download name without extension.
+
+    Returns:
+        StreamingResponse: The export response.
+    """
+    def body() -> Iterator[bytes]:
+        db = session_factory()
+        try:
+            yield from encode_stream(iter_batches(db, statements), columns, fmt, compress)
+        finally:
+            db.close()
+
+    if isinstance(session_factory, sessionmaker):
+        content = body()
+    else:
+        content = encode_stream_async(session_factory, statements, columns, fmt, compress)
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(content, media_type=MEDIA_TYPES[fmt], headers=headers)
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import os
+import time
+import httpx
+import jwt
+from common import metrics
+
+# The auth service's published token signing keys
+JWKS_URL = os.getenv("JWKS_URL", os.getenv("AUTH_SERVICE_URL", "http://auth:8000").rstrip("/") + "/auth/jwks.json")
+# How often the key set is re-fetched; keep it below the auth service's JWT_KEY_PUBLISH_AHEAD
+JWKS_REFRESH_INTERVAL = float(os.getenv("JWKS_REFRESH_INTERVAL", "300"))
+# Floor between fetches, however many tokens with unknown key IDs arrive
+JWKS_MIN_REFRESH_INTERVAL = float(os.getenv("JWKS_MIN_REFRESH_INTERVAL", "10"))
+JWKS_TIMEOUT = float(os.getenv("JWKS_TIMEOUT", "5"))
+
+logger = logging.getLogger("jwks")
+
+_refreshes = metrics.registry.counter("jwks_refreshes_total", "Fetches of the signing key set", ("result",))
+_keys = metrics.registry.gauge("jwks_keys", "Signing keys in the cached key set")
+_unknown = metrics.registry.counter("jwks_unknown_kid_total", "Tokens naming a key ID not in the cached key set")
+
+class UnknownKeyError(jwt.InvalidTokenError):
+    """The token's `kid` names no key in the key set."""
+
+def parse(jwks: dict) -> dict[str, jwt.PyJWK]:
+    """Index a JWK Set by `kid`, skipping keys without one or of an unsupported type."""
+    keys = {}
+    for data in jwks.get("keys", []):
+        if not data.get("kid"):
+            continue
+        try:
+            keys[data["kid"]] = jwt.PyJWK(data)
+        except jwt.PyJWTError:
+            logger.warning("Skipping unusable signing key %s", data["kid"])
+    return keys
+
+def decode(token: str, keys: dict[str, jwt.PyJWK], secret: str = "") -> dict:
+    """
+    Verify a JWT with the key its `kid` header names and return its claims.
+
+    The algorithm is the key's own, never the one the token's header
+    claims, so a public key can not be passed off as an HMAC secret.
+
+    Args:
+        token (str): The JWT.
+        keys (dict): Verification keys by key ID, from `parse`.
+        secret (str): Shared secret for HS256 tokens without a `kid`;
+            empty rejects them.
+
+    Raises:
+        UnknownKeyError: If the `kid` is not in `keys`.
+        jwt.PyJWTError: If the token is expired, malformed or its signature does not verify.
+    """
+    kid = jwt.get_unverified_header(token).get("kid")
+    if kid is None:
+        if not secret:
+            raise jwt.InvalidTokenError("Token has no key ID")
+        return jwt.decode(token, secret, algorithms=["HS256"])
+    key = keys.get(kid)
+    if key is None:
+        raise UnknownKeyError(kid)
+    return jwt.decode(token, key.key, algorithms=[key.algorithm_name])
+
+class JWKSCache:
+    """
+    Local copy of the auth service's JWK Set, so tokens verify without a
+    network hop on the request path.
+
+    A background task fetches the set at startup and every
+    `JWKS_REFRESH_INTERVAL` seconds, retrying failures with backoff; the
+    last good set stays in use while the auth service is unreachable. A
+    token naming an unknown key only wakes the task early (at most once
+    per `JWKS_MIN_REFRESH_INTERVAL`) and is rejected; the auth service
+    publishes keys well before signing with them.
+
+    Args:
+        url (str): URL of the JWK Set.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.keys: dict[str, jwt.PyJWK] = {}
+        self.loaded = False
+        self._task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def unknown_key(self):
+        """Note a token whose key ID is not in the set, and refresh early."""
+        _unknown.inc()
+        self._wake.set()
+
+    def replace(self, keys: dict[str, jwt.PyJWK]):
+        """
+        Replace the cached keys. Replaced, not merged: a key the auth
+        service stopped publishing stops verifying.
+        """
+        self.keys = keys
+        self.loaded = True
+        _keys.set(len(keys))
+
+    async def refresh(self):
+        """Fetch the key set and replace the cached keys with it."""
+        async with httpx.AsyncClient(timeout=JWKS_TIMEOUT) as client:
+            resp = await client.get(self.url)
+            resp.raise_for_status()
+        self.replace(parse(resp.json()))
+
+    async def _run(self):
+        failures = 0
+        while True:
+            try:
+                await self.refresh()
+                failures = 0
+                _refreshes.inc("ok")
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                failures += 1
+                _refreshes.inc("error")
+                logger.warning("Fetching signing keys from %s failed: %r", self.url, exc)
+            delay = JWKS_REFRESH_INTERVAL if not failures else min(JWKS_REFRESH_INTERVAL, 0.5 * 2 ** (failures - 1))
+            fetched = time.monotonic()
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            rest = min(delay, JWKS_MIN_REFRESH_INTERVAL) - (time.monotonic() - fetched)
+            if rest > 0:
+                await asyncio.sleep(rest)
+
+cache = JWKSCache(JWKS_URL)
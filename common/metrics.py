@@ -0,0 +1,261 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from fastapi import FastAPI, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Set to false to skip the HTTP middleware and DB timing entirely
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+class Counter(_Metric):
+    """Monotonic counter. Label values are passed positionally in `labelnames` order."""
+    kind = "counter"
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+class Gauge(_Metric):
+    """Value that can go up and down, e.g. requests in flight."""
+    kind = "gauge"
+
+    def set(self, value: float, *labelvalues):
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues, amount: float = 1):
+        self.inc(*labelvalues, amount=-amount)
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram. An observation costs one bisect and three
+    additions under a lock; cumulative bucket counts are only computed at
+    scrape time.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = HTTP_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues):
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                # Per-bucket counts (last slot is +Inf), sum, count
+                entry = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][idx] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(k, (list(c), s, n)) for k, (c, s, n) in self._values.items()]
+        lines = self._header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+class Registry:
+    """
+    Process-wide set of metrics rendered in the Prometheus text format.
+
+    Besides metrics updated inline, collectors can be registered: callables
+    run at scrape time that return `(name, kind, help, samples)` tuples,
+    where `samples` is a list of `(labels dict, value)`. They suit values
+    that already live elsewhere (cache hit counters, breaker states).
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: tuple = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = HTTP_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines += metric.render()
+        for collector in self._collectors:
+            for name, kind, help, samples in collector():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+http_requests = registry.counter("http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+http_duration = registry.histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+# The route is only known once routing ran, so the in-flight gauge is per method
+http_in_progress = registry.gauge("http_requests_in_progress", "HTTP requests being handled", ("method",))
+db_duration = registry.histogram("db_query_duration_seconds", "Database statement latency",
+                                 ("engine", "operation"), buckets=DB_BUCKETS)
+db_errors = registry.counter("db_query_errors_total", "Database statements that raised", ("engine", "operation"))
+
+def _route_of(scope) -> str:
+    """
+    Route template (`/artworks/{art_id}`) the router matched, so label
+    cardinality stays bounded by the number of routes.
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route request counts by status, latency
+    histograms and in-flight gauges. The route template is read from the
+    scope after the router matched it. Written as plain ASGI rather than
+    `BaseHTTPMiddleware` to keep the per-request overhead to a few
+    microseconds.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_progress.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = _route_of(scope)
+            http_duration.observe(time.perf_counter() - start, method, route)
+            http_in_progress.dec(method)
+            http_requests.inc(method, route, str(status))
+
+def _operation(statement: str) -> str:
+    head = statement.lstrip()[:8].split(None, 1)
+    op = head[0].upper() if head else ""
+    return op if op in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH") else "OTHER"
+
+# Instrumented engines by `engine` label; one collector reports all their pools as a single family
+_pooled_engines: dict[str, Engine] = {}
+
+def _pool_usage():
+    samples = []
+    for name, engine in _pooled_engines.items():
+        checked_out = getattr(engine.pool, "checkedout", None)
+        if checked_out is not None:
+            samples.append(({"engine": name}, checked_out()))
+    if not samples:
+        return []
+    return [("db_pool_checked_out", "gauge", "Connections currently checked out of the pool", samples)]
+
+registry.add_collector(_pool_usage)
+
+def instrument_engine(engine: Engine, name: str):
+    """
+    Time every statement run on `engine` and export its pool usage.
+
+    Args:
+        engine (Engine): Engine to instrument.
+        name (str): `engine` label value, e.g. `primary` or `read`.
+    """
+    if not METRICS_ENABLED:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        db_duration.observe(time.perf_counter() - context._metrics_start, name, _operation(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(ctx):
+        db_errors.inc(name, _operation(ctx.statement or ""))
+
+    _pooled_engines[name] = engine
+
+def instrument(app: FastAPI):
+    """
+    Add the metrics middleware and a `GET /metrics` endpoint to `app`.
+
+    Args:
+        app (FastAPI): The service application.
+    """
+    if METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """Expose every registered metric in the Prometheus text format."""
+        return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,48 @@
+import base64
+import json
+from fastapi import HTTPException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(sort_by: str, order: str, key, last_id: int) -> str:
+    """
+    Build an opaque keyset cursor pointing just past a row.
+
+    Args:
+        sort_by (str): Column the page is sorted by.
+        order (str): `asc` or `desc`.
+        key: Value of the sort column for the last row of the page.
+        last_id (int): ID of the last row of the page (tie breaker).
+
+    Returns:
+        str: URL-safe base64 token to pass back as `cursor`.
+    """
+    raw = json.dumps({"s": sort_by, "o": order, "k": key, "id": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_by: str, order: str) -> tuple:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The opaque cursor received from the client.
+        sort_by (str): Sort column of the current request.
+        order (str): Sort direction of the current request.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed or was issued for a
+            different sort.
+
+    Returns:
+        tuple: `(key, last_id)` of the row the next page starts after.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        key, last_id = data["k"], int(data["id"])
+        same_sort = data["s"] == sort_by and data["o"] == order
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not same_sort:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort parameters")
+    return key, last_id
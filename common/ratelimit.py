@@ -0,0 +1,289 @@
+import asyncio
+import ipaddress
+import math
+import os
+import re
+import time
+from collections import OrderedDict
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from common import auth_utils, metrics
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+# Token bucket per client: refill rate (tokens/s) and capacity; a request costs 1 unless listed in the costs
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "20"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "40"))
+# e.g. "POST /auth/token=10;POST /orders=5"; merged over DEFAULT_COSTS
+RATE_LIMIT_COSTS = os.getenv("RATE_LIMIT_COSTS", "")
+# e.g. redis://cache:6379/1 to share buckets between replicas (requires the optional `redis` package)
+RATE_LIMIT_URL = os.getenv("RATE_LIMIT_URL", "")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Addresses or CIDRs of proxies in front (e.g. the gateway), comma-separated. Anonymous clients connecting
+# through one are keyed by the last X-Forwarded-For address, the one that proxy added; empty trusts none
+RATE_LIMIT_TRUSTED_PROXIES = os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "")
+# Load shedding: reject once this many requests are in flight, or once queueing delay passes the target
+SHED_MAX_IN_FLIGHT = int(os.getenv("SHED_MAX_IN_FLIGHT", "256"))
+SHED_DELAY_TARGET_MS = float(os.getenv("SHED_DELAY_TARGET_MS", "100"))
+SHED_RETRY_AFTER = int(os.getenv("SHED_RETRY_AFTER", "1"))
+
+# Endpoints that cost more than one token: bcrypt, upstream calls, long scans
+DEFAULT_COSTS = {
+    "POST /auth/token": 10,
+    "POST /auth/register": 10,
+    "POST /orders": 5,
+    "POST /artworks/bulk": 20,
+    "GET /artworks/export": 20,
+    "GET /orders/export": 20,
+    "GET /artworks/search": 2,
+    "GET /dashboard": 3,
+}
+# Never limited or shed: scrapes, debugging and docs
+EXEMPT_PREFIXES = ("/metrics", "/debug/", "/docs", "/redoc", "/openapi.json")
+# Long-lived event streams: limited when they connect, but not counted as in flight while open
+STREAM_SUFFIX = "/stream"
+LOAD_INTERVAL = 0.1
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+rejected = metrics.registry.counter("ratelimit_rejected_total", "Requests rejected before reaching a route", ("reason",))
+loop_lag = metrics.registry.gauge("event_loop_lag_seconds", "Smoothed delay of event-loop callbacks")
+queue_delay = metrics.registry.gauge("threadpool_queue_delay_seconds", "Smoothed wait before threadpool work starts")
+
+def route_key(method: str, path: str) -> str:
+    """Group requests per route: `GET /orders/42` -> `GET /orders/{id}`."""
+    return f"{method} {_ID_SEGMENT.sub('/{id}', path)}"
+
+def parse_costs(spec: str) -> dict[str, float]:
+    """Parse `"POST /auth/token=10;POST /orders=5"` into a route-key -> cost map."""
+    costs = {}
+    for item in filter(None, (part.strip() for part in spec.split(";"))):
+        key, _, cost = item.rpartition("=")
+        costs[key.strip()] = float(cost)
+    return costs
+
+def parse_networks(spec: str) -> tuple:
+    """Parse `"172.28.0.10, 10.0.0.0/8"` into address networks; a bare address is a one-address network."""
+    return tuple(ipaddress.ip_network(part.strip(), strict=False) for part in spec.split(",") if part.strip())
+
+_trusted_proxies = parse_networks(RATE_LIMIT_TRUSTED_PROXIES)
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in _trusted_proxies)
+
+class InMemoryStore:
+    """
+    Process-local token buckets, bounded to `maxsize` keys (least recently
+    used first out). Only touched from the event loop, so no locking.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, cost: float, rate: float, burst: float) -> tuple[bool, float]:
+        """
+        Take `cost` tokens from the bucket of `key` if it holds enough.
+
+        Returns:
+            tuple[bool, float]: Whether the request is allowed, and the tokens left.
+        """
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - last) * rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return allowed, tokens
+
+class RedisStore:
+    """Token buckets shared by every replica, updated atomically by a Lua script."""
+
+    SCRIPT = """
+    local state = redis.call('HMGET', KEYS[1], 't', 'ts')
+    local rate, burst, cost, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+    local tokens = tonumber(state[1]) or burst
+    local last = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - last) * rate)
+    local allowed = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 't', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio
+        self._redis = redis.asyncio.Redis.from_url(url)
+        self._script = self._redis.register_script(self.SCRIPT)
+
+    async def take(self, key: str, cost: float, rate: float, burst: float) -> tuple[bool, float]:
+        allowed, tokens = await self._script(keys=[f"ratelimit:{key}"], args=[rate, burst, cost, time.time()])
+        return bool(allowed), float(tokens)
+
+class LoadMonitor:
+    """
+    Tracks how long work waits before it runs, from two probes taken every
+    `LOAD_INTERVAL` seconds.
+
+    Event-loop lag is how late a timer callback runs; new requests queue
+    behind the same callbacks. Threadpool delay is how long a no-op takes
+    to start on the threadpool that sync routes and `run_sync` database
+    work share (including waiting for the GIL). Unlike request durations,
+    neither depends on how slow an endpoint is by design, so a login doing
+    bcrypt or a long-poll does not look like overload. Both are smoothed so
+    a single slow interval does not trip shedding.
+    """
+
+    def __init__(self):
+        self.lag = 0.0
+        self.queue_delay = 0.0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def delay(self) -> float:
+        return max(self.lag, self.queue_delay)
+
+    def ensure_started(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    @staticmethod
+    async def _probe_threadpool() -> float:
+        sent = time.perf_counter()
+        return await run_in_threadpool(time.perf_counter) - sent
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        probe, probe_sent = None, 0.0
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LOAD_INTERVAL)
+            self.lag = 0.7 * self.lag + 0.3 * max(0.0, loop.time() - start - LOAD_INTERVAL)
+            if probe is not None and not probe.done():
+                # Still queued: it has waited at least this long
+                wait = time.perf_counter() - probe_sent
+            else:
+                wait = probe.result() if probe is not None else 0.0
+                probe, probe_sent = loop.create_task(self._probe_threadpool()), time.perf_counter()
+            self.queue_delay = 0.7 * self.queue_delay + 0.3 * wait
+            loop_lag.set(self.lag)
+            queue_delay.set(self.queue_delay)
+
+def _client_key(scope, headers: dict) -> str:
+    """`user:<sub>` for requests with a valid token, otherwise `ip:<address>`."""
+    scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            return f"user:{auth_utils.decode_token(token)['sub']}"
+        except Exception:
+            pass  # invalid tokens are rejected by the route; limit them per address
+    client = scope.get("client")
+    if client and b"x-forwarded-for" in headers and _is_trusted_proxy(client[0]):
+        # Earlier entries are whatever the client sent; only the last one was set by our proxy
+        return "ip:" + headers[b"x-forwarded-for"].decode("latin-1").split(",")[-1].strip()
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+async def _reject(send, status: int, detail: str, headers: dict):
+    body = ('{"detail":"%s"}' % detail).encode()
+    raw = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    raw += [(k.encode(), str(v).encode()) for k, v in headers.items()]
+    await send({"type": "http.response.start", "status": status, "headers": raw})
+    await send({"type": "http.response.body", "body": body})
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware that sheds load and enforces per-client token buckets
+    before a request reaches routing.
+
+    Shedding comes first and is adaptive. Once `SHED_MAX_IN_FLIGHT`
+    requests are in flight everything is rejected with 503. When the
+    queueing delay measured by `LoadMonitor` passes `SHED_DELAY_TARGET_MS`,
+    requests that cost more than one token are rejected, and above twice
+    the target all of them are, so cheap reads keep working the longest. Then the client's
+    bucket (keyed by JWT `sub`, else by address) must hold the route's cost
+    or the request gets 429. Both answers carry `Retry-After`. Event
+    streams (paths ending in `/stream`) pass the same checks when they
+    connect but do not count as in flight while they stay open.
+    """
+
+    def __init__(self, app, service: str, store=None, costs: dict | None = None):
+        self.app = app
+        self.service = service
+        self.store = store or _make_store()
+        self.costs = {**DEFAULT_COSTS, **parse_costs(RATE_LIMIT_COSTS), **(costs or {})}
+        self.monitor = LoadMonitor()
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PREFIXES) or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        self.monitor.ensure_started()
+        cost = self.costs.get(route_key(scope["method"], scope["path"]), 1)
+
+        delay_ms = self.monitor.delay * 1000
+        if self.in_flight >= SHED_MAX_IN_FLIGHT:
+            rejected.inc("in_flight")
+            await _reject(send, 503, "Server overloaded", {"Retry-After": SHED_RETRY_AFTER})
+            return
+        if delay_ms > SHED_DELAY_TARGET_MS and (cost > 1 or delay_ms > 2 * SHED_DELAY_TARGET_MS):
+            rejected.inc("latency")
+            await _reject(send, 503, "Server overloaded", {"Retry-After": SHED_RETRY_AFTER})
+            return
+
+        # Per service, so replicas sharing a store do not also share buckets with the gateway
+        key = f"{self.service}:{_client_key(scope, dict(scope['headers']))}"
+        try:
+            allowed, tokens = await self.store.take(key, cost, RATE_LIMIT_RATE, RATE_LIMIT_BURST)
+        except Exception:
+            # Fail open: a store outage must not take the service down with it
+            rejected.inc("store_error")
+            allowed, tokens = True, 0.0
+        if not allowed:
+            rejected.inc("rate")
+            retry_after = max(1, math.ceil((cost - tokens) / RATE_LIMIT_RATE))
+            await _reject(send, 429, "Too many requests", {
+                "Retry-After": retry_after, "X-RateLimit-Limit": f"{RATE_LIMIT_BURST:g}", "X-RateLimit-Remaining": int(tokens),
+            })
+            return
+
+        if scope["path"].endswith(STREAM_SUFFIX):
+            # An open stream is an idle coroutine, capped by STREAM_MAX_CONNECTIONS instead
+            await self.app(scope, receive, send)
+            return
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+def _make_store():
+    if RATE_LIMIT_URL.startswith("redis://"):
+        return RedisStore(RATE_LIMIT_URL)
+    return InMemoryStore(RATE_LIMIT_MAX_KEYS)
+
+def instrument(app: FastAPI, service: str, costs: dict | None = None):
+    """
+    Add rate limiting and load shedding to `app`.
+
+    Add it before the CORS and metrics middleware so those wrap it: 429
+    and 503 answers still get CORS headers and are counted per status.
+
+    Args:
+        app (FastAPI): The service application.
+        service (str): Service name, prefixed to bucket keys.
+        costs (dict, optional): Extra route-key -> cost entries, e.g.
+            `{"POST /artworks": 2}`, on top of `DEFAULT_COSTS` and `RATE_LIMIT_COSTS`.
+    """
+    if RATE_LIMIT_ENABLED:
+        app.add_middleware(RateLimitMiddleware, service=service, costs=costs)
@@ -0,0 +1,43 @@
+import json
+from datetime import date, datetime
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib fallback produces the same JSON, only slower
+    orjson = None
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{value.__class__.__name__} is not JSON serializable")
+
+_encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=_default).encode
+
+def dumps(obj) -> bytes:
+    """
+    Encode `obj` as compact UTF-8 JSON.
+
+    Uses orjson when it is installed. Datetimes become ISO 8601 strings in
+    the same format Pydantic produces, so the bodies match what
+    `response_model` serialization would return.
+
+    Returns:
+        bytes: The encoded document.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return _encode(obj).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """
+    `JSONResponse` rendered with `dumps`.
+
+    Return it from routes whose content is already plain dicts built from
+    trusted database rows: FastAPI then skips `response_model` validation
+    and per-row model construction, while the decorator's `response_model`
+    still documents the schema in OpenAPI.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from common import metrics
+from common.db import run_in_session
+from common.serialization import dumps
+
+# Comment line sent on idle streams so proxies (and the gateway's read timeout) keep them open
+STREAM_HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT", "15"))
+# Batches of events a subscriber may fall behind before it is disconnected to resume from Last-Event-ID
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "256"))
+STREAM_MAX_CONNECTIONS = int(os.getenv("STREAM_MAX_CONNECTIONS", "10000"))
+# How often a hub with subscribers polls its event table; writes in this process wake it at once
+STREAM_POLL_INTERVAL = float(os.getenv("STREAM_POLL_INTERVAL", "1.0"))
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+# Replays from Last-Event-ID running at once; a reconnect storm must not exhaust the threadpool and DB pool
+STREAM_BACKLOG_CONCURRENCY = int(os.getenv("STREAM_BACKLOG_CONCURRENCY", "4"))
+# Reconnect delay suggested to EventSource clients
+STREAM_RETRY_MS = int(os.getenv("STREAM_RETRY_MS", "2000"))
+
+# `responses=` for event-stream routes, so the OpenAPI schema names the media type
+OPENAPI_RESPONSES = {200: {"content": {"text/event-stream": {}}}}
+
+FANOUT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+logger = logging.getLogger("streaming")
+
+_connections = metrics.registry.gauge("stream_connections", "Open event-stream connections", ("stream",))
+_fanout = metrics.registry.histogram(
+    "stream_fanout_seconds", "Time from an event being read by the hub until it is written to a subscriber",
+    ("stream",), buckets=FANOUT_BUCKETS)
+_published = metrics.registry.counter("stream_events_total", "Events read by a hub and fanned out", ("stream",))
+_dropped = metrics.registry.counter(
+    "stream_slow_consumers_total", "Subscribers disconnected for falling STREAM_QUEUE_SIZE batches behind", ("stream",))
+
+def format_event(event: dict) -> bytes:
+    """Encode an event as one Server-Sent Events frame: its `id`, its `type` as the event name, and JSON data."""
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (event["id"], event["type"].encode(), dumps(event))
+
+class Subscription:
+    """One stream's filter and bounded queue of `(frames, published_at)`, one entry per published batch."""
+
+    def __init__(self, stream: str, match: Callable[[dict], bool] | None):
+        self.stream = stream
+        self.match = match
+        self.queue: asyncio.Queue = asyncio.Queue(STREAM_QUEUE_SIZE)
+        self.overflowed = False
+
+    def offer(self, events: list[dict], frames: list[tuple[int, bytes]], published_at: float):
+        """Queue the batch's `(event_id, frame)` pairs that pass the filter."""
+        if self.overflowed:
+            return
+        if self.match is not None:
+            frames = [f for e, f in zip(events, frames) if self.match(e)]
+            if not frames:
+                return
+        try:
+            self.queue.put_nowait((frames, published_at))
+        except asyncio.QueueFull:
+            # Never block the hub on one slow client; it resumes from its last event instead
+            self.overflowed = True
+            _dropped.inc(self.stream)
+
+class Hub:
+    """
+    In-process fan-out of a service's event table to event-stream subscribers.
+
+    While anyone is subscribed, one task reads new rows after the last ID it
+    has seen, encodes each event once and offers the batch to every
+    subscriber's queue, then waits `STREAM_POLL_INTERVAL` seconds or until
+    `wake()` is called after a commit. An idle connection is a coroutine
+    parked on its queue, so thousands of them cost next to no CPU; with no
+    subscribers the task stops. Each subscriber's queue holds at most
+    `STREAM_QUEUE_SIZE` batches. When it fills (the client reads slower than
+    events arrive), nothing more is queued for it and its stream ends once
+    the queued batches are sent; the client's reconnect resumes from
+    `Last-Event-ID` out of the table. Each process polls the shared table,
+    so replicas and other writers are picked up too.
+
+    Args:
+        name (str): Stream name, used as the metrics label.
+        session_factory: `sessionmaker` or `async_sessionmaker` to read with.
+        fetch (Callable): `fetch(db, after, limit)` returning events with an
+            ID above `after`, oldest first; each a dict with `id` and `type`.
+        head (Callable): `head(db)` returning the highest event ID, or 0.
+    """
+
+    def __init__(self, name: str, session_factory, fetch: Callable, head: Callable):
+        self.name = name
+        self.session_factory = session_factory
+        self.fetch = fetch
+        self.head = head
+        self.position = 0
+        self._subscribers: set[Subscription] = set()
+        self._task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+        self._starting = asyncio.Lock()
+        self.replays = asyncio.Semaphore(STREAM_BACKLOG_CONCURRENCY)
+
+    def wake(self):
+        self._wake.set()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def check_capacity(self):
+        """Raise 503 with `Retry-After` once `STREAM_MAX_CONNECTIONS` streams are open."""
+        if len(self._subscribers) >= STREAM_MAX_CONNECTIONS:
+            raise HTTPException(status_code=503, detail="Too many open streams",
+                                headers={"Retry-After": str(max(1, STREAM_RETRY_MS // 1000))})
+
+    async def subscribe(self, match: Callable[[dict], bool] | None = None) -> Subscription:
+        """Register a subscriber for events after the current head, starting the poll task if needed."""
+        if self._task is None:
+            # Many clients connecting at once share one head query
+            async with self._starting:
+                if self._task is None:
+                    self.position = await run_in_session(self.session_factory, self.head)
+                    self._task = asyncio.create_task(self._run())
+        sub = Subscription(self.name, match)
+        self._subscribers.add(sub)
+        _connections.set(len(self._subscribers), self.name)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        self._subscribers.discard(sub)
+        _connections.set(len(self._subscribers), self.name)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _publish(self, events: list[dict]):
+        now = time.perf_counter()
+        # Encoded once and shared by every subscriber
+        frames = [(e["id"], format_event(e)) for e in events]
+        for sub in list(self._subscribers):
+            sub.offer(events, frames, now)
+        self.position = events[-1]["id"]
+        _published.inc(self.name, amount=len(events))
+
+    async def _run(self):
+        while True:
+            try:
+                events = await run_in_session(self.session_factory, self.fetch, self.position, STREAM_BATCH_SIZE)
+                if events:
+                    self._publish(events)
+                    if len(events) == STREAM_BATCH_SIZE:
+                        continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Polling stream %s failed", self.name)
+            try:
+                await asyncio.wait_for(self._wake.wait(), STREAM_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+def event_stream(
+    hub: Hub,
+    match: Callable[[dict], bool] | None = None,
+    backlog: Callable[[int, int], Awaitable[list[dict]]] | None = None,
+    last_event_id: int | None = None,
+) -> StreamingResponse:
+    """
+    Build a `text/event-stream` response of `hub`'s events.
+
+    The stream subscribes first and then, when the client sends the ID of
+    the last event it saw, replays the missed ones from `backlog` (at most
+    `STREAM_BACKLOG_CONCURRENCY` replays read at once), so nothing falls
+    between the two; events already replayed are skipped
+    when they also arrive live. Idle streams get a heartbeat comment every
+    `STREAM_HEARTBEAT` seconds. A stream that falls behind ends, and the
+    client's automatic reconnect (after the `retry` delay sent up front)
+    resumes from its last event.
+
+    Args:
+        hub (Hub): The hub to subscribe to.
+        match (Callable, optional): Only events for which it returns true are sent.
+        backlog (Callable, optional): `await backlog(after, limit)` returning
+            matching events after `after`, oldest first.
+        last_event_id (int, optional): The client's `Last-Event-ID`.
+
+    Raises:
+        HTTPException: 503 if `STREAM_MAX_CONNECTIONS` streams are open.
+
+    Returns:
+        StreamingResponse: The event stream.
+    """
+    hub.check_capacity()
+
+    async def body():
+        sub = await hub.subscribe(match)
+        try:
+            yield b"retry: %d\n\n" % STREAM_RETRY_MS
+            last = last_event_id
+            if last is not None and backlog is not None:
+                while True:
+                    async with hub.replays:
+                        events = await backlog(last, STREAM_BATCH_SIZE)
+                    if events:
+                        yield b"".join(format_event(e) for e in events)
+                        last = events[-1]["id"]
+                    if len(events) < STREAM_BATCH_SIZE:
+                        break
+            # After an overflow, send what was queued and end; the client resumes from there
+            while not (sub.overflowed and sub.queue.empty()):
+                try:
+                    frames, published_at = await asyncio.wait_for(sub.queue.get(), STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                if last is not None:
+                    frames = [(i, f) for i, f in frames if i > last]
+                    if not frames:
+                        continue
+                last = frames[-1][0]
+                yield b"".join(f for _, f in frames)
+                _fanout.observe(time.perf_counter() - published_at, hub.name)
+        finally:
+            hub.unsubscribe(sub)
+
+    # No buffering in nginx-style proxies; the browser must not cache a live stream
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(body(), media_type="text/event-stream", headers=headers)
@@ -0,0 +1,379 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi import FastAPI, Query
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# Fraction of new traces that are recorded; requests carrying a traceparent follow the caller's decision
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+# Comma-separated: "memory" (ring buffer behind GET /debug/traces), "file" (JSON lines), or "none"
+TRACE_EXPORTERS = os.getenv("TRACE_EXPORTERS", "memory")
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "2000"))
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+# Serve GET /debug/traces; off by default since it exposes SQL, routes and user activity unauthenticated
+TRACE_DEBUG_ENDPOINT = os.getenv("TRACE_DEBUG_ENDPOINT", "false").lower() in ("1", "true", "yes")
+# Longer SQL is truncated in the db.statement attribute
+TRACE_STATEMENT_MAX = 200
+
+SERVICE_NAME = os.getenv("SERVICE_NAME", "unknown")
+
+_rng = random.Random()
+_current: ContextVar = ContextVar("current_span", default=None)
+
+class SpanContext:
+    """Identity of a span as carried in a W3C `traceparent` header."""
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+def parse_traceparent(value: str | None) -> SpanContext | None:
+    """Parse a `traceparent` header (`00-<trace id>-<span id>-<flags>`); None if absent or malformed."""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return SpanContext(parts[1], parts[2], bool(flags & 1))
+
+def _new_id(bits: int) -> str:
+    return f"{_rng.getrandbits(bits):0{bits // 4}x}"
+
+class Span:
+    """A recorded span. Exported when `end` is called."""
+    recording = True
+
+    def __init__(self, name: str, context: SpanContext, parent_id: str | None, kind: str, attributes: dict):
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes
+        self.status = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def set_error(self, message: str):
+        self.status = message
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            _export(self)
+
+    def as_dict(self) -> dict:
+        return {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "service": SERVICE_NAME,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.status} if self.status else {"code": "OK"},
+        }
+
+class NonRecordingSpan:
+    """Stands in for spans of unsampled traces: keeps the context for propagation, records nothing."""
+    recording = False
+
+    def __init__(self, context: SpanContext):
+        self.context = context
+
+    def set_attribute(self, key: str, value):
+        pass
+
+    def set_error(self, message: str):
+        pass
+
+    def end(self):
+        pass
+
+def current_span():
+    return _current.get()
+
+def start_span(name: str, kind: str = "internal", parent=None, **attributes):
+    """
+    Start a span without making it current; call `end()` on it when done.
+
+    Args:
+        name (str): Span name.
+        kind (str, optional): `server`, `client` or `internal`. Defaults to `internal`.
+        parent (Span | SpanContext | str, optional): Parent span, span context
+            or `traceparent` string. Defaults to the current span; without
+            one a new trace is started and sampled at `TRACE_SAMPLE_RATE`.
+
+    Returns:
+        Span | NonRecordingSpan: The new span.
+    """
+    if isinstance(parent, str):
+        parent = parse_traceparent(parent)
+    elif parent is None:
+        parent = _current.get()
+    if isinstance(parent, (Span, NonRecordingSpan)):
+        parent = parent.context
+    if parent is None:
+        context = SpanContext(_new_id(128), _new_id(64), _rng.random() < TRACE_SAMPLE_RATE)
+        parent_id = None
+    elif not parent.sampled:
+        # Nothing is recorded for this trace; keep the caller's IDs for propagation
+        return NonRecordingSpan(parent)
+    else:
+        context = SpanContext(parent.trace_id, _new_id(64), True)
+        parent_id = parent.span_id
+    if not context.sampled:
+        return NonRecordingSpan(context)
+    return Span(name, context, parent_id, kind, attributes)
+
+@contextmanager
+def span(name: str, kind: str = "internal", parent=None, **attributes):
+    """
+    Run a block inside a new current span (see `start_span`); exceptions
+    mark the span as failed and are re-raised.
+    """
+    s = start_span(name, kind, parent, **attributes)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.set_error(f"{e.__class__.__name__}: {e}")
+        raise
+    finally:
+        _current.reset(token)
+        s.end()
+
+def inject(headers: dict) -> dict:
+    """Add the current span's `traceparent` to outgoing request `headers` and return them."""
+    s = _current.get()
+    if s is not None:
+        headers["traceparent"] = s.context.traceparent()
+    return headers
+
+def current_traceparent() -> str | None:
+    """`traceparent` of the current span, for handing work to a background task."""
+    s = _current.get()
+    return s.context.traceparent() if s is not None else None
+
+class RingBufferExporter:
+    """Keeps the most recent finished spans in memory for `GET /debug/traces`."""
+
+    def __init__(self, size: int):
+        self.spans: deque = deque(maxlen=size)
+
+    def export(self, record: dict):
+        self.spans.append(record)
+
+class FileExporter:
+    """Appends finished spans as JSON lines, one span per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def export(self, record: dict):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", buffering=1, encoding="utf-8")
+            self._file.write(line)
+
+def _make_exporters() -> list:
+    exporters = []
+    for name in (n.strip() for n in TRACE_EXPORTERS.split(",")):
+        if name == "memory":
+            exporters.append(RingBufferExporter(TRACE_BUFFER_SIZE))
+        elif name == "file":
+            exporters.append(FileExporter(TRACE_FILE))
+    return exporters
+
+exporters = _make_exporters()
+memory = next((e for e in exporters if isinstance(e, RingBufferExporter)), None)
+
+def _export(s: Span):
+    if not exporters:
+        return
+    record = s.as_dict()
+    for exporter in exporters:
+        exporter.export(record)
+
+class TracingMiddleware:
+    """
+    ASGI middleware that runs each request in a `server` span.
+
+    An incoming `traceparent` makes the span a child of the caller's and
+    reuses its sampling decision. The span is named after the matched
+    route template once routing has run.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        incoming = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                incoming = parse_traceparent(value.decode("latin-1"))
+                break
+        s = start_span(scope["method"], "server", incoming or _current.get(),
+                       **{"http.method": scope["method"], "http.target": scope["path"]})
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                s.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    s.set_error(f"HTTP {message['status']}")
+            await send(message)
+
+        token = _current.set(s)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            s.set_error(f"{e.__class__.__name__}: {e}")
+            raise
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None)
+            if s.recording:
+                s.name = f"{scope['method']} {route or 'unmatched'}"
+                s.set_attribute("http.route", route)
+            s.end()
+
+def _operation(statement: str) -> str:
+    head = statement.lstrip()[:8].split(None, 1)
+    return head[0].upper() if head else ""
+
+def instrument_engine(engine: Engine, name: str):
+    """
+    Record a `db.query` client span for every statement run on `engine`
+    while a sampled span is current.
+
+    Args:
+        engine (Engine): Engine to instrument.
+        name (str): `db.engine` attribute value, e.g. `primary` or `read`.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        parent = _current.get()
+        if parent is not None and parent.recording:
+            context._trace_span = start_span(
+                "db.query", "client", parent,
+                **{"db.engine": name, "db.operation": _operation(statement),
+                   "db.statement": statement[:TRACE_STATEMENT_MAX]},
+            )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        s = getattr(context, "_trace_span", None)
+        if s is not None:
+            s.end()
+
+    @event.listens_for(engine, "handle_error")
+    def _error(ctx):
+        s = getattr(ctx.execution_context, "_trace_span", None)
+        if s is not None:
+            s.set_error(f"{ctx.original_exception.__class__.__name__}: {ctx.original_exception}")
+            s.end()
+
+_SESSION_SPAN = "trace_span"
+
+@event.listens_for(Session, "after_transaction_create")
+def _session_begin(session, transaction):
+    # One `db.session` span per top-level ORM transaction: how long it was held
+    parent = _current.get()
+    if transaction.parent is None and parent is not None and parent.recording:
+        session.info[_SESSION_SPAN] = start_span("db.session", "internal", parent)
+
+@event.listens_for(Session, "after_transaction_end")
+def _session_end(session, transaction):
+    if transaction.parent is None:
+        s = session.info.pop(_SESSION_SPAN, None)
+        if s is not None:
+            s.end()
+
+def _traces(limit: int, min_duration_ms: float, trace_id: str | None) -> list[dict]:
+    spans = list(memory.spans) if memory is not None else []
+    by_trace: dict[str, list] = {}
+    for record in spans:
+        if trace_id is None or record["traceId"] == trace_id:
+            by_trace.setdefault(record["traceId"], []).append(record)
+    traces = []
+    for tid, records in by_trace.items():
+        start = min(r["startTimeUnixNano"] for r in records)
+        end = max(r["endTimeUnixNano"] for r in records)
+        duration_ms = (end - start) / 1e6
+        if duration_ms < min_duration_ms:
+            continue
+        records.sort(key=lambda r: r["startTimeUnixNano"])
+        traces.append({
+            "trace_id": tid,
+            "root": records[0]["name"],
+            "start_unix_nano": start,
+            "duration_ms": round(duration_ms, 3),
+            "spans": [dict(r, duration_ms=round((r["endTimeUnixNano"] - r["startTimeUnixNano"]) / 1e6, 3))
+                      for r in records],
+        })
+    traces.sort(key=lambda t: t["start_unix_nano"], reverse=True)
+    return traces[:limit]
+
+def instrument(app: FastAPI, service: str):
+    """
+    Add request tracing to `app`, and a `GET /debug/traces` endpoint when
+    `TRACE_DEBUG_ENDPOINT` is set.
+
+    Args:
+        app (FastAPI): The service application.
+        service (str): Service name recorded on every span.
+    """
+    global SERVICE_NAME
+    SERVICE_NAME = os.getenv("SERVICE_NAME", service)
+    app.add_middleware(TracingMiddleware)
+    if not TRACE_DEBUG_ENDPOINT:
+        return
+
+    @app.get("/debug/traces", include_in_schema=False)
+    def debug_traces(
+        limit: int = Query(20, ge=1, le=200),
+        min_duration_ms: float = Query(0, ge=0),
+        trace_id: str | None = None,
+    ):
+        """
+        Recent traces from this service's in-memory span buffer, newest first.
+
+        Args:
+            limit (int, optional): Maximum traces to return. Defaults to 20.
+            min_duration_ms (float, optional): Only traces at least this long. Defaults to 0.
+            trace_id (str, optional): Only this trace.
+
+        Returns:
+            list[dict]: Traces with their spans ordered by start time.
+        """
+        return _traces(limit, min_duration_ms, trace_id)
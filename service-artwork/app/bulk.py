@@ -0,0 +1,198 @@
+import codecs
+import json
+import os
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+import models, schemas, events
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+# Only the first errors are returned so a bad file cannot blow up the response
+BULK_MAX_ERRORS = int(os.getenv("BULK_MAX_ERRORS", "1000"))
+
+class NDJSONParser:
+    """
+    Incremental parser for newline-delimited JSON.
+
+    `feed` accepts arbitrary text fragments and returns `(row, value)` pairs
+    for every complete line, where `value` is the decoded object or the
+    exception raised while decoding that line.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._row = 0
+
+    def _parse(self, line: str):
+        if not line.strip():
+            return None
+        self._row += 1
+        try:
+            return self._row, json.loads(line)
+        except ValueError as e:
+            return self._row, e
+
+    def feed(self, text: str) -> list:
+        self._buf += text
+        *lines, self._buf = self._buf.split("\n")
+        return [r for r in map(self._parse, lines) if r is not None]
+
+    def close(self) -> list:
+        rest, self._buf = self._buf, ""
+        r = self._parse(rest)
+        return [r] if r is not None else []
+
+class JSONArrayParser:
+    """
+    Incremental parser for a top-level JSON array of objects.
+
+    Elements are decoded one at a time with `JSONDecoder.raw_decode`, so only
+    the undecoded tail of the stream is ever buffered. A syntax error cannot
+    be recovered from inside an array and is raised as `ValueError`.
+    """
+
+    _WS = " \t\r\n"
+
+    def __init__(self):
+        self._buf = ""
+        self._row = 0
+        self._state = "start"  # start | value_or_end | value | comma_or_end | done
+        self._decoder = json.JSONDecoder()
+
+    def _skip_ws(self, pos: int) -> int:
+        while pos < len(self._buf) and self._buf[pos] in self._WS:
+            pos += 1
+        return pos
+
+    def _drain(self, final: bool) -> list:
+        out = []
+        pos = 0
+        while True:
+            pos = self._skip_ws(pos)
+            if pos >= len(self._buf) or self._state == "done":
+                break
+            ch = self._buf[pos]
+            if self._state == "start":
+                if ch != "[":
+                    raise ValueError("Expected a JSON array")
+                self._state, pos = "value_or_end", pos + 1
+            elif self._state in ("comma_or_end", "value_or_end") and ch == "]":
+                self._state, pos = "done", pos + 1
+            elif self._state == "comma_or_end":
+                if ch != ",":
+                    raise ValueError(f"Expected ',' or ']' after row {self._row}")
+                self._state, pos = "value", pos + 1
+            else:
+                try:
+                    value, end = self._decoder.raw_decode(self._buf, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise ValueError(f"Malformed JSON at row {self._row + 1}")
+                    break
+                if end == len(self._buf) and not final:
+                    # A number or literal may continue in the next fragment
+                    break
+                self._row += 1
+                out.append((self._row, value))
+                self._state, pos = "comma_or_end", end
+        self._buf = self._buf[pos:]
+        return out
+
+    def feed(self, text: str) -> list:
+        self._buf += text
+        return self._drain(final=False)
+
+    def close(self) -> list:
+        out = self._drain(final=True)
+        if self._state != "done":
+            raise ValueError("Unterminated JSON array")
+        return out
+
+def make_parser(content_type: str | None):
+    """Pick a parser from the request Content-Type (NDJSON unless it is plain JSON)."""
+    if content_type and content_type.split(";")[0].strip() == "application/json":
+        return JSONArrayParser()
+    return NDJSONParser()
+
+def utf8_decoder():
+    return codecs.getincrementaldecoder("utf-8")()
+
+class BulkResult:
+    """Accumulates inserted/failed counts and the first `BULK_MAX_ERRORS` row errors."""
+
+    def __init__(self):
+        self.inserted = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+
+    def add_error(self, row: int, error: str):
+        self.failed += 1
+        if len(self.errors) < BULK_MAX_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+    def as_dict(self) -> dict:
+        return {"inserted": self.inserted, "failed": self.failed, "errors": self.errors}
+
+def validate_row(row: int, value, result: BulkResult) -> dict | None:
+    """
+    Validate one decoded row against `schemas.ArtworkCreate`.
+
+    Returns:
+        dict | None: Column values ready for insert, or None if the row was
+            rejected (the error is recorded on `result`).
+    """
+    if isinstance(value, Exception):
+        result.add_error(row, f"Malformed JSON: {value}")
+        return None
+    if not isinstance(value, dict):
+        result.add_error(row, "Row must be a JSON object")
+        return None
+    try:
+        art = schemas.ArtworkCreate(**value)
+    except ValidationError as e:
+        result.add_error(row, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+        return None
+    return {"title": art.title, "description": art.description, "price": art.price}
+
+def insert_chunk(db: Session, rows: list[tuple[int, dict]], owner: str, result: BulkResult):
+    """
+    Insert one chunk of validated rows with a single executemany in its own transaction,
+    together with their `artwork.created` events.
+
+    Args:
+        db (Session): Database session.
+        rows (list[tuple[int, dict]]): `(row number, column values)` pairs.
+        owner (str): Username every artwork in the chunk is owned by.
+        result (BulkResult): Accumulator for counts and errors.
+    """
+    if not rows:
+        return
+    try:
+        ids = db.execute(insert(models.Artwork).returning(models.Artwork.id),
+                         [dict(values, owner=owner, is_sold=False) for _, values in rows]).scalars().all()
+        events.record(db, events.CREATED, owner, ids)
+        db.commit()
+        result.inserted += len(rows)
+    except Exception as e:
+        db.rollback()
+        for row, _ in rows:
+            result.add_error(row, f"Insert failed: {e.__class__.__name__}")
+
+def ingest(db: Session, parsed_rows, owner: str, chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+    """
+    Validate and insert an iterable of `(row, value)` pairs in chunks.
+
+    Used by the CLI importer; the HTTP endpoint drives the same
+    `validate_row`/`insert_chunk` steps from the request stream.
+    """
+    result = BulkResult()
+    chunk: list[tuple[int, dict]] = []
+    for row, value in parsed_rows:
+        values = validate_row(row, value, result)
+        if values is not None:
+            chunk.append((row, values))
+        if len(chunk) >= chunk_size:
+            insert_chunk(db, chunk, owner, result)
+            chunk = []
+    insert_chunk(db, chunk, owner, result)
+    return result
@@ -0,0 +1,98 @@
+import os
+from sqlalchemy import func, insert, literal, select, true
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+import models
+from common import streaming
+from database import ReadSessionLocal
+
+CREATED = "artwork.created"
+SOLD = "artwork.sold"
+# Largest page GET /artworks/events serves
+EVENTS_PAGE_MAX = int(os.getenv("EVENTS_PAGE_MAX", "1000"))
+
+def record(db: Session, type: str, owner: str, art_ids: list[int]):
+    """
+    Append one event per artwork to the outbox.
+
+    Must be called in the transaction that makes the change, so the feed
+    never misses a committed change or reports one that rolled back.
+
+    Args:
+        db (Session): Session of the transaction making the change.
+        type (str): `CREATED` or `SOLD`.
+        owner (str): Username owning the artworks.
+        art_ids (list[int]): IDs of the changed artworks.
+    """
+    if art_ids:
+        db.execute(insert(models.ArtworkEvent), [{"type": type, "art_id": i, "owner": owner} for i in art_ids])
+
+def read_feed(db: Session, after: int, limit: int) -> list[dict]:
+    """Events with an ID above `after`, oldest first."""
+    stmt = (
+        select(models.ArtworkEvent.id, models.ArtworkEvent.type, models.ArtworkEvent.art_id, models.ArtworkEvent.owner)
+        .where(models.ArtworkEvent.id > after)
+        .order_by(models.ArtworkEvent.id)
+        .limit(limit)
+    )
+    return [{"id": i, "type": t, "art_id": a, "owner": o} for i, t, a, o in db.execute(stmt)]
+
+def read_stream(db: Session, after: int, limit: int, owner: str | None = None) -> list[dict]:
+    """
+    Events with an ID above `after`, oldest first, each with the artwork's current state.
+
+    Args:
+        db (Session): Database session.
+        after (int): Return events with a higher ID.
+        limit (int): Maximum number of events.
+        owner (str, optional): Only events of artworks owned by this user.
+
+    Returns:
+        list[dict]: Feed events plus an `artwork` object in the `ArtworkOut` shape.
+    """
+    e, a = models.ArtworkEvent, models.Artwork
+    stmt = (
+        select(e.id, e.type, e.art_id, e.owner, a.title, a.description, a.price, a.is_sold)
+        .join(a, a.id == e.art_id)
+        .where(e.id > after)
+        .order_by(e.id)
+        .limit(limit)
+    )
+    if owner is not None:
+        stmt = stmt.where(e.owner == owner)
+    return [
+        {"id": i, "type": t, "art_id": art_id, "owner": o, "artwork": {
+            "id": art_id, "title": title, "description": description, "price": price, "owner": o,
+            "is_sold": bool(is_sold)}}
+        for i, t, art_id, o, title, description, price, is_sold in db.execute(stmt)
+    ]
+
+def head(db: Session) -> int:
+    """The highest event ID, or 0 for an empty feed."""
+    return db.execute(select(func.max(models.ArtworkEvent.id))).scalar() or 0
+
+# Pushes new events to `GET /artworks/stream` subscribers; wake it after committing an event
+hub = streaming.Hub("artworks", ReadSessionLocal, read_stream, head)
+
+def setup(engine: Engine):
+    """
+    Backfill the feed for a database that predates it.
+
+    When the outbox is empty but artworks exist, appends a created event
+    for every artwork, then a sold event for every sold one, so consumers
+    replaying the feed from the start see the whole catalog.
+
+    Args:
+        engine (Engine): Engine of the artwork database.
+    """
+    with engine.begin() as conn:
+        if conn.execute(select(models.ArtworkEvent.id).limit(1)).first():
+            return
+        columns = ["type", "art_id", "owner"]
+        for type, condition in ((CREATED, true()), (SOLD, models.Artwork.is_sold.is_(True))):
+            rows = (
+                select(literal(type), models.Artwork.id, models.Artwork.owner)
+                .where(condition)
+                .order_by(models.Artwork.id)
+            )
+            conn.execute(insert(models.ArtworkEvent).from_select(columns, rows))
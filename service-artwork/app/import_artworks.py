@@ -0,0 +1,75 @@
+# run: docker compose run --rm artwork python import_artworks.py data/gallery.csv --owner frida_kahlo
+import argparse
+import asyncio
+import csv
+import resource
+import sys
+import time
+from sqlalchemy.orm import Session
+from database import engine
+import models, bulk
+from common.db import run_offline
+from response_cache import RESPONSE_CACHE_TTL, RESPONSE_CACHE_URL, response_cache
+
+READ_BLOCK = 64 * 1024
+
+def iter_csv(path: str):
+    """Yield `(row, dict)` pairs from a CSV file with title,description,price columns."""
+    with open(path, newline="", encoding="utf-8") as f:
+        for row, record in enumerate(csv.DictReader(f), start=1):
+            if record.get("description") == "":
+                record["description"] = None
+            yield row, record
+
+def iter_json(path: str):
+    """Yield `(row, value)` pairs from an NDJSON file or a JSON array file, reading in blocks."""
+    parser = bulk.JSONArrayParser() if path.endswith(".json") else bulk.NDJSONParser()
+    decoder = bulk.utf8_decoder()
+    with open(path, "rb") as f:
+        while block := f.read(READ_BLOCK):
+            yield from parser.feed(decoder.decode(block))
+    yield from parser.feed(decoder.decode(b"", final=True))
+    yield from parser.close()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Bulk import artworks from a CSV, NDJSON or JSON array file.")
+    ap.add_argument("path", help="File to import (.csv, .ndjson/.jsonl or .json)")
+    ap.add_argument("--owner", required=True, help="Username that will own every imported artwork")
+    ap.add_argument("--chunk-size", type=int, default=bulk.BULK_CHUNK_SIZE)
+    args = ap.parse_args(argv)
+
+    rows = iter_csv(args.path) if args.path.endswith(".csv") else iter_json(args.path)
+
+    def run(engine):
+        models.Base.metadata.create_all(bind=engine)
+        db = Session(bind=engine)
+        try:
+            return bulk.ingest(db, rows, args.owner, args.chunk_size)
+        finally:
+            db.close()
+
+    start = time.perf_counter()
+    try:
+        result = run_offline(engine, run)
+    except ValueError as e:
+        print(f"Aborted: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    if result.inserted:
+        # Running services must not keep serving catalog pages (and ETags) from before the import
+        asyncio.run(response_cache.invalidate())
+        if not RESPONSE_CACHE_URL:
+            print(f"Note: the response cache is per process (RESPONSE_CACHE_URL is unset), so a running artwork "
+                  f"service may serve pages without these rows for up to {RESPONSE_CACHE_TTL:g}s. Import through "
+                  f"POST /artworks/bulk while it is running, or restart it.", file=sys.stderr)
+
+    total = result.inserted + result.failed
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    for err in result.errors[:20]:
+        print(f"  row {err['row']}: {err['error']}")
+    print(f"Imported {result.inserted} artworks, {result.failed} failed, in {elapsed:.2f}s "
+          f"({total / elapsed if elapsed else 0:.0f} rows/sec, peak RSS {peak_mb:.1f} MB)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
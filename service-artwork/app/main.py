@@ -1,12 +1,29 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-import models
-from database import engine
+import events, models, search
+from database import engine, read_engine
+from common import jwks, metrics, ratelimit, tracing
+from common.db import dispose_engines, run_with_engine, sync_schema
 from routes import router
+from response_cache import response_cache
 
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_with_engine(engine, sync_schema, models.Base.metadata)
+    await run_with_engine(engine, search.setup)
+    await run_with_engine(engine, events.setup)
+    # Keeps the auth service's public signing keys cached for local token verification
+    jwks.cache.start()
+    yield
+    await jwks.cache.stop()
+    await events.hub.stop()
+    await dispose_engines(engine, read_engine)
 
-app = FastAPI(title="Artwork Service")
+app = FastAPI(title="Artwork Service", lifespan=lifespan)
+
+# Per-client token buckets and load shedding; innermost, so rejections still get CORS and metrics
+ratelimit.instrument(app, "artwork")
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,7 +31,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Content-Disposition"],
 )
 
+# Per-route request counts, latency histograms and in-flight gauges on /metrics
+metrics.instrument(app)
+# W3C traceparent propagation; recent traces on /debug/traces with TRACE_DEBUG_ENDPOINT
+tracing.instrument(app, "artwork")
+
 app.include_router(router)
 
+@app.get("/cache/stats")
+def cache_stats():
+    """
+    Report response cache effectiveness.
+
+    Returns:
+        dict: Backend name, hits, misses, hit ratio, 304 count and bytes saved.
+    """
+    return response_cache.stats()
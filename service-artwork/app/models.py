@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean
+from sqlalchemy import Column, Integer, String, Float, Boolean, Index
 from database import Base
 
 class Artwork(Base):
@@ -7,5 +7,25 @@ class Artwork(Base):
     title = Column(String, index=True, nullable=False)
     description = Column(String, nullable=True)
     price = Column(Float, nullable=False)
-    owner = Column(String, nullable=False)  # username
+    owner = Column(String, index=True, nullable=False)  # username
     is_sold = Column(Boolean, default=False)
+    sold_ref = Column(String, nullable=True)  # caller reference of the sale, e.g. "order:42"
+
+    # Composite indexes backing keyset pagination on (sort_key, id) per filter
+    __table_args__ = (
+        Index("ix_artworks_price_id", "price", "id"),
+        Index("ix_artworks_owner_price_id", "owner", "price", "id"),
+        Index("ix_artworks_is_sold_id", "is_sold", "id"),
+        Index("ix_artworks_is_sold_price_id", "is_sold", "price", "id"),
+    )
+
+class ArtworkEvent(Base):
+    """
+    Outbox of artwork changes for other services, appended in the same
+    transaction as the change. `id` is the feed position consumers resume from.
+    """
+    __tablename__ = "artwork_events"
+    id = Column(Integer, primary_key=True)
+    type = Column(String, nullable=False)  # artwork.created | artwork.sold
+    art_id = Column(Integer, nullable=False)
+    owner = Column(String, nullable=False)
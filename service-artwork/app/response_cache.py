@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from fastapi import Request, Response
+from common import metrics, serialization
+from common.cache import LRUCache
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+# Bodies larger than this are served but never cached
+RESPONSE_CACHE_MAX_ITEM_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_ITEM_BYTES", str(1024 * 1024)))
+# Sent as Cache-Control max-age; 0 makes clients revalidate with If-None-Match
+RESPONSE_CACHE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", "0"))
+# e.g. redis://cache:6379/0 to share entries and invalidations between replicas
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "")
+
+class InMemoryBackend:
+    """
+    Process-local backend: a size-bounded LRU plus a generation counter.
+
+    Its methods are async only to match `RedisBackend`; none of them wait.
+    """
+
+    def __init__(self, maxsize: int):
+        self._entries = LRUCache(maxsize)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> dict | None:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: dict, ttl: float):
+        self._entries.set(key, value, time.time() + ttl)
+
+    async def generation(self) -> int:
+        return self._generation
+
+    async def bump_generation(self):
+        with self._lock:
+            self._generation += 1
+        # Old keys are unreachable now; free their memory right away
+        self._entries.clear()
+
+class RedisBackend:
+    """
+    Shared backend for multiple replicas (requires the optional `redis` package).
+
+    Uses the asyncio client, so cache round-trips never block the event loop.
+    """
+
+    GENERATION_KEY = "artwork:response_cache:generation"
+
+    def __init__(self, url: str):
+        import redis.asyncio
+        self._redis = redis.asyncio.Redis.from_url(url)
+
+    async def get(self, key: str) -> dict | None:
+        raw = await self._redis.get(key)
+        return json.loads(raw) if raw else None
+
+    async def set(self, key: str, value: dict, ttl: float):
+        await self._redis.set(key, json.dumps(value), ex=max(1, int(ttl)))
+
+    async def generation(self) -> int:
+        return int(await self._redis.get(self.GENERATION_KEY) or 0)
+
+    async def bump_generation(self):
+        await self._redis.incr(self.GENERATION_KEY)
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    # Strong ETags only; a weak validator never matches for GET caching here
+    return "*" in tags or etag in tags
+
+class CacheLookup:
+    """Result of `ResponseCache.lookup`: a ready response, or what `store` needs on a miss."""
+
+    def __init__(self, key: str, generation: int, if_none_match: str | None, response: Response | None = None):
+        self.key = key
+        self.generation = generation
+        self.if_none_match = if_none_match
+        self.response = response
+
+class ResponseCache:
+    """
+    Read-through cache of serialized JSON responses with strong ETags.
+
+    Entries are keyed on the request path, the sorted query string and the
+    current generation. `invalidate` bumps the generation, which makes every
+    existing entry unreachable (on all replicas when the backend is shared).
+    A lookup captures the generation before the handler queries the DB, so a
+    response computed while a write is committing is never stored as fresh.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.bytes_saved = 0
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def _headers(self, etag: str, extra: dict | None = None) -> dict:
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={RESPONSE_CACHE_MAX_AGE}, must-revalidate"}
+        if extra:
+            headers.update(extra)
+        return headers
+
+    def _respond(self, body: bytes, etag: str, extra: dict | None, if_none_match: str | None) -> Response:
+        if _etag_matches(if_none_match, etag):
+            self._count(not_modified=1, bytes_saved=len(body))
+            return Response(status_code=304, headers=self._headers(etag, extra))
+        return Response(content=body, media_type="application/json", headers=self._headers(etag, extra))
+
+    async def lookup(self, request: Request) -> CacheLookup:
+        """
+        Look up the response for a GET request.
+
+        Returns:
+            CacheLookup: `.response` is a 200 or 304 response on a hit, None on a miss.
+        """
+        query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+        generation = await self.backend.generation()
+        key = f"artwork:{generation}:{request.url.path}?{query}"
+        if_none_match = request.headers.get("if-none-match")
+        entry = await self.backend.get(key)
+        if entry is None:
+            self._count(misses=1)
+            return CacheLookup(key, generation, if_none_match)
+        self._count(hits=1)
+        body = entry["body"].encode()
+        return CacheLookup(key, generation, if_none_match,
+                           self._respond(body, entry["etag"], entry["headers"], if_none_match))
+
+    async def store(self, lookup: CacheLookup, payload, headers: dict | None = None) -> Response:
+        """
+        Serialize `payload`, cache it under the lookup's key and build the response.
+
+        `payload` is encoded directly with `serialization.dumps` and never goes
+        through `response_model` validation, so pass plain dicts and lists
+        built from trusted rows.
+
+        Args:
+            lookup (CacheLookup): The miss returned by `lookup`.
+            payload: JSON-serializable response body.
+            headers (dict, optional): Extra headers to cache and send with the body.
+
+        Returns:
+            Response: 200 with the body, or 304 if it matches `If-None-Match`.
+        """
+        body = serialization.dumps(payload)
+        etag = make_etag(body)
+        if len(body) <= RESPONSE_CACHE_MAX_ITEM_BYTES:
+            await self.backend.set(lookup.key, {"body": body.decode(), "etag": etag, "headers": headers or {}}, RESPONSE_CACHE_TTL)
+        return self._respond(body, etag, headers, lookup.if_none_match)
+
+    async def invalidate(self):
+        """Drop every cached response. Call after any write to the catalog."""
+        await self.backend.bump_generation()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "not_modified": self.not_modified,
+            "bytes_saved": self.bytes_saved,
+        }
+
+def _make_backend():
+    if RESPONSE_CACHE_URL.startswith("redis://"):
+        return RedisBackend(RESPONSE_CACHE_URL)
+    return InMemoryBackend(RESPONSE_CACHE_SIZE)
+
+response_cache = ResponseCache(_make_backend())
+
+def _response_cache_metrics():
+    s = response_cache.stats()
+    return [
+        ("response_cache_hits_total", "counter", "Response cache hits", [({}, s["hits"])]),
+        ("response_cache_misses_total", "counter", "Response cache misses", [({}, s["misses"])]),
+        ("response_cache_not_modified_total", "counter", "304 responses served from the cache", [({}, s["not_modified"])]),
+        ("response_cache_bytes_saved_total", "counter", "Body bytes not sent thanks to 304s", [({}, s["bytes_saved"])]),
+    ]
+
+metrics.registry.add_collector(_response_cache_metrics)
@@ -1,30 +1,86 @@
-from fastapi import APIRouter, HTTPException, Depends
+import os
+from typing import Literal
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_, select, tuple_, update
 from sqlalchemy.orm import Session
-import models, schemas, database, auth_utils
-from database import SessionLocal
+import models, schemas, database, bulk, events, search
+from response_cache import response_cache
+from common import auth_utils, export, pagination, streaming
+from common.db import AsyncDB, open_session, run_in_session
+from database import SessionLocal, ReadSessionLocal
 
 router = APIRouter()
+BATCH_MAX_IDS = int(os.getenv("BATCH_MAX_IDS", "1000"))
 
-def get_db():
+def _artwork_json(a: models.Artwork) -> dict:
+    """Serialize a trusted Artwork row to the `ArtworkOut` shape."""
+    return {
+        "id": a.id,
+        "title": a.title,
+        "description": a.description,
+        "price": a.price,
+        "owner": a.owner,
+        "is_sold": bool(a.is_sold),
+    }
+
+# The `ArtworkOut` fields; read routes select these columns rather than whole ORM entities
+_ARTWORK_COLUMNS = [
+    models.Artwork.id, models.Artwork.title, models.Artwork.description,
+    models.Artwork.price, models.Artwork.owner, models.Artwork.is_sold,
+]
+
+async def get_db():
+    """
+    Dependency that provides a database session for async route handlers.
+
+    An `AsyncSession` when `DATABASE_URL` names an asyncio driver, otherwise
+    a sync session behind `ThreadedSession`; do the work with
+    `await db.run_sync(fn, ...)` either way.
+
+    Yields:
+        AsyncDB: A session connected to the configured database.
+    Ensures:
+        The session is closed after use.
     """
-    Dependency that provides a SQLAlchemy database session.
+    db = open_session(SessionLocal)
+    try:
+        yield db
+    finally:
+        await db.close()
+
+async def get_read_db():
+    """
+    Dependency that provides a read-only database session for GET routes.
+
+    Uses the separate read engine when `DB_READ_ENGINE` is enabled and
+    falls back to the primary engine otherwise.
 
     Yields:
-        Session: A SQLAlchemy session connected to the configured database.
+        AsyncDB: A session for read queries.
     Ensures:
         The session is closed after use.
     """
-    db = SessionLocal()
+    db = open_session(ReadSessionLocal)
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
+
+def _create_artwork(db: Session, art: schemas.ArtworkCreate, owner: str) -> dict:
+    new = models.Artwork(title=art.title, description=art.description, price=art.price, owner=owner, is_sold=False)
+    db.add(new)
+    db.flush()
+    events.record(db, events.CREATED, owner, [new.id])
+    out = _artwork_json(new)
+    db.commit()
+    return out
 
 @router.post("/artworks", response_model=schemas.ArtworkOut)
-def create_artwork(
+async def create_artwork(
     art: schemas.ArtworkCreate,
     user: dict = Depends(auth_utils.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncDB = Depends(get_db)
 ):
     """
     Create a new artwork in the system.
@@ -35,7 +91,7 @@ def create_artwork(
     Args:
         art (schemas.ArtworkCreate): Artwork creation payload including title, description, and price.
         user (dict): The authenticated user payload decoded from the token.
-        db (Session): Database session.
+        db (AsyncDB): Database session.
 
     Raises:
         HTTPException: 403 if the authenticated user is not an artist or admin.
@@ -46,37 +102,380 @@ def create_artwork(
     role = user.get("role")
     if role not in ("artist", "admin"):
         raise HTTPException(status_code=403, detail="Only artists/admins can create artworks")
-    owner = user.get("sub")
-    new = models.Artwork(title=art.title, description=art.description, price=art.price, owner=owner)
-    db.add(new)
-    db.commit()
-    db.refresh(new)
+    new = await db.run_sync(_create_artwork, art, user.get("sub"))
+    await response_cache.invalidate()
+    events.hub.wake()
     return new
 
+@router.post(
+    "/artworks/bulk",
+    response_model=schemas.BulkResult,
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/x-ndjson": {"schema": {"type": "string", "description": "One ArtworkCreate object per line"}},
+        "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/ArtworkCreate"}}},
+    }}},
+)
+async def bulk_create_artworks(
+    request: Request,
+    user: dict = Depends(auth_utils.get_current_user),
+    db: AsyncDB = Depends(get_db)
+):
+    """
+    Create many artworks from a streamed NDJSON body or JSON array.
+
+    The body is parsed incrementally as it arrives, each row is validated
+    against `ArtworkCreate`, and valid rows are inserted with one
+    executemany per chunk of `BULK_CHUNK_SIZE` rows, each chunk in its own
+    transaction. Invalid rows are skipped and reported, so one bad row does
+    not reject the whole upload. Only artists and admins may upload; every
+    artwork is owned by the authenticated user.
+
+    Args:
+        request (Request): Incoming request; `Content-Type: application/json`
+            selects the JSON array parser, anything else is read as NDJSON.
+        user (dict): The authenticated user payload decoded from the token.
+        db (AsyncDB): Database session.
+
+    Raises:
+        HTTPException: 403 if the authenticated user is not an artist or admin.
+
+    Returns:
+        schemas.BulkResult: Inserted and failed counts plus per-row errors
+            (1-based row numbers).
+    """
+    if user.get("role") not in ("artist", "admin"):
+        raise HTTPException(status_code=403, detail="Only artists/admins can create artworks")
+    owner = user.get("sub")
+    parser = bulk.make_parser(request.headers.get("content-type"))
+    decoder = bulk.utf8_decoder()
+    result = bulk.BulkResult()
+    chunk: list[tuple[int, dict]] = []
+
+    async def consume(parsed):
+        nonlocal chunk
+        for row, value in parsed:
+            values = bulk.validate_row(row, value, result)
+            if values is not None:
+                chunk.append((row, values))
+            if len(chunk) >= bulk.BULK_CHUNK_SIZE:
+                await db.run_sync(bulk.insert_chunk, chunk, owner, result)
+                events.hub.wake()
+                chunk = []
+
+    try:
+        async for data in request.stream():
+            await consume(parser.feed(decoder.decode(data)))
+        await consume(parser.feed(decoder.decode(b"", final=True)))
+        await consume(parser.close())
+    except ValueError as e:
+        # Unrecoverable syntax error in a JSON array (or invalid UTF-8)
+        result.add_error(result.inserted + result.failed + len(chunk) + 1, str(e))
+    await db.run_sync(bulk.insert_chunk, chunk, owner, result)
+    if result.inserted:
+        await response_cache.invalidate()
+        events.hub.wake()
+    return result.as_dict()
+
+def _fetch_artworks(db: Session, stmt) -> list[dict]:
+    """Run a `select(*_ARTWORK_COLUMNS)` statement and build `ArtworkOut` dicts straight from the tuples."""
+    return [
+        {"id": art_id, "title": title, "description": description, "price": price, "owner": owner,
+         "is_sold": bool(is_sold)}
+        for art_id, title, description, price, owner, is_sold in db.execute(stmt)
+    ]
+
 @router.get("/artworks", response_model=list[schemas.ArtworkOut])
-def list_artworks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def list_artworks(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    sort_by: Literal["id", "price"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+    owner: str | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    is_sold: bool | None = None,
+    title: str | None = None,
+    skip: int = Query(0, ge=0, deprecated=True),
+    db: AsyncDB = Depends(get_read_db)
+):
     """
-    Retrieve a paginated list of artworks.
+    Retrieve a filtered, sorted page of artworks using keyset pagination.
+
+    Pages are keyed on `(sort_by, id)`, so a deep page costs the same index
+    seek as the first one. When more rows remain, the opaque cursor for the
+    next page is returned in the `X-Next-Cursor` response header; pass it
+    back unchanged as `cursor` with the same sort parameters.
+
+    Responses are served from the response cache with a strong `ETag`; a
+    matching `If-None-Match` returns 304 without querying the database.
 
     Args:
-        skip (int, optional): Number of records to skip for pagination. Defaults to 0.
+        request (Request): Incoming request, used as the cache key.
+        cursor (str, optional): Cursor returned by the previous page.
         limit (int, optional): Maximum number of records to return. Defaults to 100.
-        db (Session): Database session.
+        sort_by (str, optional): Sort column, `id` or `price`. Defaults to `id`.
+        order (str, optional): Sort direction, `asc` or `desc`. Defaults to `asc`.
+        owner (str, optional): Only return artworks owned by this username.
+        min_price (float, optional): Only return artworks priced at or above this value.
+        max_price (float, optional): Only return artworks priced at or below this value.
+        is_sold (bool, optional): Only return sold (or unsold) artworks.
+        title (str, optional): Only return artworks whose title starts with this text.
+        skip (int, optional): Deprecated offset pagination, ignored when `cursor` is set.
+        db (AsyncDB): Database session.
+
+    Raises:
+        HTTPException: 400 if the cursor is invalid.
+
+    Returns:
+        list[schemas.ArtworkOut]: A page of artworks matching the filters.
+    """
+    cached = await response_cache.lookup(request)
+    if cached.response is not None:
+        return cached.response
+
+    stmt = select(*_ARTWORK_COLUMNS)
+    if owner is not None:
+        stmt = stmt.where(models.Artwork.owner == owner)
+    if min_price is not None:
+        stmt = stmt.where(models.Artwork.price >= min_price)
+    if max_price is not None:
+        stmt = stmt.where(models.Artwork.price <= max_price)
+    if is_sold is not None:
+        stmt = stmt.where(models.Artwork.is_sold == is_sold)
+    if title:
+        stmt = stmt.where(models.Artwork.title.startswith(title, autoescape=True))
+
+    if sort_by == "price":
+        keyset = (models.Artwork.price, models.Artwork.id)
+    else:
+        keyset = (models.Artwork.id,)
+    if cursor:
+        key, last_id = pagination.decode_cursor(cursor, sort_by, order)
+        bound = (key, last_id) if sort_by == "price" else (last_id,)
+        row, after = tuple_(*keyset), tuple_(*bound)
+        stmt = stmt.where(row > after if order == "asc" else row < after)
+    stmt = stmt.order_by(*(c.desc() if order == "desc" else c for c in keyset))
+    if not cursor and skip:
+        stmt = stmt.offset(skip)
+
+    items = await db.run_sync(_fetch_artworks, stmt.limit(limit + 1))
+    headers = {}
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(
+            sort_by, order, last[sort_by], last["id"]
+        )
+    return await response_cache.store(cached, items, headers)
+
+@router.get("/artworks/export")
+async def export_artworks(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    owner: str | None = None,
+    is_sold: bool | None = None,
+    user: dict = Depends(auth_utils.get_current_user),
+):
+    """
+    Stream artworks as NDJSON or CSV, ordered by ID.
+
+    Rows are read with a server-side cursor in batches of
+    `EXPORT_BATCH_SIZE` and encoded as they are fetched, so memory stays
+    flat however large the catalog is and the first bytes are sent before
+    the query finishes. Admins can export every artwork; artists export
+    their own.
+
+    Args:
+        format (str, optional): `ndjson` or `csv`. Defaults to `ndjson`.
+        gzip (bool, optional): Gzip the body on the fly. Defaults to False.
+        owner (str, optional): Only artworks of this owner (admins only).
+        is_sold (bool, optional): Only sold or unsold artworks.
+        user (dict): The authenticated user payload decoded from the token.
+
+    Raises:
+        HTTPException: 403 if the user is not an artist or admin.
+
+    Returns:
+        StreamingResponse: The export, as an attachment.
+    """
+    role = user.get("role")
+    if role == "artist":
+        owner = user.get("sub")
+    elif role != "admin":
+        raise HTTPException(status_code=403, detail="Only artists/admins can export artworks")
+
+    stmt = select(*_ARTWORK_COLUMNS).order_by(models.Artwork.id)
+    if owner is not None:
+        stmt = stmt.where(models.Artwork.owner == owner)
+    if is_sold is not None:
+        stmt = stmt.where(models.Artwork.is_sold == is_sold)
+    columns = [c.key for c in _ARTWORK_COLUMNS]
+    return export.streaming_export(ReadSessionLocal, [stmt], columns, format, gzip, "artworks")
+
+def _scalars(db: Session, stmt) -> list:
+    return db.execute(stmt).scalars().all()
+
+@router.get("/artworks/ids", response_model=list[int])
+async def list_artwork_ids(owner: str, db: AsyncDB = Depends(get_read_db)):
+    """
+    Retrieve the IDs of every artwork owned by a user.
+
+    Lean variant of `list_artworks` for other services: it reads only the
+    `id` column through the `owner` index and is not paginated, so the
+    cost is proportional to the owner's artworks rather than the catalog.
+
+    Args:
+        owner (str): Username of the artwork owner.
+        db (AsyncDB): Database session.
+
+    Returns:
+        list[int]: IDs of the artworks owned by `owner`.
+    """
+    return await db.run_sync(_scalars, select(models.Artwork.id).where(models.Artwork.owner == owner))
+
+@router.get("/artworks/events", response_model=list[schemas.ArtworkEvent])
+async def artwork_events(
+    after: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=events.EVENTS_PAGE_MAX),
+    db: AsyncDB = Depends(get_read_db)
+):
+    """
+    Pull feed of artwork changes, for services that keep their own copy.
+
+    Every creation (single, bulk, import or seed) appends an
+    `artwork.created` event and every sale an `artwork.sold` event, in the
+    same transaction as the change. Event IDs increase in write order;
+    consumers store the last ID they applied and pass it back as `after`.
+    Under concurrent writers on databases other than SQLite, an ID can
+    become visible after a higher one, so consumers should treat a gap as
+    possibly pending for a little while (the orders projection does). Events
+    may repeat and must be applied idempotently.
+
+    Args:
+        after (int, optional): Return events with a higher ID. Defaults to 0 (from the start).
+        limit (int, optional): Maximum number of events. Defaults to 500.
+        db (AsyncDB): Database session.
+
+    Returns:
+        list[schemas.ArtworkEvent]: Events oldest first; empty when the consumer is caught up.
+    """
+    return await db.run_sync(events.read_feed, after, limit)
+
+@router.get("/artworks/stream", response_class=StreamingResponse, responses=streaming.OPENAPI_RESPONSES)
+async def artwork_stream(
+    owner: str | None = None,
+    last_event_id: int | None = Header(None, alias="Last-Event-ID", ge=0),
+    after: int | None = Query(None, ge=0),
+):
+    """
+    Push catalog changes to the client as Server-Sent Events.
+
+    Sends an `artwork.created` or `artwork.sold` event, with the event ID
+    and the artwork's current state, whenever an artwork is created or
+    sold, so a page can update its listing instead of re-fetching it.
+    Browsers reconnect on their own and send `Last-Event-ID`; the events
+    missed in between are replayed from the feed before live ones. A client
+    that falls too far behind is disconnected and resumes the same way.
+
+    Args:
+        owner (str, optional): Only events for this owner's artworks.
+        last_event_id (int, optional): `Last-Event-ID` header of a reconnecting client.
+        after (int, optional): Resume after this event ID on a first connection,
+            when there is no `Last-Event-ID` yet.
+
+    Raises:
+        HTTPException: 503 if `STREAM_MAX_CONNECTIONS` streams are already open.
+
+    Returns:
+        StreamingResponse: A `text/event-stream` of `schemas.ArtworkStreamEvent` data.
+    """
+    resume = last_event_id if last_event_id is not None else after
+
+    async def backlog(start: int, limit: int) -> list[dict]:
+        return await run_in_session(ReadSessionLocal, events.read_stream, start, limit, owner)
+
+    match = None if owner is None else (lambda e: e["owner"] == owner)
+    return streaming.event_stream(events.hub, match, backlog, resume)
+
+@router.get("/artworks/search", response_model=list[schemas.ArtworkSearchHit])
+async def search_artworks(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncDB = Depends(get_read_db)
+):
+    """
+    Full-text search over artwork titles and descriptions.
+
+    Backed by an SQLite FTS5 index kept in sync by triggers. Every word of
+    `q` is prefix-matched and all words must match. Hits are ranked by bm25
+    (title matches weigh more) and carry `<mark>`-highlighted title and
+    description snippets. Paginate with the cursor from the `X-Next-Cursor`
+    response header.
+
+    Args:
+        response (Response): Outgoing response, used to set the cursor header.
+        q (str): Search text.
+        cursor (str, optional): Cursor returned by the previous page.
+        limit (int, optional): Maximum number of hits to return. Defaults to 20.
+        db (AsyncDB): Database session.
+
+    Raises:
+        HTTPException: 400 if the cursor is invalid.
+        HTTPException: 501 if the database has no full-text index.
 
     Returns:
-        list[schemas.ArtworkOut]: A list of artworks stored in the database.
+        list[schemas.ArtworkSearchHit]: Matching artworks, best match first.
     """
-    items = db.query(models.Artwork).offset(skip).limit(limit).all()
-    return items
+    if not search.is_available():
+        raise HTTPException(status_code=501, detail="Full-text search is not available on this database")
+    rows, next_cursor = await db.run_sync(search.search, q, limit, cursor)
+    if next_cursor:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = next_cursor
+    return rows
+
+@router.post("/artworks/batch_get", response_model=schemas.BatchGetResult)
+async def batch_get_artworks(req: schemas.BatchGetRequest, db: AsyncDB = Depends(get_read_db)):
+    """
+    Retrieve many artworks by ID in a single query.
+
+    Resolves all IDs with one `WHERE id IN (...)` lookup instead of one
+    request per artwork. Items are returned in the order of the first
+    occurrence of each ID in the request.
+
+    Args:
+        req (schemas.BatchGetRequest): The IDs to look up (at most `BATCH_MAX_IDS`).
+        db (AsyncDB): Database session.
+
+    Raises:
+        HTTPException: 400 if more than `BATCH_MAX_IDS` IDs are requested.
+
+    Returns:
+        schemas.BatchGetResult: The artworks found and the IDs that do not exist.
+    """
+    ids = list(dict.fromkeys(req.ids))
+    if len(ids) > BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_IDS} ids per request")
+    rows = await db.run_sync(_fetch_artworks, select(*_ARTWORK_COLUMNS).where(models.Artwork.id.in_(ids))) if ids else []
+    found = {a["id"]: a for a in rows}
+    return {
+        "items": [found[i] for i in ids if i in found],
+        "missing": [i for i in ids if i not in found],
+    }
 
 @router.get("/artworks/{art_id}", response_model=schemas.ArtworkOut)
-def get_art(art_id: int, db: Session = Depends(get_db)):
+async def get_art(art_id: int, request: Request, db: AsyncDB = Depends(get_read_db)):
     """
     Retrieve a single artwork by its ID.
 
+    Served from the response cache with a strong `ETag`, like `list_artworks`.
+
     Args:
         art_id (int): The ID of the artwork to retrieve.
-        db (Session): Database session.
+        request (Request): Incoming request, used as the cache key.
+        db (AsyncDB): Database session.
 
     Raises:
         HTTPException: 404 if the artwork is not found.
@@ -84,41 +483,78 @@ def get_art(art_id: int, db: Session = Depends(get_db)):
     Returns:
         schemas.ArtworkOut: The artwork record.
     """
-    item = db.query(models.Artwork).filter(models.Artwork.id == art_id).first()
-    if not item:
+    cached = await response_cache.lookup(request)
+    if cached.response is not None:
+        return cached.response
+    items = await db.run_sync(_fetch_artworks, select(*_ARTWORK_COLUMNS).where(models.Artwork.id == art_id))
+    if not items:
         raise HTTPException(status_code=404, detail="Artwork not found")
-    return item
+    return await response_cache.store(cached, items[0])
+
+def _mark_sold(db: Session, art_id: int, ref: str | None) -> dict:
+    available = models.Artwork.is_sold.is_not(True)
+    if ref is not None:
+        available = or_(available, models.Artwork.sold_ref == ref)
+    stmt = (
+        update(models.Artwork)
+        .where(models.Artwork.id == art_id, available)
+        .values(is_sold=True, sold_ref=ref)
+        .returning(models.Artwork)
+    )
+    art = db.execute(stmt).scalar_one_or_none()
+    out = _artwork_json(art) if art is not None else None
+    if out is not None:
+        # An idempotent repeat emits the event again; consumers apply it as a no-op
+        events.record(db, events.SOLD, out["owner"], [art_id])
+    db.commit()
+    if out is None:
+        # Only the failure path pays for a second lookup to pick the right error
+        exists = db.query(models.Artwork.id).filter(models.Artwork.id == art_id).first()
+        if not exists:
+            raise HTTPException(status_code=404, detail="Artwork not found")
+        raise HTTPException(status_code=400, detail="Artwork already sold")
+    return out
 
 @router.post("/artworks/{art_id}/mark_sold", response_model=schemas.ArtworkOut)
-def mark_sold(
+async def mark_sold(
     art_id: int,
+    ref: str | None = None,
     user: dict = Depends(auth_utils.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncDB = Depends(get_db)
 ):
     """
     Mark an artwork as sold.
 
-    Any authenticated user may perform this operation (demo logic).
-    In production, this should be restricted to authorized roles or services.
+    Only callers with role `service` (the orders service reserving an
+    ordered artwork, with a token from `/auth/service_token`) or `admin`
+    may perform this operation.
+
+    The check and the write happen in a single conditional
+    `UPDATE ... WHERE id = ? AND is_sold = 0 RETURNING ...` statement, so
+    concurrent buyers cannot both succeed and no read lock is held
+    between a check and the write.
+
+    Passing `ref` makes the call idempotent: the sale is recorded with that
+    reference, and repeating the call with the same `ref` succeeds again
+    instead of reporting the artwork as already sold.
 
     Args:
         art_id (int): The ID of the artwork to mark as sold.
+        ref (str, optional): Caller reference for the sale (e.g. `order:42`).
         user (dict): The authenticated user payload decoded from the token.
-        db (Session): Database session.
+        db (AsyncDB): Database session.
 
     Raises:
+        HTTPException: 403 if the caller is not a service or an admin.
         HTTPException: 404 if the artwork is not found.
         HTTPException: 400 if the artwork is already sold.
 
     Returns:
         schemas.ArtworkOut: The updated artwork record with `is_sold=True`.
     """
-    art = db.query(models.Artwork).filter(models.Artwork.id == art_id).first()
-    if not art:
-        raise HTTPException(status_code=404, detail="Artwork not found")
-    if art.is_sold:
-        raise HTTPException(status_code=400, detail="Artwork already sold")
-    art.is_sold = True
-    db.commit()
-    db.refresh(art)
+    if user.get("role") not in ("service", "admin"):
+        raise HTTPException(status_code=403, detail="Only services or admins can mark artworks as sold")
+    art = await db.run_sync(_mark_sold, art_id, ref)
+    await response_cache.invalidate()
+    events.hub.wake()
     return art
@@ -15,3 +15,33 @@ class ArtworkOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+class ArtworkSearchHit(ArtworkOut):
+    rank: float
+    title_highlight: str
+    snippet: str | None
+
+class BatchGetRequest(BaseModel):
+    ids: list[int]
+
+class BatchGetResult(BaseModel):
+    items: list[ArtworkOut]
+    missing: list[int]
+
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+class BulkResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: list[BulkRowError]
+
+class ArtworkEvent(BaseModel):
+    id: int
+    type: str
+    art_id: int
+    owner: str
+
+class ArtworkStreamEvent(ArtworkEvent):
+    artwork: ArtworkOut
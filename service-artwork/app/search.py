@@ -0,0 +1,143 @@
+# run: docker compose run --rm artwork python search.py rebuild
+import argparse
+import re
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from common import pagination
+
+# External-content FTS5 index over artworks(title, description); rowid is artworks.id
+FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS artworks_fts USING fts5(
+        title, description, content='artworks', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS artworks_fts_ai AFTER INSERT ON artworks BEGIN
+        INSERT INTO artworks_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS artworks_fts_ad AFTER DELETE ON artworks BEGIN
+        INSERT INTO artworks_fts(artworks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    # Only text changes touch the index; mark_sold updates skip it entirely
+    """CREATE TRIGGER IF NOT EXISTS artworks_fts_au AFTER UPDATE OF title, description ON artworks BEGIN
+        INSERT INTO artworks_fts(artworks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO artworks_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+# Title matches weigh more than description matches
+SEARCH_SQL = """
+SELECT * FROM (
+    SELECT a.id, a.title, a.description, a.price, a.owner, a.is_sold,
+           bm25(artworks_fts, 10.0, 1.0) AS rank,
+           highlight(artworks_fts, 0, '<mark>', '</mark>') AS title_highlight,
+           snippet(artworks_fts, 1, '<mark>', '</mark>', '…', 12) AS snippet
+    FROM artworks_fts JOIN artworks a ON a.id = artworks_fts.rowid
+    WHERE artworks_fts MATCH :match
+)
+{where}
+ORDER BY rank, id
+LIMIT :limit
+"""
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_available: bool | None = None
+
+def is_available() -> bool:
+    """Whether the FTS index was set up (SQLite built with FTS5)."""
+    return bool(_available)
+
+def setup(engine: Engine):
+    """
+    Create the FTS5 table and sync triggers if they do not exist.
+
+    When the index is created for a database that already holds artworks
+    it is rebuilt from the `artworks` table. Non-SQLite databases and SQLite
+    builds without FTS5 are left alone and search reports unavailable.
+
+    Args:
+        engine (Engine): Engine of the artwork database.
+    """
+    global _available
+    if engine.dialect.name != "sqlite":
+        _available = False
+        return
+    with engine.begin() as conn:
+        existed = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'artworks_fts'")).first()
+        try:
+            for ddl in FTS_DDL:
+                conn.exec_driver_sql(ddl)
+        except Exception:
+            _available = False
+            return
+        if not existed:
+            conn.exec_driver_sql("INSERT INTO artworks_fts(artworks_fts) VALUES ('rebuild')")
+    _available = True
+
+def rebuild(engine: Engine):
+    """Rebuild the whole FTS index from the `artworks` table and optimize it."""
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO artworks_fts(artworks_fts) VALUES ('rebuild')")
+        conn.exec_driver_sql("INSERT INTO artworks_fts(artworks_fts) VALUES ('optimize')")
+
+def build_match(q: str) -> str:
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Every word is quoted (so FTS5 operators in user input are inert) and
+    prefix-matched, and all words must match: `sun set` -> `"sun"* "set"*`.
+
+    Returns:
+        str: The MATCH expression, empty if `q` contains no words.
+    """
+    return " ".join(f'"{tok}"*' for tok in _TOKEN.findall(q))
+
+def search(db: Session, q: str, limit: int, cursor: str | None = None) -> tuple[list, str | None]:
+    """
+    Run a ranked full-text search with keyset pagination on `(rank, id)`.
+
+    Args:
+        db (Session): Database session.
+        q (str): Free-text query.
+        limit (int): Maximum number of hits to return.
+        cursor (str, optional): Cursor returned with the previous page.
+
+    Raises:
+        HTTPException: 400 if the cursor is invalid.
+
+    Returns:
+        tuple[list, str | None]: Result rows (best first) and the cursor for
+            the next page, or None when there are no more hits.
+    """
+    match = build_match(q)
+    if not match:
+        return [], None
+    params = {"match": match, "limit": limit + 1}
+    where = ""
+    if cursor:
+        params["k"], params["last_id"] = pagination.decode_cursor(cursor, "rank", "asc")
+        where = "WHERE rank > :k OR (rank = :k AND id > :last_id)"
+    rows = db.execute(text(SEARCH_SQL.format(where=where)), params).mappings().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = pagination.encode_cursor("rank", "asc", rows[-1]["rank"], rows[-1]["id"])
+    return rows, next_cursor
+
+def _rebuild_cli(engine: Engine):
+    import models
+    models.Base.metadata.create_all(bind=engine)
+    setup(engine)
+    if not is_available():
+        raise SystemExit("FTS5 is not available for this database")
+    rebuild(engine)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Maintain the artwork full-text search index.")
+    ap.add_argument("command", choices=["rebuild"])
+    ap.parse_args()
+    from database import engine
+    from common.db import run_offline
+    run_offline(engine, _rebuild_cli)
+    print("Search index rebuilt.")
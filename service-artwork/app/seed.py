@@ -1,10 +1,5 @@
 # run: docker compose run --rm artwork python app/seed.py
-from database import SessionLocal, engine
-import models
-
-
-models.Base.metadata.create_all(bind=engine)
-db = SessionLocal()
+# The catalog is plain data so benchmarks/suite.py can reuse it without a database
 
 sample = [
     # ---- Vincent Van Gogh ----
@@ -39,16 +34,33 @@ sample = [
 ]
 
 
-for s in sample:
-    existing = db.query(models.Artwork).filter(models.Artwork.title == s["title"]).first()
-    if existing:
-        print(f"Artwork {s['title']} exists, skipping")
-        continue
-    a = models.Artwork(title=s["title"], description=s["description"], price=s["price"], owner=s["owner"])
-    db.add(a)
-    db.commit()
-    db.refresh(a)
-    print(f"Seeded artwork id={a.id} title={a.title}")
+def _seed(engine):
+    from sqlalchemy.orm import Session
+    import models, events
+
+    models.Base.metadata.create_all(bind=engine)
+    db = Session(bind=engine)
+    for s in sample:
+        existing = db.query(models.Artwork).filter(models.Artwork.title == s["title"]).first()
+        if existing:
+            print(f"Artwork {s['title']} exists, skipping")
+            continue
+        a = models.Artwork(title=s["title"], description=s["description"], price=s["price"], owner=s["owner"])
+        db.add(a)
+        db.flush()
+        events.record(db, events.CREATED, a.owner, [a.id])
+        db.commit()
+        db.refresh(a)
+        print(f"Seeded artwork id={a.id} title={a.title}")
+
+    db.close()
+    print("Artwork seeding complete.")
+
+def seed():
+    from database import engine
+    from common.db import run_offline
+
+    run_offline(engine, _seed)
 
-db.close()
-print("Artwork seeding complete.")
+if __name__ == "__main__":
+    seed()
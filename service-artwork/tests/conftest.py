@@ -0,0 +1,38 @@
+import os
+import sys
+import tempfile
+import uuid
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The service imports its modules flat from app/, and shared code from common/
+sys.path[:0] = [os.path.join(ROOT, "service-artwork", "app"), ROOT]
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/artwork.db")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as c:
+        yield c
+
+@pytest.fixture
+def add_artworks(client):
+    """Insert artworks for a fresh owner, so tests can scope listings with `owner=`."""
+    import models
+    from database import SessionLocal
+    from response_cache import response_cache
+
+    def add(prices: list[float], owner: str | None = None) -> str:
+        owner = owner or f"artist-{uuid.uuid4().hex[:8]}"
+        with SessionLocal() as db:
+            db.add_all(models.Artwork(title=f"art {i}", price=p, owner=owner) for i, p in enumerate(prices))
+            db.commit()
+        # Writes through the routes invalidate the cache; mirror that for rows inserted directly
+        client.portal.call(response_cache.invalidate)
+        return owner
+
+    return add
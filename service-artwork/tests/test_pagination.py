@@ -0,0 +1,42 @@
+import pytest
+from common import pagination
+
+PRICES = [5.0, 1.0, 3.0, 3.0, 2.0, 3.0, 5.0, 1.0, 4.0, 3.0]
+
+def walk(client, limit, **params):
+    """Follow `X-Next-Cursor` to the last page; returns every page's IDs and the rows in order."""
+    rows, pages, cursor = [], [], None
+    while True:
+        resp = client.get("/artworks", params={**params, "limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert resp.status_code == 200
+        pages.append([a["id"] for a in resp.json()])
+        rows += resp.json()
+        cursor = resp.headers.get(pagination.NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages, rows
+
+@pytest.mark.parametrize("sort_by, order", [("id", "asc"), ("id", "desc"), ("price", "asc"), ("price", "desc")])
+@pytest.mark.parametrize("limit", [1, 3, 4, 10])
+def test_pages_cover_every_row_once_in_order(client, add_artworks, sort_by, order, limit):
+    owner = add_artworks(PRICES)
+    full = client.get("/artworks", params={"owner": owner, "sort_by": sort_by, "order": order, "limit": 100}).json()
+    pages, rows = walk(client, limit, owner=owner, sort_by=sort_by, order=order)
+    assert rows == full
+    assert len({a["id"] for a in rows}) == len(PRICES)
+    assert all(len(p) == limit for p in pages[:-1]) and 0 < len(pages[-1]) <= limit
+    # Ties on price are broken by ID in the same direction
+    key = (lambda a: (a["price"], a["id"])) if sort_by == "price" else (lambda a: a["id"])
+    assert rows == sorted(rows, key=key, reverse=order == "desc")
+
+def test_filters_apply_on_every_page(client, add_artworks):
+    owner = add_artworks(PRICES)
+    _, rows = walk(client, 2, owner=owner, sort_by="price", min_price=2, max_price=4)
+    assert [a["price"] for a in rows] == [2.0, 3.0, 3.0, 3.0, 3.0, 4.0]
+
+def test_cursor_for_another_sort_is_rejected(client, add_artworks):
+    owner = add_artworks(PRICES)
+    cursor = client.get("/artworks", params={"owner": owner, "sort_by": "price", "limit": 2}).headers[
+        pagination.NEXT_CURSOR_HEADER]
+    resp = client.get("/artworks", params={"owner": owner, "sort_by": "price", "order": "desc", "cursor": cursor})
+    assert resp.status_code == 400
+    assert client.get("/artworks", params={"cursor": "not-a-cursor"}).status_code == 400
@@ -0,0 +1,61 @@
+import pytest
+import response_cache
+from response_cache import response_cache as cache
+
+def test_get_returns_strong_etag(client, add_artworks):
+    owner = add_artworks([1.0, 2.0])
+    resp = client.get("/artworks", params={"owner": owner})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] == response_cache.make_etag(resp.content)
+    assert "must-revalidate" in resp.headers["cache-control"]
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_matching_if_none_match_returns_304(client, add_artworks, cached):
+    owner = add_artworks([1.0, 2.0])
+    etag = client.get("/artworks", params={"owner": owner}).headers["etag"]
+    if not cached:
+        # Served on a miss too: store() compares the freshly built body's ETag
+        client.portal.call(cache.invalidate)
+    before = cache.stats()["not_modified"]
+    resp = client.get("/artworks", params={"owner": owner}, headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["etag"] == etag
+    assert cache.stats()["not_modified"] == before + 1
+
+def test_stale_etag_gets_the_new_body(client, add_artworks):
+    owner = add_artworks([1.0])
+    etag = client.get("/artworks", params={"owner": owner}).headers["etag"]
+    add_artworks([2.0], owner=owner)
+    resp = client.get("/artworks", params={"owner": owner}, headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert len(resp.json()) == 2
+    assert resp.headers["etag"] != etag
+
+def test_invalidate_drops_cached_pages(client, add_artworks):
+    owner = add_artworks([1.0])
+    first = client.get("/artworks", params={"owner": owner})
+    hits = cache.stats()["hits"]
+    assert client.get("/artworks", params={"owner": owner}).headers["etag"] == first.headers["etag"]
+    assert cache.stats()["hits"] == hits + 1
+    client.portal.call(cache.invalidate)
+    client.get("/artworks", params={"owner": owner})
+    assert cache.stats()["hits"] == hits + 1
+
+def test_query_order_does_not_split_entries(client, add_artworks):
+    owner = add_artworks([1.0, 2.0])
+    client.get("/artworks", params={"owner": owner, "sort_by": "price"})
+    hits = cache.stats()["hits"]
+    client.get(f"/artworks?sort_by=price&owner={owner}")
+    assert cache.stats()["hits"] == hits + 1
+
+@pytest.mark.parametrize("header, matches", [
+    (None, False),
+    ('"abc"', True),
+    ('"x", "abc"', True),
+    ("*", True),
+    ('W/"abc"', False),
+    ('"abcd"', False),
+])
+def test_etag_matching(header, matches):
+    assert response_cache._etag_matches(header, '"abc"') is matches
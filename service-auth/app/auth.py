@@ -1,10 +1,21 @@
+import hmac
 import os
 from datetime import datetime, timedelta
 import jwt
+import keys
+from common import jwks
 
 SECRET_KEY = os.getenv("SECRET_KEY", "supersecret_demo_key_change_me")
-ALGORITHM = "HS256"
+# RS256, ES256 or EdDSA sign with rotating keys published at /auth/jwks.json;
+# HS256 signs with SECRET_KEY, which every verifying service then needs as well
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "EdDSA")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+# Services that may obtain tokens at /auth/service_token, as comma-separated `client_id:secret` pairs
+SERVICE_CLIENTS = dict(
+    pair.strip().split(":", 1) for pair in os.getenv("SERVICE_CLIENTS", "").split(",") if ":" in pair)
+SERVICE_TOKEN_EXPIRE_MINUTES = int(os.getenv("SERVICE_TOKEN_EXPIRE_MINUTES", "10"))
+
+ring = keys.KeyRing(JWT_ALGORITHM, max(ACCESS_TOKEN_EXPIRE_MINUTES, SERVICE_TOKEN_EXPIRE_MINUTES) * 60)
 
 def create_access_token(subject: str, data: dict | None = None, expires_delta: timedelta | None = None):
     to_encode = {"sub": subject}
@@ -12,14 +23,14 @@ def create_access_token(subject: str, data: dict | None = None, expires_delta: t
         to_encode.update(data)
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
-    token = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return token
+    if JWT_ALGORITHM == "HS256":
+        return jwt.encode(to_encode, SECRET_KEY, algorithm=JWT_ALGORITHM)
+    return ring.sign(to_encode)
+
+def authenticate_client(client_id: str, client_secret: str) -> bool:
+    """Check a service's credentials against `SERVICE_CLIENTS`, in constant time."""
+    expected = SERVICE_CLIENTS.get(client_id)
+    return bool(expected) and hmac.compare_digest(expected.encode(), client_secret.encode())
 
 def decode_token(token: str) -> dict:
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except jwt.ExpiredSignatureError:
-        raise
-    except Exception:
-        raise
+    return jwks.decode(token, ring.public_keys, SECRET_KEY if JWT_ALGORITHM == "HS256" else "")
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+import models
+from common import jwks, metrics
+from common.db import run_in_session
+from common.serialization import dumps
+from database import SessionLocal
+
+# How long each key signs tokens before the next one takes over
+JWT_KEY_ROTATION_HOURS = float(os.getenv("JWT_KEY_ROTATION_HOURS", "24"))
+# How long the next key is published before it signs anything; must exceed the verifiers' JWKS_REFRESH_INTERVAL
+JWT_KEY_PUBLISH_AHEAD = float(os.getenv("JWT_KEY_PUBLISH_AHEAD", "900"))
+JWT_RSA_KEY_SIZE = int(os.getenv("JWT_RSA_KEY_SIZE", "2048"))
+# How often the key table is checked for due rotations and keys written by other replicas
+JWT_KEY_CHECK_INTERVAL = float(os.getenv("JWT_KEY_CHECK_INTERVAL", "60"))
+# Cache-Control max-age of the published key set
+JWKS_MAX_AGE = int(os.getenv("JWKS_MAX_AGE", "300"))
+# Retired keys stay published this much longer than the last token they signed can live, for clock skew
+RETIRED_KEY_GRACE = 60
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256", "EdDSA")
+
+logger = logging.getLogger("auth.keys")
+
+_rotations = metrics.registry.counter("jwt_signing_keys_created_total", "Token signing keys generated")
+_published = metrics.registry.gauge("jwt_signing_keys_published", "Keys in the published key set")
+
+def generate_key(algorithm: str):
+    """Generate a private key for `algorithm`: RSA 2048 (`JWT_RSA_KEY_SIZE`), P-256 or Ed25519."""
+    if algorithm == "RS256":
+        return rsa.generate_private_key(public_exponent=65537, key_size=JWT_RSA_KEY_SIZE)
+    if algorithm == "ES256":
+        return ec.generate_private_key(ec.SECP256R1())
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    raise ValueError(f"Unsupported token signing algorithm {algorithm!r}")
+
+def public_jwk(algorithm: str, private_key, kid: str) -> dict:
+    """The public half of `private_key` as a JWK carrying its `kid` and `alg`."""
+    jwk = jwt.get_algorithm_by_name(algorithm).to_jwk(private_key.public_key(), as_dict=True)
+    return {**jwk, "kid": kid, "alg": algorithm, "use": "sig"}
+
+class KeyRing:
+    """
+    The auth service's token signing keys, stored in the `signing_keys` table.
+
+    Each key signs tokens for `JWT_KEY_ROTATION_HOURS`. Its successor is
+    generated and published `JWT_KEY_PUBLISH_AHEAD` seconds before it takes
+    over, so verifiers refreshing their cached key set on schedule know it
+    before the first token it signs arrives. A retired key stays published
+    until every token it signed has expired, then it is deleted. Replicas
+    share the table, so they publish and sign with the same keys; the
+    background task re-reads it every `JWT_KEY_CHECK_INTERVAL` seconds.
+
+    Args:
+        algorithm (str): `RS256`, `ES256` or `EdDSA`. With anything else
+            (HS256) no keys are generated, and existing ones are only kept
+            published until they expire.
+        token_lifetime (float): Seconds an access token is valid for.
+    """
+
+    def __init__(self, algorithm: str, token_lifetime: float):
+        self.algorithm = algorithm
+        self.token_lifetime = token_lifetime
+        self.public_keys: dict[str, jwt.PyJWK] = {}
+        # Body of GET /auth/jwks.json, encoded once per refresh
+        self.jwks = dumps({"keys": []})
+        # (activates_at, kid, private key) of this algorithm's keys, oldest first
+        self._signers: list[tuple[float, str, object]] = []
+        self._private: dict[str, object] = {}
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _create(self, db: Session, activates_at: float) -> models.SigningKey:
+        private_key = generate_key(self.algorithm)
+        kid = uuid.uuid4().hex
+        row = models.SigningKey(
+            kid=kid,
+            algorithm=self.algorithm,
+            private_key=private_key.private_bytes(
+                serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+            ).decode(),
+            public_jwk=json.dumps(public_jwk(self.algorithm, private_key, kid)),
+            activates_at=activates_at,
+            retires_at=activates_at + JWT_KEY_ROTATION_HOURS * 3600,
+        )
+        db.add(row)
+        self._private[kid] = private_key
+        _rotations.inc()
+        logger.info("Generated %s signing key %s, active from %s", self.algorithm, kid, activates_at)
+        return row
+
+    def refresh(self, db: Session):
+        """
+        Delete expired keys, generate the current or next key when due and
+        reload the published key set.
+
+        Args:
+            db (Session): Database session.
+        """
+        now = time.time()
+        db.execute(delete(models.SigningKey).where(
+            models.SigningKey.retires_at < now - self.token_lifetime - RETIRED_KEY_GRACE))
+        rows = list(db.execute(select(models.SigningKey)).scalars())
+        if self.algorithm in ASYMMETRIC_ALGORITHMS:
+            own = [r for r in rows if r.algorithm == self.algorithm]
+            if not any(r.activates_at <= now < r.retires_at for r in own):
+                own.append(self._create(db, now))
+            latest = max(own, key=lambda r: r.retires_at)
+            if latest.retires_at - now < JWT_KEY_PUBLISH_AHEAD:
+                own.append(self._create(db, latest.retires_at))
+            rows = list({r.kid: r for r in rows + own}.values())
+            self._signers = sorted(
+                (r.activates_at, r.kid, self._private_key(r)) for r in own if r.retires_at > now)
+        db.commit()
+        jwk_dicts = [json.loads(r.public_jwk) for r in rows]
+        self.public_keys = jwks.parse({"keys": jwk_dicts})
+        self.jwks = dumps({"keys": jwk_dicts})
+        # Auth's rate limiter verifies tokens through common.auth_utils; it gets the keys from here, not over HTTP
+        jwks.cache.replace(self.public_keys)
+        self._private = {kid: key for _, kid, key in self._signers}
+        _published.set(len(jwk_dicts))
+
+    def _private_key(self, row: models.SigningKey):
+        key = self._private.get(row.kid)
+        if key is None:
+            key = self._private[row.kid] = serialization.load_pem_private_key(row.private_key.encode(), None)
+        return key
+
+    def sign(self, payload: dict) -> str:
+        """
+        Sign `payload` with the key active now, naming it in the `kid` header.
+
+        Raises:
+            RuntimeError: If no key has been loaded yet.
+        """
+        now = time.time()
+        signer = next((s for s in reversed(self._signers) if s[0] <= now), None)
+        if signer is None:
+            raise RuntimeError("No token signing key loaded")
+        _, kid, key = signer
+        return jwt.encode(payload, key, algorithm=self.algorithm, headers={"kid": kid})
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(JWT_KEY_CHECK_INTERVAL)
+            try:
+                await run_in_session(SessionLocal, self.refresh)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Signing goes on with the loaded keys; the next key was published well ahead
+                logger.exception("Refreshing signing keys failed")
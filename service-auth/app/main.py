@@ -1,19 +1,37 @@
 import os
-from fastapi import FastAPI, HTTPException, Depends, status
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from fastapi import FastAPI, HTTPException, Depends, Form, Request, status
+from fastapi.responses import JSONResponse, Response
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-import models, schemas, database, auth, utils
-from database import SessionLocal, engine
+import models, schemas, database, auth, keys, utils
+from database import SessionLocal, ReadSessionLocal, engine, read_engine
+from common import metrics, ratelimit, tracing
+from common.db import AsyncDB, dispose_engines, open_session, run_in_session, run_with_engine
 from dotenv import load_dotenv
 
 load_dotenv()
 
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_with_engine(engine, models.Base.metadata.create_all)
+    # Load or generate the token signing keys, then keep rotating them
+    await run_in_session(SessionLocal, auth.ring.refresh)
+    auth.ring.start()
+    yield
+    await auth.ring.stop()
+    utils.shutdown_pool()
+    await dispose_engines(engine, read_engine)
 
-app = FastAPI(title="Auth Service")
+app = FastAPI(title="Auth Service", lifespan=lifespan)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
+# Per-client token buckets and load shedding; innermost, so rejections still get CORS and metrics
+ratelimit.instrument(app, "auth")
+
 # CORS - allow UI
 app.add_middleware(
     CORSMiddleware,
@@ -23,75 +41,182 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def get_db():
+# Per-route request counts, latency histograms and in-flight gauges on /metrics
+metrics.instrument(app)
+# W3C traceparent propagation; recent traces on /debug/traces with TRACE_DEBUG_ENDPOINT
+tracing.instrument(app, "auth")
+
+@app.exception_handler(utils.HashPoolBusy)
+async def hash_pool_busy_handler(request: Request, exc: utils.HashPoolBusy):
+    """
+    Shed password hashing load instead of letting latency grow without bound.
+
+    Returns:
+        JSONResponse: 503 with a `Retry-After` header.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many concurrent password operations, retry later"},
+        headers={"Retry-After": str(utils.HASH_RETRY_AFTER)},
+    )
+
+async def get_db():
     """
-    Dependency that provides a SQLAlchemy session for database operations.
+    Dependency that provides a database session for async route handlers.
+
+    An `AsyncSession` when `DATABASE_URL` names an asyncio driver, otherwise
+    a sync session behind `ThreadedSession`; do the work with
+    `await db.run_sync(fn, ...)` either way.
 
     Yields:
-        Session: Active SQLAlchemy database session.
+        AsyncDB: Active database session.
     Ensures:
         The session is closed once the request is complete.
     """
-    db = SessionLocal()
+    db = open_session(SessionLocal)
+    try:
+        yield db
+    finally:
+        await db.close()
+
+async def get_read_db():
+    """
+    Dependency that provides a read-only database session for GET routes.
+
+    Uses the separate read engine when `DB_READ_ENGINE` is enabled and
+    falls back to the primary engine otherwise.
+
+    Yields:
+        AsyncDB: A database session for read queries.
+    Ensures:
+        The session is closed after use.
+    """
+    db = open_session(ReadSessionLocal)
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
+
+def _find_user(db: Session, username: str) -> tuple | None:
+    user = db.query(models.User).filter(models.User.username == username).first()
+    return (user.id, user.username, user.role, user.hashed_password) if user else None
+
+def _create_user(db: Session, username: str, hashed: str, role: str) -> dict:
+    user = models.User(username=username, hashed_password=hashed, role=role)
+    db.add(user)
+    db.flush()
+    out = {"id": user.id, "username": user.username, "role": user.role}
+    db.commit()
+    return out
+
+def _update_hash(db: Session, user_id: int, new_hash: str):
+    db.query(models.User).filter(models.User.id == user_id).update({"hashed_password": new_hash})
+    db.commit()
 
 @app.post("/auth/register", response_model=schemas.UserOut)
-def register(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register(user_in: schemas.UserCreate, db: AsyncDB = Depends(get_db)):
     """
     Register a new user.
 
     Checks whether the username is already taken. If available, hashes
-    the provided password and creates a new user record in the database.
+    the provided password on the dedicated hashing pool and creates a new
+    user record in the database.
 
     Args:
         user_in (schemas.UserCreate): The incoming user registration data (username, password, role).
-        db (Session): Database session dependency.
+        db (AsyncDB): Database session dependency.
 
     Raises:
         HTTPException: 400 if the username is already registered.
+        utils.HashPoolBusy: Turned into 503 when the hashing queue is full.
 
     Returns:
         schemas.UserOut: The newly created user record (without password).
     """
-    existing = db.query(models.User).filter(models.User.username == user_in.username).first()
-    if existing:
+    if await db.run_sync(_find_user, user_in.username):
+        raise HTTPException(status_code=400, detail="Username already registered")
+    # Hand the connection back to the pool while waiting on the hashing pool
+    await db.rollback()
+    hashed = await utils.hash_password_async(user_in.password)
+    try:
+        return await db.run_sync(_create_user, user_in.username, hashed, user_in.role or "user")
+    except IntegrityError:
+        # A concurrent registration took the name while the password was hashing
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Username already registered")
-    hashed = utils.hash_password(user_in.password)
-    user = models.User(username=user_in.username, hashed_password=hashed, role=user_in.role or "user")
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
 
 @app.post("/auth/token", response_model=schemas.Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncDB = Depends(get_db)):
     """
     Authenticate a user and return an access token.
 
     Validates the provided username and password against the database.
     If valid, issues a JWT access token containing the username and role.
+    Password verification runs on the dedicated hashing pool, and a stored
+    hash that uses an outdated cost factor is replaced on success.
 
     Args:
         form_data (OAuth2PasswordRequestForm): OAuth2 form containing username and password.
-        db (Session): Database session dependency.
+        db (AsyncDB): Database session dependency.
 
     Raises:
         HTTPException: 401 if the username or password is incorrect.
+        utils.HashPoolBusy: Turned into 503 when the hashing queue is full.
 
     Returns:
         schemas.Token: Access token and token type.
     """
-    user = db.query(models.User).filter(models.User.username == form_data.username).first()
-    if not user or not utils.verify_password(form_data.password, user.hashed_password):
+    user = await db.run_sync(_find_user, form_data.username)
+    if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
-    token = auth.create_access_token(subject=user.username, data={"role": user.role})
+    user_id, username, role, stored_hash = user
+    # Hand the connection back to the pool while waiting on the hashing pool
+    await db.rollback()
+    valid, new_hash = await utils.verify_and_rehash_async(form_data.password, stored_hash)
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if new_hash:
+        await db.run_sync(_update_hash, user_id, new_hash)
+    token = auth.create_access_token(subject=username, data={"role": role})
     return {"access_token": token, "token_type": "bearer"}
 
+@app.post("/auth/service_token", response_model=schemas.ServiceToken)
+async def service_token(
+    grant_type: str = Form(...),
+    client_id: str = Form(...),
+    client_secret: str = Form(...),
+):
+    """
+    Issue a short-lived token to another service (OAuth2 client credentials grant).
+
+    Services act on their own behalf with these tokens instead of holding
+    on to a user's, e.g. the orders worker reserving artworks. Clients are
+    configured in `SERVICE_CLIENTS`; the token's subject is
+    `service:<client_id>` and its role `service`.
+
+    Args:
+        grant_type (str): Must be `client_credentials`.
+        client_id (str): The calling service's client ID.
+        client_secret (str): The calling service's secret.
+
+    Raises:
+        HTTPException: 400 for any other grant type.
+        HTTPException: 401 if the client is unknown or the secret is wrong.
+
+    Returns:
+        schemas.ServiceToken: Access token, token type and lifetime in seconds.
+    """
+    if grant_type != "client_credentials":
+        raise HTTPException(status_code=400, detail="Unsupported grant type")
+    if not auth.authenticate_client(client_id, client_secret):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid client credentials")
+    lifetime = auth.SERVICE_TOKEN_EXPIRE_MINUTES * 60
+    token = auth.create_access_token(subject=f"service:{client_id}", data={"role": "service"},
+                                     expires_delta=timedelta(seconds=lifetime))
+    return {"access_token": token, "token_type": "bearer", "expires_in": lifetime}
+
 @app.get("/auth/me", response_model=schemas.UserOut)
-def read_me(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def read_me(token: str = Depends(oauth2_scheme), db: AsyncDB = Depends(get_read_db)):
     """
     Retrieve the currently authenticated user's profile.
 
@@ -100,7 +225,7 @@ def read_me(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
 
     Args:
         token (str): Bearer token extracted from the Authorization header.
-        db (Session): Database session dependency.
+        db (AsyncDB): Database session dependency.
 
     Raises:
         HTTPException: 401 if the token is invalid or expired.
@@ -113,19 +238,35 @@ def read_me(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
         payload = auth.decode_token(token)
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
-    username = payload.get("sub")
-    user = db.query(models.User).filter(models.User.username == username).first()
+    user = await db.run_sync(_find_user, payload.get("sub"))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return {"id": user[0], "username": user[1], "role": user[2]}
+
+@app.get("/auth/jwks.json")
+async def jwks():
+    """
+    Publish the public keys that verify access tokens, as a JWK Set (RFC 7517).
+
+    Services fetch it in the background and verify tokens locally by their
+    `kid`. Holds the key signing now, its pre-published successor and
+    retired keys whose tokens may not have expired yet.
+
+    Returns:
+        Response: `{"keys": [...]}`, cacheable for `JWKS_MAX_AGE` seconds.
+    """
+    return Response(auth.ring.jwks, media_type="application/json",
+                    headers={"Cache-Control": f"public, max-age={keys.JWKS_MAX_AGE}"})
 
-@app.get("/auth/verify")
+@app.get("/auth/verify", deprecated=True)
 def verify(token: str):
     """
     Verify the validity of a token and return its claims.
 
     Decodes the provided JWT token and returns the subject (username)
-    and role encoded within it.
+    and role encoded within it. Kept for clients that cannot verify
+    tokens themselves; services verify locally against `/auth/jwks.json`
+    instead of paying a round-trip per request.
 
     Args:
         token (str): The JWT token string.
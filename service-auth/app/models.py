@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Float, Integer, String, Text
 from database import Base
 
 class User(Base):
@@ -7,3 +7,12 @@ class User(Base):
     username = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     role = Column(String, default="user")  # user | artist | admin
+
+class SigningKey(Base):
+    __tablename__ = "signing_keys"
+    kid = Column(String, primary_key=True)
+    algorithm = Column(String, nullable=False)
+    private_key = Column(Text, nullable=False)  # PKCS#8 PEM
+    public_jwk = Column(Text, nullable=False)
+    activates_at = Column(Float, nullable=False)  # epoch seconds
+    retires_at = Column(Float, nullable=False, index=True)
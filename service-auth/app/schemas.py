@@ -16,3 +16,6 @@ class UserOut(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+
+class ServiceToken(Token):
+    expires_in: int
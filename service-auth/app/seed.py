@@ -1,9 +1,5 @@
 # run: docker compose run --rm auth python app/seed.py
-from database import SessionLocal, engine
-import models, utils, auth
-
-models.Base.metadata.create_all(bind=engine)
-db = SessionLocal()
+# The user list is plain data so benchmarks/suite.py can reuse it without a database
 
 users = [
     {"username": "vincent_van_gogh", "password": "pass", "role": "artist"},
@@ -15,18 +11,35 @@ users = [
 ]
 
 
-for u in users:
-    existing = db.query(models.User).filter(models.User.username == u["username"]).first()
-    if existing:
-        print(f"User {u['username']} already exists, skipping")
-        continue
-    user = models.User(username=u["username"], hashed_password=utils.hash_password(u["password"]), role=u["role"])
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    token = auth.create_access_token(subject=user.username, data={"role": user.role})
-    print(f"Created user {user.username} with role {user.role}")
-    print(f"  Token (use this): {token}\n")
-
-db.close()
-print("Auth seeding complete.")
+def _seed(engine):
+    from sqlalchemy.orm import Session
+    import models, utils, auth
+
+    models.Base.metadata.create_all(bind=engine)
+    db = Session(bind=engine)
+    # Load (or create) the signing keys the service uses, so the printed tokens verify against its JWKS
+    auth.ring.refresh(db)
+    for u in users:
+        existing = db.query(models.User).filter(models.User.username == u["username"]).first()
+        if existing:
+            print(f"User {u['username']} already exists, skipping")
+            continue
+        user = models.User(username=u["username"], hashed_password=utils.hash_password(u["password"]), role=u["role"])
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        token = auth.create_access_token(subject=user.username, data={"role": user.role})
+        print(f"Created user {user.username} with role {user.role}")
+        print(f"  Token (use this): {token}\n")
+
+    db.close()
+    print("Auth seeding complete.")
+
+def seed():
+    from database import engine
+    from common.db import run_offline
+
+    run_offline(engine, _seed)
+
+if __name__ == "__main__":
+    seed()
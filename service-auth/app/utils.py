@@ -1,7 +1,24 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from passlib.context import CryptContext
+from common import metrics
+
+# bcrypt cost factor; raising it makes existing hashes get upgraded on next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Size and kind ("process" or "thread") of the dedicated hashing pool
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+HASH_POOL_KIND = os.getenv("HASH_POOL_KIND", "process")
+# Hash jobs allowed to be running or queued before requests are shed
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", str(HASH_WORKERS * 8)))
+HASH_RETRY_AFTER = int(os.getenv("HASH_RETRY_AFTER", "1"))
 
 # Initialize Passlib context with bcrypt as the hashing scheme
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+class HashPoolBusy(Exception):
+    """Raised when the hashing queue is full and the request should be retried later."""
 
 def hash_password(password: str) -> str:
     """
@@ -27,3 +44,80 @@ def verify_password(plain: str, hashed: str) -> bool:
         bool: True if the password matches the hash, False otherwise.
     """
     return pwd_context.verify(plain, hashed)
+
+def verify_and_rehash(plain: str, hashed: str) -> tuple[bool, str | None]:
+    """
+    Verify a password and produce a replacement hash if the stored one is outdated.
+
+    Args:
+        plain (str): The plaintext password provided by the user.
+        hashed (str): The hashed password stored in the database.
+
+    Returns:
+        tuple[bool, str | None]: Whether the password matched, and a new hash
+            when `pwd_context.needs_update` reports the stored hash uses an old
+            scheme or cost factor (None otherwise).
+    """
+    if not pwd_context.verify(plain, hashed):
+        return False, None
+    if pwd_context.needs_update(hashed):
+        return True, pwd_context.hash(plain)
+    return True, None
+
+_executor: Executor | None = None
+_pending = 0
+_rejected = metrics.registry.counter("hash_pool_rejected_total", "Hash jobs shed with 503 because the queue was full")
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if HASH_POOL_KIND == "thread":
+            _executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+        else:
+            # spawn avoids forking a process that already runs the event loop and threadpool
+            _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+def shutdown_pool():
+    """Stop the hashing pool. Called from the app lifespan."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+async def _run_in_pool(fn, *args):
+    global _pending
+    if _pending >= HASH_QUEUE_LIMIT:
+        _rejected.inc()
+        raise HashPoolBusy()
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _pending -= 1
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password on the dedicated hashing pool.
+
+    Raises:
+        HashPoolBusy: If `HASH_QUEUE_LIMIT` hash jobs are already pending.
+    """
+    return await _run_in_pool(hash_password, password)
+
+async def verify_and_rehash_async(plain: str, hashed: str) -> tuple[bool, str | None]:
+    """
+    Run `verify_and_rehash` on the dedicated hashing pool.
+
+    Raises:
+        HashPoolBusy: If `HASH_QUEUE_LIMIT` hash jobs are already pending.
+    """
+    return await _run_in_pool(verify_and_rehash, plain, hashed)
+
+def _hash_pool_metrics():
+    return [
+        ("hash_pool_pending", "gauge", "Hash jobs queued or running", [({}, _pending)]),
+        ("hash_pool_queue_limit", "gauge", "Pending hash jobs before load is shed", [({}, HASH_QUEUE_LIMIT)]),
+    ]
+
+metrics.registry.add_collector(_hash_pool_metrics)
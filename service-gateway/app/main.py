@@ -0,0 +1,40 @@
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+import upstream
+from common import jwks, metrics, ratelimit, tracing
+from routes import router
+from dotenv import load_dotenv
+
+load_dotenv()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled keep-alive client per upstream service for the app's lifetime
+    await upstream.startup()
+    # Keeps the auth service's public signing keys cached for verifying tokens at the edge
+    jwks.cache.start()
+    yield
+    await jwks.cache.stop()
+    await upstream.shutdown()
+
+app = FastAPI(title="API Gateway", lifespan=lifespan)
+
+# Per-client token buckets and load shedding; innermost, so rejections still get CORS and metrics
+ratelimit.instrument(app, "gateway")
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Content-Disposition"],
+)
+
+# Per-route request counts, latency histograms and in-flight gauges on /metrics
+metrics.instrument(app)
+# W3C traceparent propagation; recent traces on /debug/traces with TRACE_DEBUG_ENDPOINT
+tracing.instrument(app, "gateway")
+
+app.include_router(router)
@@ -0,0 +1,182 @@
+import asyncio
+import os
+from urllib.parse import urlencode
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+import schemas, upstream
+from common import auth_utils, pagination
+from common.serialization import FastJSONResponse
+
+router = APIRouter()
+
+# Upstream responses up to this size are buffered instead of streamed
+GATEWAY_BUFFER_BYTES = int(os.getenv("GATEWAY_BUFFER_BYTES", str(256 * 1024)))
+
+PROXY_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE"]
+# Server-Sent Events endpoints of the services
+STREAM_SUFFIX = "/stream"
+# Never forwarded in either direction (RFC 9110 §7.6.1), plus headers the gateway sets itself
+HOP_BY_HOP = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailer",
+    "transfer-encoding", "upgrade", "host", "origin",
+}
+
+def _token_rejected(request: Request) -> bool:
+    """
+    Verify the request's bearer token, if any.
+
+    Event streams may carry the token as `?access_token=` instead, since
+    browsers' `EventSource` cannot set headers.
+
+    Raises:
+        HTTPException: 503 if the signing keys have not been fetched yet.
+
+    Returns:
+        bool: True if a token was sent and is expired or invalid.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        token = request.query_params.get("access_token") if request.url.path.endswith(STREAM_SUFFIX) else None
+    if token:
+        try:
+            auth_utils.decode_token(token)
+        except HTTPException as exc:
+            if exc.status_code != 401:
+                raise
+            return True
+    return False
+
+def _upstream_headers(request: Request, passthrough: bool = True) -> dict:
+    if passthrough:
+        headers = {k: v for k, v in request.headers.items() if k not in HOP_BY_HOP}
+    else:
+        headers = {"authorization": request.headers["authorization"]}
+    if request.client is not None:
+        forwarded = request.headers.get("x-forwarded-for")
+        headers["x-forwarded-for"] = f"{forwarded}, {request.client.host}" if forwarded else request.client.host
+    return headers
+
+async def _proxy(name: str, request: Request) -> Response:
+    """
+    Forward a request to an upstream service and stream its response back.
+
+    A bearer token is verified here first, so invalid tokens never reach
+    the services: an expired or invalid one is dropped and the request is
+    forwarded anonymously, so public routes still answer and protected
+    ones reply 401. A valid token is forwarded unchanged and each service
+    verifies it again against the auth service's published keys, so
+    nothing the gateway adds can grant an identity. Request and response bodies
+    are streamed, so bulk uploads and exports pass through without being
+    buffered; responses of at most `GATEWAY_BUFFER_BYTES` are read whole.
+    Event streams (paths ending in `/stream`) go over a separate unpooled
+    upstream connection without a read timeout.
+
+    Args:
+        name (str): Upstream name.
+        request (Request): The client request.
+
+    Raises:
+        HTTPException: 503 if the signing keys are not loaded yet or the upstream cannot be reached.
+
+    Returns:
+        Response: The upstream status, headers and body.
+    """
+    query = request.url.query
+    headers = _upstream_headers(request)
+    if _token_rejected(request):
+        headers.pop("authorization", None)
+        query = urlencode([(k, v) for k, v in request.query_params.multi_items() if k != "access_token"])
+    url = request.url.path + (f"?{query}" if query else "")
+    has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+    try:
+        resp = await upstream.send(name, request.method, url, headers,
+                                   content=request.stream() if has_body else None, stream=True,
+                                   long_lived=request.url.path.endswith(STREAM_SUFFIX))
+    except httpx.RequestError:
+        raise HTTPException(status_code=503, detail=f"{name.capitalize()} service unavailable")
+    headers = {k: v for k, v in resp.headers.items() if k not in HOP_BY_HOP}
+    length = resp.headers.get("content-length")
+    if length is not None and int(length) <= GATEWAY_BUFFER_BYTES:
+        # Small bodies are cheaper to buffer than to stream
+        try:
+            body = b"".join([chunk async for chunk in resp.aiter_raw()])
+        finally:
+            await resp.aclose()
+        return Response(body, status_code=resp.status_code, headers=headers)
+    return StreamingResponse(resp.aiter_raw(), status_code=resp.status_code, headers=headers,
+                             background=BackgroundTask(resp.aclose))
+
+def _proxy_routes(prefix: str, name: str):
+    async def forward(request: Request):
+        return await _proxy(name, request)
+
+    for path in (prefix, prefix + "/{rest:path}"):
+        router.add_api_route(path, forward, methods=PROXY_METHODS, include_in_schema=False,
+                             name=f"proxy_{name}")
+
+_proxy_routes("/auth", "auth")
+_proxy_routes("/artworks", "artwork")
+_proxy_routes("/orders", "orders")
+
+async def _fetch(name: str, url: str, headers: dict) -> httpx.Response | None:
+    try:
+        return await upstream.send(name, "GET", url, dict(headers))
+    except httpx.RequestError:
+        return None
+
+def _page(resp: httpx.Response) -> dict:
+    return {"items": resp.json(), "next_cursor": resp.headers.get(pagination.NEXT_CURSOR_HEADER)}
+
+@router.get("/dashboard", response_model=schemas.Dashboard)
+async def dashboard(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    orders_limit: int = Query(10, ge=1, le=100),
+    token: str = Depends(auth_utils.oauth2_scheme),
+):
+    """
+    Everything the UI needs for its first screen, in one round trip.
+
+    Fetches the current user from auth, a catalog page from artwork and the
+    user's latest orders (with artwork details) from orders concurrently
+    over the pooled upstream connections. The token is verified once here.
+    A section whose upstream fails is null and its status is listed under
+    `errors` (503 if the service could not be reached), so the rest of the
+    page still renders.
+
+    Args:
+        request (Request): Incoming request, used to build upstream headers.
+        limit (int, optional): Catalog page size. Defaults to 20.
+        cursor (str, optional): Catalog cursor from a previous `artworks.next_cursor`.
+        orders_limit (int, optional): Number of latest orders. Defaults to 10.
+        token (str): OAuth2 token of the user.
+
+    Raises:
+        HTTPException: 401 if the token is expired or invalid.
+
+    Returns:
+        schemas.Dashboard: The user, a catalog page and their orders, each with
+            the cursor of its next page.
+    """
+    auth_utils.decode_token(token)
+    # Only credentials: the client's conditional and content headers are for the dashboard itself
+    headers = _upstream_headers(request, passthrough=False)
+    catalog = "/artworks?" + urlencode({"limit": limit, **({"cursor": cursor} if cursor else {})})
+    me, artworks, orders = await asyncio.gather(
+        _fetch("auth", "/auth/me", headers),
+        _fetch("artwork", catalog, headers),
+        _fetch("orders", f"/orders?limit={orders_limit}&include_artwork=true", headers),
+    )
+    errors = {}
+    for section, resp in (("me", me), ("artworks", artworks), ("orders", orders)):
+        if resp is None or resp.status_code != 200:
+            errors[section] = resp.status_code if resp is not None else 503
+    return FastJSONResponse({
+        "me": me.json() if "me" not in errors else None,
+        "artworks": _page(artworks) if "artworks" not in errors else None,
+        "orders": _page(orders) if "orders" not in errors else None,
+        "errors": errors,
+    })
@@ -0,0 +1,42 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+class UserOut(BaseModel):
+    id: int
+    username: str
+    role: str
+
+class ArtworkOut(BaseModel):
+    id: int
+    title: str
+    description: str | None
+    price: float
+    owner: str
+    is_sold: bool
+
+class ArtworkSummary(BaseModel):
+    title: str
+    price: float
+    owner: str
+
+class OrderOut(BaseModel):
+    id: int
+    art_id: int
+    buyer: str
+    status: str
+    created_at: datetime | None = None
+    artwork: ArtworkSummary | None = None
+
+class ArtworkPage(BaseModel):
+    items: list[ArtworkOut]
+    next_cursor: str | None
+
+class OrderPage(BaseModel):
+    items: list[OrderOut]
+    next_cursor: str | None
+
+class Dashboard(BaseModel):
+    me: UserOut | None
+    artworks: ArtworkPage | None
+    orders: OrderPage | None
+    errors: dict[str, int]
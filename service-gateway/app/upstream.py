@@ -0,0 +1,112 @@
+import os
+import time
+import httpx
+from common import metrics, tracing
+
+UPSTREAMS = {
+    "auth": os.getenv("AUTH_SERVICE_URL", "http://auth:8000"),
+    "artwork": os.getenv("ARTWORK_SERVICE_URL", "http://artwork:8000"),
+    "orders": os.getenv("ORDERS_SERVICE_URL", "http://orders:8000"),
+}
+# Must outlast the longest upstream call, i.e. `GET /orders/{id}?wait=30`
+GATEWAY_TIMEOUT = float(os.getenv("GATEWAY_TIMEOUT", "35"))
+GATEWAY_CONNECT_TIMEOUT = float(os.getenv("GATEWAY_CONNECT_TIMEOUT", "2"))
+GATEWAY_MAX_CONNECTIONS = int(os.getenv("GATEWAY_MAX_CONNECTIONS", "200"))
+GATEWAY_MAX_KEEPALIVE = int(os.getenv("GATEWAY_MAX_KEEPALIVE", "50"))
+GATEWAY_KEEPALIVE_EXPIRY = float(os.getenv("GATEWAY_KEEPALIVE_EXPIRY", "30"))
+
+_clients: dict[str, httpx.AsyncClient] = {}
+# Event streams hold their connection for as long as the client listens, so they get their own
+# unpooled clients without a read timeout instead of pinning connections of the shared pool
+_stream_clients: dict[str, httpx.AsyncClient] = {}
+_duration = metrics.registry.histogram(
+    "gateway_upstream_duration_seconds", "Upstream latency until the response headers arrive", ("upstream", "status"))
+
+def _build_client(base_url: str) -> httpx.AsyncClient:
+    """
+    Build the pooled keep-alive client for one upstream service.
+
+    Each client only talks to its own service, so the pool limits are
+    per-upstream limits. Transport retries only cover failures to
+    establish a connection, which makes them safe for every method.
+
+    Args:
+        base_url (str): Base URL of the upstream service.
+
+    Returns:
+        httpx.AsyncClient: A keep-alive client bound to the service.
+    """
+    limits = httpx.Limits(
+        max_connections=GATEWAY_MAX_CONNECTIONS,
+        max_keepalive_connections=GATEWAY_MAX_KEEPALIVE,
+        keepalive_expiry=GATEWAY_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(GATEWAY_TIMEOUT, connect=GATEWAY_CONNECT_TIMEOUT)
+    transport = httpx.AsyncHTTPTransport(retries=1, limits=limits)
+    return httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits, transport=transport)
+
+async def startup():
+    """Create one client per upstream. Called once from the app lifespan."""
+    for name, url in UPSTREAMS.items():
+        if name not in _clients:
+            _clients[name] = _build_client(url)
+
+async def shutdown():
+    """Close every client and release all pooled connections."""
+    for client in [*_clients.values(), *_stream_clients.values()]:
+        await client.aclose()
+    _clients.clear()
+    _stream_clients.clear()
+
+def get_client(name: str) -> httpx.AsyncClient:
+    """Return the client of upstream `name`, creating it lazily if the lifespan has not run."""
+    if name not in _clients:
+        _clients[name] = _build_client(UPSTREAMS[name])
+    return _clients[name]
+
+def get_stream_client(name: str) -> httpx.AsyncClient:
+    """Return the client of upstream `name` for event streams: no connection limit and no read timeout."""
+    if name not in _stream_clients:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=0)
+        timeout = httpx.Timeout(GATEWAY_TIMEOUT, connect=GATEWAY_CONNECT_TIMEOUT, read=None)
+        _stream_clients[name] = httpx.AsyncClient(base_url=UPSTREAMS[name], timeout=timeout, limits=limits)
+    return _stream_clients[name]
+
+async def send(name: str, method: str, url: str, headers: dict, content=None,
+               stream: bool = False, long_lived: bool = False) -> httpx.Response:
+    """
+    Send one request to an upstream service.
+
+    The call is a client span whose `traceparent` is forwarded, and its
+    latency until the response headers arrive is recorded per upstream in
+    `gateway_upstream_duration_seconds`.
+
+    Args:
+        name (str): Upstream name, a key of `UPSTREAMS`.
+        method (str): HTTP method.
+        url (str): Path and query string relative to the upstream base URL.
+        headers (dict): Request headers to send.
+        content (optional): Request body, bytes or an async iterator of bytes.
+        stream (bool, optional): Return before reading the body; the caller
+            must close the response. Defaults to False.
+        long_lived (bool, optional): An event stream; sent over the stream
+            client instead of the pool. Defaults to False.
+
+    Raises:
+        httpx.RequestError: If the upstream cannot be reached or times out.
+
+    Returns:
+        httpx.Response: The upstream response.
+    """
+    client = get_stream_client(name) if long_lived else get_client(name)
+    start = time.perf_counter()
+    status = "error"
+    with tracing.span(f"HTTP {method} {name}", "client", **{"peer.service": name}) as s:
+        try:
+            request = client.build_request(method, url, headers=tracing.inject(headers), content=content)
+            resp = await client.send(request, stream=stream)
+            status = str(resp.status_code)
+            s.set_attribute("http.status_code", resp.status_code)
+            return resp
+        finally:
+            _duration.observe(time.perf_counter() - start, name, status)
@@ -0,0 +1,250 @@
+import asyncio
+import os
+import time
+import httpx
+import resilience
+from common import metrics, tracing
+
+ARTWORK_URL = os.getenv("ARTWORK_SERVICE_URL", "http://artwork:8000")
+ARTWORK_TIMEOUT = float(os.getenv("ARTWORK_TIMEOUT", "5"))
+ARTWORK_CONNECT_TIMEOUT = float(os.getenv("ARTWORK_CONNECT_TIMEOUT", "2"))
+ARTWORK_MAX_CONNECTIONS = int(os.getenv("ARTWORK_MAX_CONNECTIONS", "100"))
+ARTWORK_MAX_KEEPALIVE = int(os.getenv("ARTWORK_MAX_KEEPALIVE", "20"))
+ARTWORK_KEEPALIVE_EXPIRY = float(os.getenv("ARTWORK_KEEPALIVE_EXPIRY", "30"))
+ARTWORK_RETRIES = int(os.getenv("ARTWORK_RETRIES", "2"))
+# Must not exceed BATCH_MAX_IDS on the artwork service
+ARTWORK_BATCH_SIZE = int(os.getenv("ARTWORK_BATCH_SIZE", "1000"))
+# Concurrent artwork calls allowed, and how long (s) a call waits for a slot
+ARTWORK_BULKHEAD_SIZE = int(os.getenv("ARTWORK_BULKHEAD_SIZE", "50"))
+ARTWORK_BULKHEAD_WAIT = float(os.getenv("ARTWORK_BULKHEAD_WAIT", "0.5"))
+# Extra attempts for idempotent calls after a timeout, connection error or 5xx
+ARTWORK_IDEMPOTENT_RETRIES = int(os.getenv("ARTWORK_IDEMPOTENT_RETRIES", "2"))
+ARTWORK_RETRY_BACKOFF = float(os.getenv("ARTWORK_RETRY_BACKOFF", "0.05"))
+# Send a second copy of an idempotent call still pending after this many seconds; 0 disables
+ARTWORK_HEDGE_AFTER = float(os.getenv("ARTWORK_HEDGE_AFTER", "0"))
+
+_client: httpx.AsyncClient | None = None
+_bulkhead = resilience.Bulkhead("artwork", ARTWORK_BULKHEAD_SIZE, ARTWORK_BULKHEAD_WAIT)
+_breakers: dict[str, resilience.CircuitBreaker] = {}
+_hedges = resilience.HedgeStats()
+_duration = metrics.registry.histogram(
+    "artwork_request_duration_seconds", "Latency of each attempt at an artwork call", ("endpoint", "status"))
+
+def _build_client() -> httpx.AsyncClient:
+    """
+    Build the pooled HTTP client used for every call to the artwork service.
+
+    The client only ever talks to `ARTWORK_URL`, so the pool limits are
+    effectively per-host limits. Transport retries only cover failures to
+    establish a connection, which makes them safe for POST requests too.
+
+    Returns:
+        httpx.AsyncClient: A keep-alive client bound to the artwork service.
+    """
+    limits = httpx.Limits(
+        max_connections=ARTWORK_MAX_CONNECTIONS,
+        max_keepalive_connections=ARTWORK_MAX_KEEPALIVE,
+        keepalive_expiry=ARTWORK_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(ARTWORK_TIMEOUT, connect=ARTWORK_CONNECT_TIMEOUT)
+    transport = httpx.AsyncHTTPTransport(retries=ARTWORK_RETRIES, limits=limits)
+    return httpx.AsyncClient(base_url=ARTWORK_URL, timeout=timeout, limits=limits, transport=transport)
+
+async def startup():
+    """Create the shared client. Called once from the app lifespan."""
+    global _client
+    if _client is None:
+        _client = _build_client()
+
+async def shutdown():
+    """Close the shared client and release all pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Return the shared artwork client, creating it lazily if the lifespan
+    has not run (e.g. when the router is mounted in another app).
+    """
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
+
+def _auth_headers(token: str | None) -> dict:
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+def _breaker(method: str, path: str) -> resilience.CircuitBreaker:
+    key = resilience.endpoint_key(method, path)
+    if key not in _breakers:
+        _breakers[key] = resilience.CircuitBreaker(key)
+    return _breakers[key]
+
+async def request(method: str, path: str, token: str | None, idempotent: bool = False, **kwargs) -> httpx.Response:
+    """
+    Send a request to the artwork service through the resilience layer.
+
+    Each call passes the endpoint's circuit breaker and the shared bulkhead,
+    and every attempt is a client span whose `traceparent` is forwarded.
+    Timeouts, connection errors and 5xx responses count as breaker failures.
+    Idempotent calls are also retried with jittered backoff and, when
+    `ARTWORK_HEDGE_AFTER` is set, hedged.
+
+    Args:
+        method (str): HTTP method.
+        path (str): Path relative to `ARTWORK_URL`, e.g. `/artworks/1`.
+        token (str): Bearer token of the current user.
+        idempotent (bool, optional): Whether the call is safe to repeat. Defaults to False.
+
+    Raises:
+        resilience.CircuitOpenError: If the endpoint's breaker is open.
+        resilience.BulkheadFullError: If too many artwork calls are in flight.
+        httpx.RequestError: If the artwork service cannot be reached.
+
+    Returns:
+        httpx.Response: The artwork service response (possibly a 5xx after the last attempt).
+    """
+    breaker = _breaker(method, path)
+    headers = _auth_headers(token)
+
+    async def attempt_once():
+        start = time.perf_counter()
+        status = "error"
+        with tracing.span(f"HTTP {breaker.name}", "client", **{"peer.service": "artwork"}) as s:
+            try:
+                resp = await get_client().request(method, path, headers=tracing.inject(dict(headers)), **kwargs)
+                status = str(resp.status_code)
+                s.set_attribute("http.status_code", resp.status_code)
+                return resp
+            finally:
+                _duration.observe(time.perf_counter() - start, breaker.name, status)
+
+    async def send():
+        return await _bulkhead.run(attempt_once)
+
+    attempts = 1 + (ARTWORK_IDEMPOTENT_RETRIES if idempotent else 0)
+    for attempt in range(attempts):
+        if attempt:
+            try:
+                breaker.before_call()
+            except resilience.CircuitOpenError:
+                # Our own failures opened the breaker; report them, not the breaker
+                if last_error is not None:
+                    raise last_error
+                return resp
+        else:
+            breaker.before_call()
+        last_error = None
+        try:
+            if idempotent and ARTWORK_HEDGE_AFTER > 0:
+                resp = await resilience.hedged(send, ARTWORK_HEDGE_AFTER, _bulkhead, _hedges)
+            else:
+                resp = await send()
+        except resilience.BulkheadFullError:
+            breaker.release()
+            raise
+        except httpx.RequestError as e:
+            breaker.record_failure()
+            if attempt == attempts - 1:
+                raise
+            last_error = e
+        except BaseException:
+            breaker.release()
+            raise
+        else:
+            if resp.status_code < 500:
+                breaker.record_success()
+                return resp
+            breaker.record_failure()
+            if attempt == attempts - 1:
+                return resp
+        await asyncio.sleep(resilience.backoff(attempt, ARTWORK_RETRY_BACKOFF))
+
+async def get(path: str, token: str | None, **kwargs) -> httpx.Response:
+    """
+    Send a GET request to the artwork service, forwarding the caller's token.
+
+    GETs are idempotent, so they are retried and hedged (see `request`).
+
+    Args:
+        path (str): Path relative to `ARTWORK_URL`, e.g. `/artworks/1`.
+        token (str | None): Bearer token of the current user, or None for public endpoints.
+
+    Returns:
+        httpx.Response: The artwork service response.
+    """
+    return await request("GET", path, token, idempotent=True, **kwargs)
+
+async def post(path: str, token: str, idempotent: bool = False, **kwargs) -> httpx.Response:
+    """
+    Send a POST request to the artwork service, forwarding the caller's token.
+
+    Args:
+        path (str): Path relative to `ARTWORK_URL`.
+        token (str): Bearer token of the current user.
+        idempotent (bool, optional): Allow retries and hedging. Defaults to False.
+
+    Returns:
+        httpx.Response: The artwork service response.
+    """
+    return await request("POST", path, token, idempotent=idempotent, **kwargs)
+
+def stats() -> dict:
+    """
+    Report the state of the resilience layer.
+
+    Returns:
+        dict: Per-endpoint breaker state and counters, bulkhead usage and hedge counts.
+    """
+    return {
+        "breakers": {key: b.stats() for key, b in _breakers.items()},
+        "bulkhead": _bulkhead.stats(),
+        "hedges": {"fired": _hedges.fired, "won": _hedges.won},
+    }
+
+async def batch_get(ids: list[int], token: str) -> dict[int, dict]:
+    """
+    Look up many artworks with `POST /artworks/batch_get`.
+
+    IDs are sent in slices of `ARTWORK_BATCH_SIZE`, issued concurrently.
+
+    Args:
+        ids (list[int]): Artwork IDs to resolve.
+        token (str): Bearer token of the current user.
+
+    Raises:
+        httpx.HTTPStatusError: If the artwork service rejects a batch.
+        httpx.RequestError: If the artwork service cannot be reached.
+
+    Returns:
+        dict[int, dict]: Artworks found, keyed by ID. Missing IDs are absent.
+    """
+    ids = list(dict.fromkeys(ids))
+    slices = [ids[i:i + ARTWORK_BATCH_SIZE] for i in range(0, len(ids), ARTWORK_BATCH_SIZE)]
+    responses = await asyncio.gather(*(post("/artworks/batch_get", token, idempotent=True, json={"ids": s}) for s in slices))
+    found = {}
+    for resp in responses:
+        resp.raise_for_status()
+        found.update({a["id"]: a for a in resp.json()["items"]})
+    return found
+
+_BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+def _resilience_metrics():
+    breakers = list(_breakers.items())
+    return [
+        ("artwork_breaker_state", "gauge", "Circuit breaker state (0 closed, 1 half-open, 2 open)",
+         [({"endpoint": k}, _BREAKER_STATES[b.state]) for k, b in breakers]),
+        ("artwork_breaker_trips_total", "counter", "Times the circuit breaker opened",
+         [({"endpoint": k}, b.trips) for k, b in breakers]),
+        ("artwork_breaker_rejected_total", "counter", "Calls failed fast by an open circuit breaker",
+         [({"endpoint": k}, b.rejected) for k, b in breakers]),
+        ("artwork_bulkhead_in_flight", "gauge", "Artwork calls in flight", [({}, _bulkhead.in_flight)]),
+        ("artwork_bulkhead_rejected_total", "counter", "Artwork calls rejected by the bulkhead", [({}, _bulkhead.rejected)]),
+        ("artwork_hedges_total", "counter", "Hedged artwork calls sent", [({}, _hedges.fired)]),
+        ("artwork_hedges_won_total", "counter", "Hedged calls that answered first", [({}, _hedges.won)]),
+    ]
+
+metrics.registry.add_collector(_resilience_metrics)
@@ -1,10 +1,22 @@
 import os
-from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from common.db import create_async_db_engine, create_db_engine, create_read_engine, is_async_url
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./orders.db")
+# An asyncio driver in the URL (sqlite+aiosqlite://, postgresql+asyncpg://) selects the async engine
+ASYNC_DB = is_async_url(DATABASE_URL)
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if ASYNC_DB:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    engine = create_async_db_engine(DATABASE_URL)
+    read_engine = create_read_engine(DATABASE_URL, engine)
+    SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    ReadSessionLocal = async_sessionmaker(read_engine, autoflush=False, expire_on_commit=False)
+else:
+    engine = create_db_engine(DATABASE_URL)
+    read_engine = create_read_engine(DATABASE_URL, engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
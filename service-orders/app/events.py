@@ -0,0 +1,57 @@
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+import models
+from common import streaming
+from database import ReadSessionLocal
+
+def record(db: Session, order_id: int, art_id: int, buyer: str, status: str):
+    """
+    Append an order status change to the event log.
+
+    Must be called in the transaction that makes the change, so streams
+    never report a change that rolled back.
+    """
+    db.execute(insert(models.OrderEvent).values(order_id=order_id, art_id=art_id, buyer=buyer, status=status))
+
+def read_stream(db: Session, after: int, limit: int, buyer: str | None = None, owner: str | None = None) -> list[dict]:
+    """
+    Events with an ID above `after`, oldest first.
+
+    Each event carries the artwork's `owner` from the ownership projection
+    (null while the projection has not seen the artwork yet), so artists
+    can be sent the orders on their artworks.
+
+    Args:
+        db (Session): Database session.
+        after (int): Return events with a higher ID.
+        limit (int): Maximum number of events.
+        buyer (str, optional): Only events of this buyer's orders.
+        owner (str, optional): Only events of orders on this owner's artworks.
+
+    Returns:
+        list[dict]: Events typed `order.<status>`.
+    """
+    e, o = models.OrderEvent, models.ArtworkOwner
+    stmt = (
+        select(e.id, e.order_id, e.art_id, e.buyer, e.status, o.owner)
+        .outerjoin(o, o.art_id == e.art_id)
+        .where(e.id > after)
+        .order_by(e.id)
+        .limit(limit)
+    )
+    if buyer is not None:
+        stmt = stmt.where(e.buyer == buyer)
+    if owner is not None:
+        stmt = stmt.where(o.owner == owner)
+    return [
+        {"id": i, "type": f"order.{status}", "order_id": order_id, "art_id": art_id, "buyer": b, "status": status,
+         "owner": art_owner}
+        for i, order_id, art_id, b, status, art_owner in db.execute(stmt)
+    ]
+
+def head(db: Session) -> int:
+    """The highest event ID, or 0 for an empty log."""
+    return db.execute(select(func.max(models.OrderEvent.id))).scalar() or 0
+
+# Pushes new events to `GET /orders/stream` subscribers; wake it after committing an event
+hub = streaming.Hub("orders", ReadSessionLocal, read_stream, head)
@@ -1,16 +1,40 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-import models
-from database import engine
+import models, artwork_client, events, pipeline, projection
+from database import engine, read_engine
+from common import jwks, metrics, ratelimit, tracing
+from common.db import dispose_engines, run_with_engine, sync_schema
 from routes import router
 from dotenv import load_dotenv
 
 load_dotenv()
 
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_with_engine(engine, sync_schema, models.Base.metadata)
+    await run_with_engine(engine, pipeline.drop_stored_tokens)
+    # One pooled keep-alive client to the artwork service for the app's lifetime
+    await artwork_client.startup()
+    # Drains the order outbox: reserves artworks and confirms or fails orders
+    pipeline.worker.start()
+    # Follows the artwork event feed into the local artwork_owner table used by artist listings
+    projection.projector.start()
+    # Keeps the auth service's public signing keys cached for local token verification
+    jwks.cache.start()
+    yield
+    await jwks.cache.stop()
+    await events.hub.stop()
+    await projection.projector.stop()
+    await pipeline.worker.stop()
+    await artwork_client.shutdown()
+    await dispose_engines(engine, read_engine)
 
-app = FastAPI(title="Orders Service")
+app = FastAPI(title="Orders Service", lifespan=lifespan)
+
+# Per-client token buckets and load shedding; innermost, so rejections still get CORS and metrics
+ratelimit.instrument(app, "orders")
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,6 +42,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Content-Disposition"],
 )
 
+# Per-route request counts, latency histograms and in-flight gauges on /metrics
+metrics.instrument(app)
+# W3C traceparent propagation; recent traces on /debug/traces with TRACE_DEBUG_ENDPOINT
+tracing.instrument(app, "orders")
+
 app.include_router(router)
+
+@app.get("/resilience/stats")
+def resilience_stats():
+    """
+    Report circuit breaker, bulkhead and hedging state for artwork calls.
+
+    Returns:
+        dict: Per-endpoint breaker state, trips and rejections, bulkhead usage and hedge counts.
+    """
+    return artwork_client.stats()
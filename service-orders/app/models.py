@@ -1,9 +1,59 @@
-from sqlalchemy import Column, Integer, String
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Index
 from database import Base
 
+def _utcnow() -> datetime:
+    # Stored naive, in UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 class Order(Base):
     __tablename__ = "orders"
     id = Column(Integer, primary_key=True, index=True)
     art_id = Column(Integer, nullable=False)
     buyer = Column(String, nullable=False)
     status = Column(String, default="created")  # created | confirmed | failed
+    created_at = Column(DateTime, nullable=True, default=_utcnow, index=True)  # null for orders older than the column
+
+    # Composite indexes backing keyset pagination on id per buyer and per artwork
+    __table_args__ = (
+        Index("ix_orders_buyer_id", "buyer", "id"),
+        Index("ix_orders_art_id_id", "art_id", "id"),
+    )
+
+class OrderOutbox(Base):
+    """Pending artwork reservation for an order, written in the same transaction as the order."""
+    __tablename__ = "order_outbox"
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, nullable=False, index=True)
+    art_id = Column(Integer, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(Float, nullable=False, index=True)  # UNIX time; also the claim lease
+    last_error = Column(String, nullable=True)
+    traceparent = Column(String, nullable=True)  # trace of the POST /orders that queued it
+
+class OrderEvent(Base):
+    """Order status change, written in the same transaction as the change; feeds `GET /orders/stream`."""
+    __tablename__ = "order_events"
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, nullable=False)
+    art_id = Column(Integer, nullable=False)
+    buyer = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+
+class ArtworkOwner(Base):
+    """Local projection of artwork ownership, built from the artwork service's event feed."""
+    __tablename__ = "artwork_owner"
+    art_id = Column(Integer, primary_key=True, autoincrement=False)
+    owner = Column(String, nullable=False)
+    is_sold = Column(Boolean, nullable=False, default=False)
+
+    # Backs the artist order listing: owner -> art_id -> orders (art_id, id)
+    __table_args__ = (
+        Index("ix_artwork_owner_owner_art_id", "owner", "art_id"),
+    )
+
+class ProjectionCursor(Base):
+    """Last feed position a projection has applied."""
+    __tablename__ = "projection_cursors"
+    name = Column(String, primary_key=True)
+    position = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import os
+import random
+import time
+import httpx
+from sqlalchemy import inspect, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+import models, artwork_client, events, service_auth
+from common import tracing
+from common.db import run_in_session
+from database import SessionLocal
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1.0"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", "0.5"))
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", "60"))
+# A claimed entry is invisible to other workers for this long; keep it above ARTWORK_TIMEOUT
+OUTBOX_LEASE = float(os.getenv("OUTBOX_LEASE", "30"))
+
+logger = logging.getLogger("orders.pipeline")
+
+def enqueue(db, order: models.Order):
+    """
+    Add the outbox entry that will reserve the order's artwork.
+
+    Must be called in the same transaction that inserts the order, so an
+    order is never recorded without its reservation (or the reverse). The
+    entry holds no credentials: the worker reserves with the service's own
+    token, and the buyer is the order's.
+    """
+    db.add(models.OrderOutbox(order_id=order.id, art_id=order.art_id, next_attempt_at=time.time(),
+                              traceparent=tracing.current_traceparent()))
+
+def drop_stored_tokens(engine: Engine):
+    """
+    Drop the `token` column in which older versions kept each entry's buyer
+    token, so no bearer token stays at rest. Pending entries carry on with
+    the service token.
+    """
+    columns = {c["name"] for c in inspect(engine).get_columns(models.OrderOutbox.__tablename__)}
+    if "token" in columns:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"ALTER TABLE {models.OrderOutbox.__tablename__} DROP COLUMN token")
+
+def _backoff(attempts: int) -> float:
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE * 2 ** attempts))
+
+def _claim_batch(db: Session) -> list[dict]:
+    """Atomically lease up to OUTBOX_BATCH_SIZE due entries so concurrent workers never share one."""
+    now = time.time()
+    due = (
+        select(models.OrderOutbox.id)
+        .where(models.OrderOutbox.next_attempt_at <= now)
+        .order_by(models.OrderOutbox.id)
+        .limit(OUTBOX_BATCH_SIZE)
+    )
+    stmt = (
+        update(models.OrderOutbox)
+        .where(models.OrderOutbox.id.in_(due), models.OrderOutbox.next_attempt_at <= now)
+        .values(next_attempt_at=now + OUTBOX_LEASE)
+        .returning(models.OrderOutbox.id, models.OrderOutbox.order_id, models.OrderOutbox.art_id,
+                   models.OrderOutbox.attempts, models.OrderOutbox.traceparent)
+    )
+    rows = [dict(r._mapping) for r in db.execute(stmt)]
+    db.commit()
+    return rows
+
+def _apply(db: Session, results: list[tuple[dict, str, str | None]]) -> list[int]:
+    """
+    Record the outcome of a batch in one transaction.
+
+    Returns:
+        list[int]: IDs of orders that reached a final status.
+    """
+    finished = []
+    for entry, outcome, error in results:
+        attempts = entry["attempts"] + 1
+        if outcome == "retry" and attempts >= OUTBOX_MAX_ATTEMPTS:
+            outcome = "failed"
+        if outcome == "retry":
+            db.query(models.OrderOutbox).filter(models.OrderOutbox.id == entry["id"]).update({
+                "attempts": attempts,
+                "next_attempt_at": time.time() + _backoff(attempts),
+                "last_error": error,
+            })
+            continue
+        buyer = db.execute(
+            update(models.Order).where(models.Order.id == entry["order_id"]).values(status=outcome)
+            .returning(models.Order.buyer)
+        ).scalar_one()
+        events.record(db, entry["order_id"], entry["art_id"], buyer, outcome)
+        db.query(models.OrderOutbox).filter(models.OrderOutbox.id == entry["id"]).delete()
+        finished.append(entry["order_id"])
+    db.commit()
+    return finished
+
+async def _reserve(entry: dict) -> tuple[dict, str, str | None]:
+    """
+    Ask artwork to mark the order's artwork as sold.
+
+    The order reference makes the call idempotent, so a retry after a lost
+    response is confirmed instead of failing as "already sold". The call
+    carries the service token, so it does not depend on the buyer's token
+    still being valid.
+
+    Returns:
+        tuple: `(entry, outcome, error)` with outcome `confirmed`, `failed` or `retry`.
+    """
+    # Continue the trace of the request that placed the order
+    with tracing.span("outbox.reserve", parent=entry["traceparent"],
+                      **{"order.id": entry["order_id"], "outbox.attempt": entry["attempts"] + 1}):
+        try:
+            token = await service_auth.token.get()
+            resp = await artwork_client.post(f"/artworks/{entry['art_id']}/mark_sold", token,
+                                             params={"ref": f"order:{entry['order_id']}"})
+        except (httpx.HTTPError, RuntimeError) as e:
+            return entry, "retry", f"{e.__class__.__name__}"
+    if resp.status_code == 200:
+        return entry, "confirmed", None
+    if resp.status_code == 401:
+        # Expired, or signed by a key artwork has not fetched yet: a new token on the next attempt
+        service_auth.token.invalidate()
+        return entry, "retry", "artwork responded 401"
+    if resp.status_code in (400, 403, 404):
+        return entry, "failed", f"artwork responded {resp.status_code}"
+    return entry, "retry", f"artwork responded {resp.status_code}"
+
+class OutboxWorker:
+    """
+    Background task that drains the order outbox.
+
+    Entries are claimed in batches, reserved concurrently against the artwork
+    service, and their orders moved to `confirmed` or `failed`. Transient
+    errors are retried with jittered exponential backoff up to
+    `OUTBOX_MAX_ATTEMPTS`. `wake()` starts a pass right away instead of
+    waiting for the next poll.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+        self._waiters: dict[int, list[asyncio.Event]] = {}
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self):
+        self._wake.set()
+
+    async def wait_for(self, order_id: int, timeout: float):
+        """Wait until this process finishes `order_id` or `timeout` seconds pass."""
+        event = asyncio.Event()
+        self._waiters.setdefault(order_id, []).append(event)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            waiters = self._waiters.get(order_id, [])
+            if event in waiters:
+                waiters.remove(event)
+            if not waiters:
+                self._waiters.pop(order_id, None)
+
+    def _notify(self, order_ids: list[int]):
+        for order_id in order_ids:
+            for event in self._waiters.get(order_id, []):
+                event.set()
+
+    async def _run(self):
+        while True:
+            try:
+                entries = await run_in_session(SessionLocal, _claim_batch)
+                if entries:
+                    results = await asyncio.gather(*(_reserve(e) for e in entries))
+                    self._notify(await run_in_session(SessionLocal, _apply, results))
+                    events.hub.wake()
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Outbox pass failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+worker = OutboxWorker()
@@ -0,0 +1,191 @@
+# run: docker compose run --rm orders python projection.py rebuild
+import argparse
+import asyncio
+import logging
+import os
+import time
+import httpx
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+import models, artwork_client
+from common import metrics
+from common.db import run_in_session
+from database import SessionLocal
+
+PROJECTION_BATCH_SIZE = int(os.getenv("PROJECTION_BATCH_SIZE", "500"))
+PROJECTION_POLL_INTERVAL = float(os.getenv("PROJECTION_POLL_INTERVAL", "1.0"))
+# How long a gap in event IDs may be an uncommitted transaction before it is skipped
+PROJECTION_GAP_TIMEOUT = float(os.getenv("PROJECTION_GAP_TIMEOUT", "5.0"))
+
+NAME = "artwork_owner"
+SOLD = "artwork.sold"
+
+logger = logging.getLogger("orders.projection")
+
+_position = metrics.registry.gauge("artwork_projection_position", "Last artwork event ID applied to the projection")
+_applied = metrics.registry.counter("artwork_projection_events_total", "Artwork events applied to the projection")
+
+def load_position(db: Session) -> int:
+    position = db.execute(
+        select(models.ProjectionCursor.position).where(models.ProjectionCursor.name == NAME)
+    ).scalar_one_or_none()
+    return position or 0
+
+def apply(db: Session, events: list[dict], position: int):
+    """
+    Apply a batch of artwork events and store the new cursor in one transaction.
+
+    Applying is idempotent, so the same events can be replayed after a
+    crash or a held-back cursor: the owner comes from the latest event, and
+    once an artwork is sold it stays sold.
+
+    Args:
+        db (Session): Database session.
+        events (list[dict]): Events from `GET /artworks/events`, oldest first.
+        position (int): Feed position to store; at most the last event's ID.
+    """
+    ids = list({e["art_id"] for e in events})
+    current = {
+        art_id: is_sold for art_id, is_sold in db.execute(
+            select(models.ArtworkOwner.art_id, models.ArtworkOwner.is_sold).where(models.ArtworkOwner.art_id.in_(ids))
+        )
+    }
+    rows: dict[int, dict] = {}
+    for e in events:
+        sold = rows[e["art_id"]]["is_sold"] if e["art_id"] in rows else current.get(e["art_id"], False)
+        rows[e["art_id"]] = {"art_id": e["art_id"], "owner": e["owner"], "is_sold": bool(sold) or e["type"] == SOLD}
+    if rows:
+        db.execute(delete(models.ArtworkOwner).where(models.ArtworkOwner.art_id.in_(ids)))
+        db.execute(insert(models.ArtworkOwner), list(rows.values()))
+    _store_position(db, position)
+    db.commit()
+    _applied.inc(amount=len(events))
+    _position.set(position)
+
+def _store_position(db: Session, position: int):
+    updated = db.query(models.ProjectionCursor).filter(models.ProjectionCursor.name == NAME).update(
+        {"position": position})
+    if not updated:
+        db.add(models.ProjectionCursor(name=NAME, position=position))
+
+def reset(db: Session):
+    """Empty the projection and move its cursor back to the start of the feed."""
+    db.execute(delete(models.ArtworkOwner))
+    _store_position(db, 0)
+    db.commit()
+
+class OwnershipProjector:
+    """
+    Background task that keeps `artwork_owner` in step with the artwork
+    service's event feed.
+
+    Each pass reads the stored cursor, pulls up to `PROJECTION_BATCH_SIZE`
+    events after it and applies them with the new cursor in one
+    transaction, then continues until caught up and polls every
+    `PROJECTION_POLL_INTERVAL` seconds. The cursor only moves over
+    consecutive event IDs: a gap may be a transaction on the artwork side
+    that has not committed yet, so it is waited for up to
+    `PROJECTION_GAP_TIMEOUT` and then skipped (a rolled-back transaction
+    leaves a permanent gap). The timeout runs per missing ID, so a gap that
+    fills in time does not shorten the wait for the next one. Events past
+    a gap are applied anyway and replayed once the cursor gets there.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+        # Missing event ID the cursor is held at, and when it was first seen
+        self._gap: tuple[int, float] | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self):
+        self._wake.set()
+
+    def _advance(self, position: int, events: list[dict]) -> int:
+        """The furthest position reachable over consecutive IDs, skipping gaps older than the timeout."""
+        for e in events:
+            if e["id"] != position + 1:
+                now = time.monotonic()
+                if self._gap is None or self._gap[0] != position + 1:
+                    self._gap = (position + 1, now)
+                if now - self._gap[1] < PROJECTION_GAP_TIMEOUT:
+                    return position
+            position = e["id"]
+        return position
+
+    async def _pass(self) -> bool:
+        """Apply one batch. Returns whether the cursor moved and more events may be waiting."""
+        position = await run_in_session(SessionLocal, load_position)
+        resp = await artwork_client.get("/artworks/events", None,
+                                        params={"after": position, "limit": PROJECTION_BATCH_SIZE})
+        resp.raise_for_status()
+        events = resp.json()
+        if not events:
+            return False
+        new_position = self._advance(position, events)
+        await run_in_session(SessionLocal, apply, events, new_position)
+        return new_position > position and len(events) == PROJECTION_BATCH_SIZE
+
+    async def _run(self):
+        while True:
+            try:
+                if await self._pass():
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Projection pass failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), PROJECTION_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+projector = OwnershipProjector()
+
+def _replay(engine, rebuild: bool) -> int:
+    """Catch the projection up from the command line, from the start of the feed if `rebuild`."""
+    models.Base.metadata.create_all(bind=engine)
+    db = Session(bind=engine)
+    try:
+        if rebuild:
+            reset(db)
+        position = load_position(db)
+        gaps = OwnershipProjector()
+        with httpx.Client(base_url=artwork_client.ARTWORK_URL, timeout=artwork_client.ARTWORK_TIMEOUT) as client:
+            while True:
+                resp = client.get("/artworks/events", params={"after": position, "limit": PROJECTION_BATCH_SIZE})
+                resp.raise_for_status()
+                events = resp.json()
+                if not events:
+                    return position
+                new_position = gaps._advance(position, events)
+                apply(db, events, new_position)
+                if new_position == position:
+                    # Held at a gap until it fills or times out
+                    time.sleep(PROJECTION_POLL_INTERVAL)
+                position = new_position
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Maintain the artwork ownership projection.")
+    ap.add_argument("command", choices=["rebuild", "sync"],
+                    help="rebuild: empty it and replay the whole feed; sync: catch up from the stored cursor")
+    args = ap.parse_args()
+    from database import engine
+    from common.db import run_offline
+    position = run_offline(engine, _replay, args.command == "rebuild")
+    print(f"Projection at artwork event {position}.")
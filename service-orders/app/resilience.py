@@ -0,0 +1,185 @@
+import asyncio
+import os
+import random
+import re
+import time
+import httpx
+
+# Consecutive failures (connection errors, timeouts, 5xx) that open a breaker
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+# Seconds an open breaker fails fast before letting a probe through
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "10"))
+# Concurrent probe calls allowed while half-open
+BREAKER_HALF_OPEN_MAX = int(os.getenv("BREAKER_HALF_OPEN_MAX", "1"))
+
+class CircuitOpenError(httpx.RequestError):
+    """Raised instead of calling an endpoint whose breaker is open."""
+
+class BulkheadFullError(httpx.RequestError):
+    """Raised when no call slot frees up within the bulkhead's wait time."""
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+def endpoint_key(method: str, path: str) -> str:
+    """Group calls per route: `POST /artworks/42/mark_sold` -> `POST /artworks/{id}/mark_sold`."""
+    return f"{method} {_ID_SEGMENT.sub('/{id}', path.split('?')[0])}"
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one upstream endpoint.
+
+    closed: calls pass; `failure_threshold` failures in a row open it.
+    open: calls fail fast with `CircuitOpenError` for `reset_timeout` seconds.
+    half_open: up to `half_open_max` probes pass; a success closes the
+    breaker, a failure opens it again.
+
+    Every `before_call` that returns must be paired with exactly one of
+    `record_success`, `record_failure` or `release`. All methods run on the
+    event loop, so no locking is needed.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT, half_open_max: int = BREAKER_HALF_OPEN_MAX):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max = half_open_max
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+        self.trips = 0
+        self.rejected = 0
+        self.successes = 0
+        self.failures = 0
+
+    def before_call(self):
+        """
+        Admit a call or fail fast.
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with all probe slots taken.
+        """
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state, self.probes = "half_open", 0
+        if self.state == "open" or (self.state == "half_open" and self.probes >= self.half_open_max):
+            self.rejected += 1
+            raise CircuitOpenError(f"Circuit open for {self.name}")
+        if self.state == "half_open":
+            self.probes += 1
+
+    def release(self):
+        """End an admitted call whose outcome says nothing about upstream health."""
+        if self.state == "half_open":
+            self.probes = max(0, self.probes - 1)
+
+    def record_success(self):
+        self.release()
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.state = "closed"
+
+    def record_failure(self):
+        self.release()
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == "half_open" or (self.state == "closed" and self.consecutive_failures >= self.failure_threshold):
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.trips += 1
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+class Bulkhead:
+    """
+    Caps concurrent calls to one upstream so a slow dependency cannot tie
+    up every request; callers wait at most `max_wait` seconds for a slot.
+    """
+
+    def __init__(self, name: str, size: int, max_wait: float):
+        self.name = name
+        self.size = size
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.rejected = 0
+        self._semaphore: asyncio.Semaphore | None = None
+
+    def _sem(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.size)
+        return self._semaphore
+
+    def has_capacity(self) -> bool:
+        return self.in_flight < self.size
+
+    async def run(self, fn):
+        """
+        Await `fn()` inside a slot.
+
+        Raises:
+            BulkheadFullError: If no slot frees up within `max_wait`.
+        """
+        sem = self._sem()
+        try:
+            await asyncio.wait_for(sem.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise BulkheadFullError(f"Too many concurrent calls to {self.name}")
+        self.in_flight += 1
+        try:
+            return await fn()
+        finally:
+            self.in_flight -= 1
+            sem.release()
+
+    def stats(self) -> dict:
+        return {"size": self.size, "in_flight": self.in_flight, "rejected": self.rejected}
+
+class HedgeStats:
+    def __init__(self):
+        self.fired = 0
+        self.won = 0
+
+async def hedged(send, delay: float, bulkhead: Bulkhead, stats: HedgeStats):
+    """
+    Run `send()` and, if it has not finished after `delay` seconds, race a
+    second copy against it; the first successful result wins and the other
+    call is cancelled. Only use for idempotent requests.
+
+    No hedge is sent when the bulkhead is full, so hedging never adds load
+    to an upstream that is already saturated.
+    """
+    first = asyncio.create_task(send())
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done or not bulkhead.has_capacity():
+        return await first
+    stats.fired += 1
+    second = asyncio.create_task(send())
+    pending = {first, second}
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        stats.won += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+def backoff(attempt: int, base: float) -> float:
+    """Full-jitter exponential backoff for retry `attempt` (0-based)."""
+    return random.uniform(0, base * 2 ** attempt)
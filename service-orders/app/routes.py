@@ -1,145 +1,348 @@
-from fastapi import APIRouter, HTTPException, Depends
+import time
+from datetime import datetime
+from typing import Literal
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-import models, schemas, database, auth_utils
-from database import SessionLocal
-import os, requests
+import httpx
+import models, schemas, database, artwork_client, events, pipeline
+from common import auth_utils, export, pagination, streaming
+from common.serialization import FastJSONResponse
+from common.db import AsyncDB, open_session, run_in_session
+from database import SessionLocal, ReadSessionLocal
 
 router = APIRouter()
-ARTWORK_URL = os.getenv("ARTWORK_SERVICE_URL", "http://artwork:8000")
 
-def get_db():
+# How often a long-polling GET /orders/{id} re-reads the order
+LONG_POLL_RECHECK = 1.0
+
+async def get_db():
     """
-    Dependency that provides a SQLAlchemy database session.
+    Dependency that provides a database session for async route handlers.
+
+    An `AsyncSession` when `DATABASE_URL` names an asyncio driver, otherwise
+    a sync session behind `ThreadedSession`; do the work with
+    `await db.run_sync(fn, ...)` either way.
 
     Yields:
-        Session: A SQLAlchemy session connected to the orders database.
+        AsyncDB: A session connected to the orders database.
     Ensures:
         The session is closed after use.
     """
-    db = SessionLocal()
+    db = open_session(SessionLocal)
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
+
+async def get_read_db():
+    """
+    Dependency that provides a read-only database session for GET routes.
+
+    Uses the separate read engine when `DB_READ_ENGINE` is enabled and
+    falls back to the primary engine otherwise.
+
+    Yields:
+        AsyncDB: A session for read queries.
+    Ensures:
+        The session is closed after use.
+    """
+    db = open_session(ReadSessionLocal)
+    try:
+        yield db
+    finally:
+        await db.close()
+
+def _create_order(db: Session, art_id: int, buyer: str) -> dict:
+    new_order = models.Order(art_id=art_id, buyer=buyer, status="created")
+    db.add(new_order)
+    db.flush()
+    pipeline.enqueue(db, new_order)
+    events.record(db, new_order.id, art_id, buyer, new_order.status)
+    # Build the response before committing so the session does not check a
+    # connection out again to refresh the expired order
+    out = {"id": new_order.id, "art_id": new_order.art_id, "buyer": new_order.buyer,
+           "status": new_order.status, "created_at": new_order.created_at}
+    db.commit()
+    return out
 
-@router.post("/orders", response_model=schemas.OrderOut)
-def create_order(
+@router.post("/orders", response_model=schemas.OrderOut, status_code=202)
+async def create_order(
     order_in: schemas.OrderCreate, 
-    token: str = Depends(auth_utils.oauth2_scheme), 
     user: dict = Depends(auth_utils.get_current_user), 
-    db: Session = Depends(get_db)
+    db: AsyncDB = Depends(get_db)
 ):
     """
-    Create a new order for an artwork.
+    Accept a new order for an artwork.
 
     Only users with role `user` or `admin` may place orders. The buyer
-    is automatically taken from the authenticated token. The function
-    verifies that the artwork exists and is not already sold by calling
-    the artwork service, and then attempts to mark the artwork as sold.
+    is automatically taken from the authenticated token. The order is
+    stored with status `created` together with an outbox entry in one
+    transaction, and the artwork is reserved in the background by the
+    outbox worker, which moves the order to `confirmed` or `failed`.
+    Poll `GET /orders/{id}?wait=` for the outcome.
 
     Args:
         order_in (schemas.OrderCreate): The incoming order request payload containing the artwork ID.
-        token (str): OAuth2 token for authenticating against the artwork service.
         user (dict): Authenticated user information from the token.
-        db (Session): Database session.
+        db (AsyncDB): Database session.
 
     Raises:
         HTTPException: 403 if the user role is not permitted to place orders.
-        HTTPException: 400 if the artwork does not exist, is already sold, or marking as sold fails.
 
     Returns:
-        schemas.OrderOut: The newly created order record with status "confirmed".
+        schemas.OrderOut: The accepted order with status "created" (HTTP 202).
     """
     if user.get("role") not in ("user", "admin"):
         raise HTTPException(status_code=403, detail="Only users or admins can place orders")
 
-    buyer = user.get("sub")
-    headers = {"Authorization": f"Bearer {token}"}
+    out = await db.run_sync(_create_order, order_in.art_id, user.get("sub"))
+    pipeline.worker.wake()
+    events.hub.wake()
+    return out
 
-    # Validate artwork
-    art_resp = requests.get(f"{ARTWORK_URL}/artworks/{order_in.art_id}", headers=headers, timeout=5)
-    if art_resp.status_code != 200:
-        raise HTTPException(status_code=400, detail="Artwork not found")
-    art = art_resp.json()
-    if art.get("is_sold"):
-        raise HTTPException(status_code=400, detail="Artwork already sold")
+def _load_order(db: Session, order_id: int) -> models.Order | None:
+    return db.query(models.Order).filter(models.Order.id == order_id).first()
 
-    # Mark artwork as sold
-    mark_resp = requests.post(f"{ARTWORK_URL}/artworks/{order_in.art_id}/mark_sold", headers=headers, timeout=5)
-    if mark_resp.status_code != 200:
-        raise HTTPException(status_code=400, detail="Failed to reserve artwork")
+# The `OrderOut` fields; listings and exports select these columns rather than whole ORM entities
+_ORDER_COLUMNS = [
+    models.Order.id, models.Order.art_id, models.Order.buyer, models.Order.status, models.Order.created_at,
+]
 
-    # Create order in DB
-    new_order = models.Order(art_id=order_in.art_id, buyer=buyer, status="confirmed")
-    db.add(new_order)
-    db.commit()
-    db.refresh(new_order)
-    return new_order
+@router.get("/orders/export")
+async def export_orders(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    status: Literal["created", "confirmed", "failed"] | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    user: dict = Depends(auth_utils.get_current_user),
+):
+    """
+    Stream the orders visible to the user as NDJSON or CSV.
+
+    Unlike `GET /orders`, the export is not paginated: rows are read with
+    a server-side cursor in batches of `EXPORT_BATCH_SIZE` and encoded as
+    they are fetched, so memory stays flat however large the order book
+    is and the first bytes are sent before the query finishes. Visibility
+    follows `GET /orders`. Rows are ordered by ID.
+
+    Args:
+        format (str, optional): `ndjson` or `csv`. Defaults to `ndjson`.
+        gzip (bool, optional): Gzip the body on the fly. Defaults to False.
+        status (str, optional): Only orders with this status.
+        created_after (datetime, optional): Only orders created at or after this time (UTC).
+        created_before (datetime, optional): Only orders created before this time (UTC).
+        user (dict): The authenticated user payload, containing role and username.
+
+    Raises:
+        HTTPException: 403 if the role may not list orders.
+
+    Returns:
+        StreamingResponse: The export, as an attachment.
+    """
+    role = user.get("role")
+    stmt = select(*_ORDER_COLUMNS).where(*_filters(status, created_after, created_before)).order_by(models.Order.id)
+    if role == "user":
+        stmt = stmt.where(models.Order.buyer == user.get("sub"))
+    elif role == "artist":
+        stmt = _owned_by(stmt, user.get("sub"))
+    elif role != "admin":
+        raise HTTPException(status_code=403, detail="Not allowed to export orders")
+    columns = [c.key for c in _ORDER_COLUMNS]
+    return export.streaming_export(ReadSessionLocal, [stmt], columns, format, gzip, "orders")
+
+@router.get("/orders/stream", response_class=StreamingResponse, responses=streaming.OPENAPI_RESPONSES)
+async def order_stream(
+    last_event_id: int | None = Header(None, alias="Last-Event-ID", ge=0),
+    after: int | None = Query(None, ge=0),
+    user: dict = Depends(auth_utils.get_stream_user),
+):
+    """
+    Push status changes of the caller's orders as Server-Sent Events.
+
+    Sends `order.created`, `order.confirmed` and `order.failed` events
+    (with the event ID, order ID, artwork, buyer and status) as orders are
+    placed and settled, so the client needs neither to re-list its orders
+    nor to long-poll each one. Visibility follows `GET /orders`: users get
+    their own orders, artists orders on their artworks, admins all orders.
+    The token may be passed as `?access_token=` for `EventSource`.
+    Reconnecting clients send `Last-Event-ID` and get the events they
+    missed before live ones.
+
+    Args:
+        last_event_id (int, optional): `Last-Event-ID` header of a reconnecting client.
+        after (int, optional): Resume after this event ID on a first connection.
+        user (dict): The authenticated user payload, containing role and username.
+
+    Raises:
+        HTTPException: 401 if the token is missing or invalid.
+        HTTPException: 403 if the role may not list orders.
+        HTTPException: 503 if `STREAM_MAX_CONNECTIONS` streams are already open.
+
+    Returns:
+        StreamingResponse: A `text/event-stream` of `schemas.OrderEvent` data.
+    """
+    role, username = user.get("role"), user.get("sub")
+    filters = {}
+    if role == "user":
+        filters["buyer"] = username
+    elif role == "artist":
+        filters["owner"] = username
+    elif role != "admin":
+        raise HTTPException(status_code=403, detail="Not allowed to list orders")
+
+    async def backlog(start: int, limit: int) -> list[dict]:
+        return await run_in_session(ReadSessionLocal, events.read_stream, start, limit, **filters)
+
+    def match(event: dict) -> bool:
+        return all(event[key] == value for key, value in filters.items())
 
-@router.get("/orders/{order_id}")
-def get_order(order_id: int, db: Session = Depends(get_db)):
+    resume = last_event_id if last_event_id is not None else after
+    return streaming.event_stream(events.hub, match, backlog, resume)
+
+@router.get("/orders/{order_id}", response_model=schemas.OrderOut)
+async def get_order(order_id: int, wait: float = Query(0, ge=0, le=30)):
     """
     Retrieve an order by its ID.
 
+    With `wait`, a request for an order that is still `created` is held
+    until the order is confirmed or failed, or `wait` seconds pass
+    (long polling), instead of making clients poll in a tight loop.
+
     Args:
         order_id (int): The ID of the order to retrieve.
-        db (Session): Database session.
+        wait (float, optional): Seconds to wait for a final status. Defaults to 0.
 
     Raises:
         HTTPException: 404 if the order does not exist.
 
     Returns:
-        models.Order: The order record.
+        schemas.OrderOut: The order record.
     """
-    o = db.query(models.Order).filter(models.Order.id == order_id).first()
+    o = await run_in_session(ReadSessionLocal, _load_order, order_id)
     if not o:
         raise HTTPException(status_code=404, detail="Order not found")
+    deadline = time.monotonic() + wait
+    while o.status == "created" and (remaining := deadline - time.monotonic()) > 0:
+        # Notifications only come from this process's worker; re-check the DB
+        # periodically in case another replica finished the order
+        await pipeline.worker.wait_for(order_id, min(remaining, LONG_POLL_RECHECK))
+        o = await run_in_session(ReadSessionLocal, _load_order, order_id)
     return o
 
-@router.get("/orders", response_model=list[schemas.OrderOut])
-def list_orders(
+def _filters(status: str | None, created_after: datetime | None, created_before: datetime | None) -> list:
+    conditions = []
+    if status is not None:
+        conditions.append(models.Order.status == status)
+    if created_after is not None:
+        conditions.append(models.Order.created_at >= created_after)
+    if created_before is not None:
+        conditions.append(models.Order.created_at < created_before)
+    return conditions
+
+def _owned_by(stmt, owner: str):
+    """Restrict an orders statement to artworks owned by `owner`, joining the local ownership projection."""
+    return stmt.join(models.ArtworkOwner, models.ArtworkOwner.art_id == models.Order.art_id).where(
+        models.ArtworkOwner.owner == owner)
+
+def _page(db: Session, stmt, order: str, after_id: int | None, limit: int) -> list[dict]:
+    asc = order == "asc"
+    if after_id is not None:
+        stmt = stmt.where(models.Order.id > after_id if asc else models.Order.id < after_id)
+    stmt = stmt.order_by(models.Order.id if asc else models.Order.id.desc()).limit(limit)
+    return [
+        {"id": order_id, "art_id": art_id, "buyer": buyer, "status": status, "created_at": created_at}
+        for order_id, art_id, buyer, status, created_at in db.execute(stmt)
+    ]
+
+@router.get("/orders", response_model=list[schemas.OrderDetailOut], response_model_exclude_unset=True)
+async def list_orders(
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    order: Literal["asc", "desc"] = "desc",
+    status: Literal["created", "confirmed", "failed"] | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    include_artwork: bool = False,
     token: str = Depends(auth_utils.oauth2_scheme),
     user: dict = Depends(auth_utils.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncDB = Depends(get_read_db)
 ):
     """
-    Retrieve a list of orders, filtered by the role of the authenticated user.
+    Retrieve a page of orders, filtered by the role of the authenticated user.
 
     Behavior by role:
         - user: Sees only their own orders.
-        - artist: Sees orders for artworks they own. Ownership is resolved by calling the artwork service.
+        - artist: Sees orders for artworks they own, from the local `artwork_owner`
+          projection of the artwork service's event feed (one indexed join, no
+          artwork call). Artworks created in the last `PROJECTION_POLL_INTERVAL`
+          seconds may not be in it yet.
         - admin: Sees all orders.
 
+    Orders are sorted by ID, newest first by default, and paginated by
+    keyset: when more rows remain, the opaque cursor for the next page is
+    returned in the `X-Next-Cursor` response header; pass it back
+    unchanged as `cursor` with the same `order`.
+
+    Rows are selected as column tuples and encoded straight to JSON with
+    `FastJSONResponse`; `response_model` only documents the schema.
+
     Args:
-        token (str): OAuth2 token used for authorization when querying the artwork service.
+        cursor (str, optional): Cursor returned by the previous page.
+        limit (int, optional): Page size. Defaults to 100.
+        order (str, optional): `desc` (newest first) or `asc`. Defaults to `desc`.
+        status (str, optional): Only orders with this status.
+        created_after (datetime, optional): Only orders created at or after this time (UTC).
+        created_before (datetime, optional): Only orders created before this time (UTC).
+        include_artwork (bool, optional): Add the artwork's title, price and owner to
+            each order, resolved with one batched artwork lookup. Defaults to False.
+        token (str): OAuth2 token forwarded to the artwork service for `include_artwork`.
         user (dict): The authenticated user payload, containing role and username.
-        db (Session): Database session.
+        db (AsyncDB): Database session.
 
     Raises:
-        HTTPException: 400 if the artwork service fails when fetching artist-owned artworks.
+        HTTPException: 400 if the cursor is invalid or the artwork service fails
+            when fetching artwork details.
+        HTTPException: 503 if the artwork service cannot be reached for `include_artwork`.
 
     Returns:
-        list[schemas.OrderOut]: A list of orders visible to the user according to their role.
+        list[schemas.OrderDetailOut]: A page of orders visible to the user according to their role.
+            `artwork` is only present when `include_artwork` is set, and is null for
+            artworks that no longer exist.
     """
     role = user.get("role")
     username = user.get("sub")
 
-    query = db.query(models.Order)
+    after_id = pagination.decode_cursor(cursor, "id", order)[1] if cursor else None
+    stmt = select(*_ORDER_COLUMNS).where(*_filters(status, created_after, created_before))
 
     if role == "user":
-        return query.filter(models.Order.buyer == username).all()
-    
+        stmt = stmt.where(models.Order.buyer == username)
+
     elif role == "artist":
-        headers = {"Authorization": f"Bearer {token}"}
-        resp = requests.get(f"{ARTWORK_URL}/artworks", headers=headers, timeout=5)
-        if resp.status_code != 200:
-            raise HTTPException(status_code=400, detail="Failed to fetch artworks")
+        stmt = _owned_by(stmt, username)
+
+    elif role != "admin":
+        return []
 
-        artworks = resp.json()
-        artist_art_ids = [a["id"] for a in artworks if a["owner"] == username]
-        return query.filter(models.Order.art_id.in_(artist_art_ids)).all()
-        
-    elif role == "admin":
-        return query.all()
+    orders = await db.run_sync(_page, stmt, order, after_id, limit + 1)
+    headers = {}
+    if len(orders) > limit:
+        orders = orders[:limit]
+        headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(
+            "id", order, orders[-1]["id"], orders[-1]["id"]
+        )
 
-    return []
+    if include_artwork:
+        try:
+            artworks = await artwork_client.batch_get([o["art_id"] for o in orders], token)
+        except httpx.RequestError:
+            raise HTTPException(status_code=503, detail="Artwork service unavailable")
+        except httpx.HTTPStatusError:
+            raise HTTPException(status_code=400, detail="Failed to fetch artworks")
+        for o in orders:
+            art = artworks.get(o["art_id"])
+            o["artwork"] = {"title": art["title"], "price": art["price"], "owner": art["owner"]} if art else None
+    return FastJSONResponse(orders, headers=headers)
@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel
 
 class OrderCreate(BaseModel):
@@ -8,6 +9,24 @@ class OrderOut(BaseModel):
     art_id: int
     buyer: str
     status: str
+    created_at: datetime | None = None
 
     class Config:
         orm_mode = True
+
+class ArtworkSummary(BaseModel):
+    title: str
+    price: float
+    owner: str
+
+class OrderDetailOut(OrderOut):
+    artwork: ArtworkSummary | None = None
+
+class OrderEvent(BaseModel):
+    id: int
+    type: str  # order.created | order.confirmed | order.failed
+    order_id: int
+    art_id: int
+    buyer: str
+    status: str
+    owner: str | None = None  # artwork owner, once the ownership projection has it
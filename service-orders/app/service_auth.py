@@ -0,0 +1,71 @@
+import asyncio
+import os
+import time
+import httpx
+
+AUTH_URL = os.getenv("AUTH_SERVICE_URL", "http://auth:8000")
+# Credentials this service presents at the auth service's /auth/service_token
+SERVICE_CLIENT_ID = os.getenv("SERVICE_CLIENT_ID", "orders")
+SERVICE_CLIENT_SECRET = os.getenv("SERVICE_CLIENT_SECRET", "")
+SERVICE_TOKEN_TIMEOUT = float(os.getenv("SERVICE_TOKEN_TIMEOUT", "5"))
+# A cached token is replaced this many seconds before it expires
+SERVICE_TOKEN_RENEW_BEFORE = 60
+
+class ServiceToken:
+    """
+    The orders service's own access token, for calls it makes on its own
+    behalf rather than for a user (the outbox worker's reservations).
+
+    Fetched from the auth service with the client credentials grant, cached
+    and renewed shortly before it expires; concurrent callers share one
+    fetch.
+
+    Args:
+        url (str): Base URL of the auth service.
+        client_id (str): Client ID registered in the auth service's `SERVICE_CLIENTS`.
+        client_secret (str): The client's secret.
+    """
+
+    def __init__(self, url: str, client_id: str, client_secret: str):
+        self.url = url.rstrip("/") + "/auth/service_token"
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self._token: str | None = None
+        self._renew_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> str:
+        """
+        Return a valid token, fetching a new one when none is cached or it is due for renewal.
+
+        Raises:
+            RuntimeError: If no client secret is configured.
+            httpx.HTTPError: If the auth service is unreachable or refuses the credentials.
+        """
+        if self._token is not None and time.monotonic() < self._renew_at:
+            return self._token
+        async with self._lock:
+            if self._token is None or time.monotonic() >= self._renew_at:
+                await self._fetch()
+            return self._token
+
+    def invalidate(self):
+        """Drop the cached token, e.g. after a service rejected it."""
+        self._token = None
+
+    async def _fetch(self):
+        if not self.client_secret:
+            raise RuntimeError("SERVICE_CLIENT_SECRET is not set")
+        async with httpx.AsyncClient(timeout=SERVICE_TOKEN_TIMEOUT) as client:
+            resp = await client.post(self.url, data={
+                "grant_type": "client_credentials",
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+            })
+            resp.raise_for_status()
+        body = resp.json()
+        lifetime = body["expires_in"]
+        self._token = body["access_token"]
+        self._renew_at = time.monotonic() + max(lifetime - SERVICE_TOKEN_RENEW_BEFORE, lifetime / 2)
+
+token = ServiceToken(AUTH_URL, SERVICE_CLIENT_ID, SERVICE_CLIENT_SECRET)
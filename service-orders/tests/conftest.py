@@ -0,0 +1,23 @@
+import os
+import sys
+import tempfile
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The service imports its modules flat from app/, and shared code from common/
+sys.path[:0] = [os.path.join(ROOT, "service-orders", "app"), ROOT]
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/orders.db")
+
+@pytest.fixture
+def db(tmp_path):
+    import models
+
+    engine = create_engine(f"sqlite:///{tmp_path}/orders.db")
+    models.Base.metadata.create_all(bind=engine)
+    session = Session(bind=engine)
+    yield session
+    session.close()
+    engine.dispose()
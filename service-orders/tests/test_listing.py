@@ -0,0 +1,75 @@
+import asyncio
+import json
+import pytest
+from fastapi import HTTPException
+import models, routes
+from common import pagination
+from common.db import ThreadedSession
+
+USERS = {
+    "buyer": {"sub": "buyer", "role": "user"},
+    "artist": {"sub": "artist", "role": "artist"},
+    "admin": {"sub": "admin", "role": "admin"},
+}
+
+@pytest.fixture
+def orders(db):
+    """Ten orders: even art IDs belong to `artist`, every third order is `buyer`'s and failed."""
+    db.add_all(models.ArtworkOwner(art_id=a, owner="artist" if a % 2 == 0 else "other") for a in range(1, 6))
+    for i in range(10):
+        db.add(models.Order(art_id=i % 5 + 1, buyer="buyer" if i % 3 == 0 else "someone",
+                            status="failed" if i % 3 == 0 else "confirmed"))
+    db.commit()
+    return [(o.id, o.art_id, o.buyer, o.status) for o in db.query(models.Order).order_by(models.Order.id)]
+
+def list_page(db, user, cursor=None, limit=3, order="desc", status=None):
+    resp = asyncio.run(routes.list_orders(
+        cursor=cursor, limit=limit, order=order, status=status, created_after=None, created_before=None,
+        include_artwork=False, token="token", user=USERS[user], db=ThreadedSession(db),
+    ))
+    return [o["id"] for o in json.loads(resp.body)], resp.headers.get(pagination.NEXT_CURSOR_HEADER)
+
+def walk(db, user, **kwargs):
+    ids, pages, cursor = [], 0, None
+    while True:
+        page, cursor = list_page(db, user, cursor=cursor, **kwargs)
+        ids += page
+        pages += 1
+        if cursor is None:
+            return ids, pages
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+@pytest.mark.parametrize("user, visible", [
+    ("admin", lambda o: True),
+    ("buyer", lambda o: o[2] == "buyer"),
+    ("artist", lambda o: o[1] % 2 == 0),
+])
+def test_pages_cover_visible_orders_once_in_order(db, orders, order, user, visible):
+    expected = sorted((o[0] for o in orders if visible(o)), reverse=order == "desc")
+    ids, pages = walk(db, user, order=order)
+    assert ids == expected
+    assert pages == max(1, -(-len(expected) // 3))
+
+def test_status_filter_applies_on_every_page(db, orders):
+    ids, _ = walk(db, "admin", limit=2, status="failed")
+    assert ids == sorted((o[0] for o in orders if o[3] == "failed"), reverse=True)
+
+def test_cursor_round_trip():
+    cursor = pagination.encode_cursor("price", "asc", 12.5, 42)
+    assert "=" not in cursor
+    assert pagination.decode_cursor(cursor, "price", "asc") == (12.5, 42)
+
+@pytest.mark.parametrize("cursor, sort_by, order", [
+    (pagination.encode_cursor("id", "desc", 7, 7), "id", "asc"),
+    (pagination.encode_cursor("id", "desc", 7, 7), "price", "desc"),
+    ("not-a-cursor", "id", "desc"),
+])
+def test_mismatched_or_malformed_cursor_is_rejected(cursor, sort_by, order):
+    with pytest.raises(HTTPException) as exc:
+        pagination.decode_cursor(cursor, sort_by, order)
+    assert exc.value.status_code == 400
+
+def test_cursor_from_another_order_is_rejected(db, orders):
+    _, cursor = list_page(db, "admin", order="desc")
+    with pytest.raises(HTTPException):
+        list_page(db, "admin", cursor=cursor, order="asc")
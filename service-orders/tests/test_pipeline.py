@@ -0,0 +1,116 @@
+import asyncio
+import types
+import httpx
+import pytest
+import models, pipeline
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(pipeline, "time", types.SimpleNamespace(time=lambda: now[0]))
+    monkeypatch.setattr(pipeline, "OUTBOX_LEASE", 30.0)
+    return now
+
+def place(db, art_id=1):
+    order = models.Order(art_id=art_id, buyer="buyer", status="created")
+    db.add(order)
+    db.flush()
+    pipeline.enqueue(db, order)
+    db.commit()
+    return order.id
+
+def outbox(db, order_id):
+    db.expire_all()
+    return db.query(models.OrderOutbox).filter(models.OrderOutbox.order_id == order_id).one_or_none()
+
+def status(db, order_id):
+    db.expire_all()
+    return db.get(models.Order, order_id).status
+
+def test_claim_leases_due_entries(db, clock):
+    ids = [place(db, art_id=i) for i in range(3)]
+    claimed = pipeline._claim_batch(db)
+    assert [e["order_id"] for e in claimed] == ids
+    assert all(outbox(db, i).next_attempt_at == 1030.0 for i in ids)
+    # Leased entries are invisible to a second worker
+    assert pipeline._claim_batch(db) == []
+
+def test_claim_respects_batch_size(db, clock, monkeypatch):
+    monkeypatch.setattr(pipeline, "OUTBOX_BATCH_SIZE", 2)
+    ids = [place(db, art_id=i) for i in range(3)]
+    assert [e["order_id"] for e in pipeline._claim_batch(db)] == ids[:2]
+    assert [e["order_id"] for e in pipeline._claim_batch(db)] == ids[2:]
+
+def test_expired_lease_is_claimed_again(db, clock):
+    order_id = place(db)
+    assert len(pipeline._claim_batch(db)) == 1
+    clock[0] += 29
+    assert pipeline._claim_batch(db) == []
+    clock[0] += 2
+    assert [e["order_id"] for e in pipeline._claim_batch(db)] == [order_id]
+
+def test_retry_backs_off_and_keeps_the_order_open(db, clock, monkeypatch):
+    monkeypatch.setattr(pipeline, "_backoff", lambda attempts: 4.0 * attempts)
+    order_id = place(db)
+    entry = pipeline._claim_batch(db)[0]
+    assert pipeline._apply(db, [(entry, "retry", "ConnectError")]) == []
+    row = outbox(db, order_id)
+    assert (row.attempts, row.next_attempt_at, row.last_error) == (1, 1004.0, "ConnectError")
+    assert status(db, order_id) == "created"
+    assert pipeline._claim_batch(db) == []
+    clock[0] += 4
+    assert [e["attempts"] for e in pipeline._claim_batch(db)] == [1]
+
+def test_retry_on_last_attempt_fails_the_order(db, clock, monkeypatch):
+    monkeypatch.setattr(pipeline, "OUTBOX_MAX_ATTEMPTS", 3)
+    order_id = place(db)
+    entry = dict(pipeline._claim_batch(db)[0], attempts=2)
+    assert pipeline._apply(db, [(entry, "retry", "artwork responded 503")]) == [order_id]
+    assert status(db, order_id) == "failed"
+    assert outbox(db, order_id) is None
+
+def test_final_outcomes_update_the_order_and_record_an_event(db, clock):
+    confirmed, failed = place(db, art_id=1), place(db, art_id=2)
+    entries = pipeline._claim_batch(db)
+    results = [(entries[0], "confirmed", None), (entries[1], "failed", "artwork responded 400")]
+    assert pipeline._apply(db, results) == [confirmed, failed]
+    assert (status(db, confirmed), status(db, failed)) == ("confirmed", "failed")
+    assert outbox(db, confirmed) is None and outbox(db, failed) is None
+    assert [(e.order_id, e.status) for e in db.query(models.OrderEvent).order_by(models.OrderEvent.id)] == [
+        (confirmed, "confirmed"), (failed, "failed")]
+
+class FakeToken:
+    def __init__(self):
+        self.invalidated = 0
+
+    async def get(self):
+        return "service-token"
+
+    def invalidate(self):
+        self.invalidated += 1
+
+@pytest.mark.parametrize("response, outcome", [
+    (200, "confirmed"),
+    (400, "failed"),
+    (404, "failed"),
+    (401, "retry"),
+    (503, "retry"),
+    (httpx.ConnectError("refused"), "retry"),
+])
+def test_reserve_outcomes(monkeypatch, response, outcome):
+    token = FakeToken()
+    calls = []
+
+    async def post(path, bearer, params=None):
+        calls.append((path, bearer, params))
+        if isinstance(response, Exception):
+            raise response
+        return httpx.Response(response)
+
+    monkeypatch.setattr(pipeline.service_auth, "token", token)
+    monkeypatch.setattr(pipeline.artwork_client, "post", post)
+    entry = {"id": 1, "order_id": 7, "art_id": 3, "attempts": 0, "traceparent": None}
+    assert asyncio.run(pipeline._reserve(entry))[1] == outcome
+    assert calls == [("/artworks/3/mark_sold", "service-token", {"ref": "order:7"})]
+    # A rejected service token is dropped so the next attempt fetches a new one
+    assert token.invalidated == (1 if response == 401 else 0)
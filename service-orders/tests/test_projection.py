@@ -0,0 +1,42 @@
+import types
+import pytest
+import projection
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(projection, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    monkeypatch.setattr(projection, "PROJECTION_GAP_TIMEOUT", 5.0)
+    return now
+
+def events(*ids):
+    return [{"id": i} for i in ids]
+
+def test_consecutive_events_advance(clock):
+    assert projection.OwnershipProjector()._advance(5, events(6, 7, 8)) == 8
+
+def test_gap_is_held_then_skipped_after_timeout(clock):
+    p = projection.OwnershipProjector()
+    assert p._advance(5, events(7, 8)) == 5
+    clock[0] += 4.9
+    assert p._advance(5, events(7, 8)) == 5
+    clock[0] += 0.2
+    assert p._advance(5, events(7, 8)) == 8
+
+def test_filled_gap_does_not_expire_the_next_one(clock):
+    p = projection.OwnershipProjector()
+    assert p._advance(5, events(7, 8)) == 5
+    clock[0] += 3
+    assert p._advance(5, events(6, 7, 8)) == 8
+    clock[0] += 3
+    # 9 is a new gap: it gets its own timeout rather than the one started for 6
+    assert p._advance(8, events(10)) == 8
+    clock[0] += 5
+    assert p._advance(8, events(10)) == 10
+
+def test_skipped_gap_does_not_expire_the_next_one(clock):
+    p = projection.OwnershipProjector()
+    assert p._advance(5, events(7)) == 5
+    clock[0] += 6
+    assert p._advance(5, events(7, 9)) == 7
+    assert p._advance(7, events(9)) == 7
@@ -0,0 +1,127 @@
+import asyncio
+import types
+import pytest
+import resilience
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [50.0]
+    monkeypatch.setattr(resilience, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+def fail(breaker, times):
+    for _ in range(times):
+        breaker.before_call()
+        breaker.record_failure()
+
+def test_endpoint_key_groups_ids():
+    assert resilience.endpoint_key("POST", "/artworks/42/mark_sold?ref=order:1") == "POST /artworks/{id}/mark_sold"
+    assert resilience.endpoint_key("GET", "/artworks/42") == "GET /artworks/{id}"
+    assert resilience.endpoint_key("GET", "/artworks/ids") == "GET /artworks/ids"
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    b = resilience.CircuitBreaker("t", failure_threshold=3, reset_timeout=10)
+    fail(b, 2)
+    b.before_call()
+    b.record_success()
+    fail(b, 2)
+    assert b.state == "closed"
+    fail(b, 1)
+    assert (b.state, b.trips) == ("open", 1)
+    with pytest.raises(resilience.CircuitOpenError):
+        b.before_call()
+    assert b.rejected == 1
+
+def test_half_open_probe_success_closes(clock):
+    b = resilience.CircuitBreaker("t", failure_threshold=1, reset_timeout=10, half_open_max=1)
+    fail(b, 1)
+    clock[0] += 10
+    b.before_call()
+    assert b.state == "half_open"
+    # Only one probe at a time
+    with pytest.raises(resilience.CircuitOpenError):
+        b.before_call()
+    b.record_success()
+    assert (b.state, b.consecutive_failures) == ("closed", 0)
+    b.before_call()
+
+def test_half_open_probe_failure_reopens(clock):
+    b = resilience.CircuitBreaker("t", failure_threshold=1, reset_timeout=10)
+    fail(b, 1)
+    clock[0] += 10
+    fail(b, 1)
+    assert (b.state, b.trips) == ("open", 2)
+    clock[0] += 9
+    with pytest.raises(resilience.CircuitOpenError):
+        b.before_call()
+
+def test_release_frees_the_probe_slot(clock):
+    b = resilience.CircuitBreaker("t", failure_threshold=1, reset_timeout=10)
+    fail(b, 1)
+    clock[0] += 10
+    b.before_call()
+    b.release()
+    b.before_call()
+    assert b.state == "half_open"
+
+def test_bulkhead_caps_concurrency_and_rejects_after_wait():
+    async def scenario():
+        bulkhead = resilience.Bulkhead("t", size=2, max_wait=0.05)
+        gate = asyncio.Event()
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            peak = max(peak, bulkhead.in_flight)
+            await gate.wait()
+            return "ok"
+
+        held = [asyncio.create_task(bulkhead.run(call)) for _ in range(2)]
+        while bulkhead.has_capacity():
+            await asyncio.sleep(0)
+        with pytest.raises(resilience.BulkheadFullError):
+            await bulkhead.run(call)
+        gate.set()
+        assert await asyncio.gather(*held) == ["ok", "ok"]
+        assert (peak, bulkhead.in_flight, bulkhead.rejected) == (2, 0, 1)
+        # Slots are returned after errors too
+        with pytest.raises(ValueError):
+            await bulkhead.run(broken)
+        assert bulkhead.in_flight == 0 and bulkhead.has_capacity()
+
+    async def broken():
+        raise ValueError("boom")
+
+    asyncio.run(scenario())
+
+def test_hedge_wins_when_first_call_stalls():
+    async def scenario():
+        bulkhead = resilience.Bulkhead("t", size=5, max_wait=1)
+        stats = resilience.HedgeStats()
+        calls = []
+
+        async def send():
+            call = "first" if not calls else "hedge"
+            calls.append(call)
+            await asyncio.sleep(1 if call == "first" else 0)
+            return call
+
+        assert await resilience.hedged(send, 0.01, bulkhead, stats) == "hedge"
+        assert calls == ["first", "hedge"]
+        assert (stats.fired, stats.won) == (1, 1)
+
+    asyncio.run(scenario())
+
+def test_no_hedge_when_bulkhead_is_full():
+    async def scenario():
+        bulkhead = resilience.Bulkhead("t", size=0, max_wait=1)
+        stats = resilience.HedgeStats()
+
+        async def send():
+            await asyncio.sleep(0.02)
+            return "first"
+
+        assert await resilience.hedged(send, 0.01, bulkhead, stats) == "first"
+        assert stats.fired == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,76 @@
+import asyncio
+import ipaddress
+import types
+import pytest
+from fastapi import HTTPException
+from common import ratelimit
+
+@pytest.fixture
+def trust(monkeypatch):
+    def set_trusted(spec: str):
+        monkeypatch.setattr(ratelimit, "_trusted_proxies", ratelimit.parse_networks(spec))
+    set_trusted("")
+    return set_trusted
+
+def key(peer, xff=None, token=None):
+    headers = {}
+    if xff is not None:
+        headers[b"x-forwarded-for"] = xff.encode()
+    if token is not None:
+        headers[b"authorization"] = f"Bearer {token}".encode()
+    return ratelimit._client_key({"client": (peer, 50000) if peer else None}, headers)
+
+def test_parse_networks():
+    assert ratelimit.parse_networks(" 172.28.0.10, 10.0.0.0/8 ,,fd00::/8") == (
+        ipaddress.ip_network("172.28.0.10/32"),
+        ipaddress.ip_network("10.0.0.0/8"),
+        ipaddress.ip_network("fd00::/8"),
+    )
+    assert ratelimit.parse_networks("") == ()
+    # Host bits are tolerated rather than failing startup
+    assert ratelimit.parse_networks("10.1.2.3/8") == (ipaddress.ip_network("10.0.0.0/8"),)
+
+def test_forwarded_for_is_ignored_without_trusted_proxies(trust):
+    assert key("203.0.113.7", xff="198.51.100.1") == "ip:203.0.113.7"
+
+def test_forwarded_for_is_ignored_from_untrusted_peer(trust):
+    trust("172.28.0.10")
+    assert key("172.28.0.11", xff="198.51.100.1") == "ip:172.28.0.11"
+
+def test_trusted_proxy_uses_the_address_it_appended(trust):
+    trust("172.28.0.10")
+    assert key("172.28.0.10", xff="198.51.100.1") == "ip:198.51.100.1"
+    # A client cannot pick its bucket by sending its own X-Forwarded-For through the proxy
+    assert key("172.28.0.10", xff="1.2.3.4, 5.6.7.8 , 198.51.100.1") == "ip:198.51.100.1"
+    assert key("172.28.0.10") == "ip:172.28.0.10"
+
+def test_trusted_networks(trust):
+    trust("10.0.0.0/8, ::1")
+    assert key("10.200.0.5", xff="198.51.100.1") == "ip:198.51.100.1"
+    assert key("::1", xff="198.51.100.2") == "ip:198.51.100.2"
+    assert key("11.0.0.1", xff="198.51.100.1") == "ip:11.0.0.1"
+
+def test_non_ip_peer_is_never_trusted(trust):
+    trust("0.0.0.0/0")
+    assert key("testclient", xff="198.51.100.1") == "ip:testclient"
+    assert key(None) == "ip:unknown"
+
+def test_valid_token_is_keyed_per_user(trust, monkeypatch):
+    def decode(token):
+        if token != "good":
+            raise HTTPException(status_code=401, detail="Invalid token")
+        return {"sub": "alice"}
+
+    monkeypatch.setattr(ratelimit.auth_utils, "decode_token", decode)
+    trust("172.28.0.10")
+    assert key("172.28.0.10", xff="198.51.100.1", token="good") == "user:alice"
+    assert key("172.28.0.10", xff="198.51.100.1", token="forged") == "ip:198.51.100.1"
+
+def test_token_bucket_refills_at_rate(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(ratelimit, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    store = ratelimit.InMemoryStore(maxsize=10)
+    take = lambda cost=1: asyncio.run(store.take("ip:a", cost, 2.0, 4.0))[0]
+    assert [take() for _ in range(5)] == [True, True, True, True, False]
+    now[0] += 1
+    assert take(2) and not take()